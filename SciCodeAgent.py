@@ -1,12 +1,10 @@
 """Green agent adapted to evaluate white agents on SciCode problems."""
 
 import os
-import sys
+import ast
 import json
 import time
-import tempfile
 import shutil
-import subprocess
 import textwrap
 from typing import Tuple, Optional
 import dotenv
@@ -16,11 +14,14 @@ from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import AgentCard, SendMessageSuccessResponse, Message
 from a2a.utils import new_agent_text_message, get_text_parts
 
 from src.my_util import parse_tags, my_a2a
+from src.sandbox import run_script_async, sandbox_pool
+from src.harness_cache import harness_cache
+from src.metrics import metrics_endpoint
+from src.task_store import SQLiteTaskStore, make_task_store
 
 try: 
     import scicode  # type: ignore
@@ -106,7 +107,49 @@ def load_scicode_problem(problem_id: str, scicode_root: Optional[str] = None) :
             "meta": {"problem_id": problem_id},
         }
 
-def run_tests_against_code(code_str: str, tests: list[str], timeout: int = 30):
+def _test_statements(test: str) -> list:
+    """Statements of one test; a test that does not compile on its own is run through `exec`, so it fails alone."""
+    try:
+        compile(test, "<test>", "exec", dont_inherit=True)
+        return ast.parse(test).body or [ast.Pass()]
+    except (SyntaxError, ValueError):
+        return ast.parse(f"exec({test!r})").body
+
+def build_tests_harness(tests: list[str]) -> str:
+    """
+    Build the test execution code appended after a submission.
+
+    Tests are inlined into the harness, which is compiled once in the harness
+    cache. Each test's statements are placed in its try block as AST nodes,
+    so multi-line string literals in tests are left as they are.
+    """
+    harness = ast.parse(
+        "if __name__ == '__main__':\n"
+        "    import sys\n"
+        "    passed_count = 0\n"
+        "    failed_count = 0\n"
+        "    if failed_count > 0:\n"
+        "        print(f'Total: {passed_count} passed, {failed_count} failed', file=sys.stderr)\n"
+        "        sys.exit(1)\n"
+        "    else:\n"
+        "        print(f'All {passed_count} tests passed')\n"
+    )
+    main = harness.body[0].body
+    for i, test in enumerate(tests):
+        guard = ast.parse(
+            "try:\n"
+            "    pass\n"
+            "    passed_count += 1\n"
+            f"    print(f'Test {i+1} passed')\n"
+            "except Exception as e:\n"
+            "    failed_count += 1\n"
+            f"    print(f'Test {i+1} failed: {{e}}', file=sys.stderr)\n"
+        ).body[0]
+        guard.body[:1] = _test_statements(test)
+        main.insert(len(main) - 1, guard)
+    return harness_cache.prepare("# Test execution\n" + ast.unparse(harness) + "\n")
+
+async def run_tests_against_code(code_str: str, tests: list[str], timeout: int = 30):
     """
     Run the given 'code_str' against the SciCode 'tests'.
     Returns (pass_bool, info_dict)
@@ -119,71 +162,12 @@ def run_tests_against_code(code_str: str, tests: list[str], timeout: int = 30):
     Returns:
         Tuple of (passed: bool, info: dict) where info contains execution details
     """
-    # Create temporary directory for test execution
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # Write the code to a temporary file
-        code_file = os.path.join(tmpdir, "solution.py")
-        with open(code_file, "w", encoding="utf-8") as f:
-            f.write(code_str)
-            # Add test execution code
-            f.write("\n\n# Test execution\n")
-            f.write("if __name__ == '__main__':\n")
-            f.write("    import sys\n")
-            f.write("    passed_count = 0\n")
-            f.write("    failed_count = 0\n")
-            
-            # For each test, execute it
-            for i, test in enumerate(tests):
-                f.write(f"    # Test {i+1}\n")
-                f.write(f"    try:\n")
-                f.write(f"        exec({repr(test)})\n")
-                f.write(f"        passed_count += 1\n")
-                f.write(f"        print(f'Test {i+1} passed')\n")
-                f.write(f"    except Exception as e:\n")
-                f.write(f"        failed_count += 1\n")
-                f.write(f"        print(f'Test {i+1} failed: {{e}}', file=sys.stderr)\n")
-            
-            f.write("    if failed_count > 0:\n")
-            f.write("        print(f'Total: {{passed_count}} passed, {{failed_count}} failed', file=sys.stderr)\n")
-            f.write("        sys.exit(1)\n")
-            f.write("    else:\n")
-            f.write("        print(f'All {{passed_count}} tests passed')\n")
+    harness = build_tests_harness(tests)
+    with harness_cache.work_dir() as work_dir:
+        code_file = harness_cache.write_script(work_dir, code_str, harness)
         
-        # Run the test
-        try:
-            result = subprocess.run(
-                [sys.executable, code_file],
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                cwd=tmpdir
-            )
-            
-            passed = result.returncode == 0
-            info = {
-                "returncode": result.returncode,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "passed": passed
-            }
-            return passed, info
-            
-        except subprocess.TimeoutExpired:
-            return False, {
-                "returncode": -1,
-                "stdout": "",
-                "stderr": f"Test execution timed out after {timeout} seconds",
-                "passed": False,
-                "timeout": True
-            }
-        except Exception as e:
-            return False, {
-                "returncode": -1,
-                "stdout": "",
-                "stderr": f"Error running tests: {str(e)}",
-                "passed": False,
-                "error": str(e)
-            }
+        # Run the test (warm worker pool, or a fresh interpreter as fallback)
+        return await run_script_async(code_file, work_dir, timeout=timeout)
 
 async def ask_scicode_to_solve(white_agent_url: str, problem_id: str, max_num_steps: int = 3):
     """
@@ -248,7 +232,7 @@ We will run your code against SciCode testcases and report pass/fail.
             code_candidate = white_text
 
         # Run tests
-        passed, info = run_tests_against_code(code_candidate, tests, timeout=30)
+        passed, info = await run_tests_against_code(code_candidate, tests, timeout=30)
         last_eval_info = info
         final_pass = passed
 
@@ -327,14 +311,20 @@ def load_agent_card_toml(agent_name):
 def start_scicode_green(agent_name="tau_green_scicode", host="localhost", port=9001):
     """Start the SciCode green agent server."""
     print("Starting SciCode green agent...")
+    if sandbox_pool is not None:
+        sandbox_pool.start()
     agent_card_dict = load_agent_card_toml(agent_name)
     url = f"http://{host}:{port}"
     agent_card_dict["url"] = url  # complete all required card fields
 
+    task_store = make_task_store(f"{agent_name}-{port}")
+    if isinstance(task_store, SQLiteTaskStore):
+        task_store.fail_interrupted()
+
     # Create request handler and application
     request_handler = DefaultRequestHandler(
         agent_executor=TauScicodeGreenExecutor(), 
-        task_store=InMemoryTaskStore()
+        task_store=task_store
     )
 
     app = A2AStarletteApplication(
@@ -370,6 +360,8 @@ def start_scicode_green(agent_name="tau_green_scicode", host="localhost", port=9
             "capabilities": list(agent_card_dict.get("capabilities", {}).keys()) if isinstance(agent_card_dict.get("capabilities"), dict) else []
         })
     
+    metrics_endpoint(starlette_app)
+    
     print(f"Starting SciCode Green Agent on {url}")
     uvicorn.run(starlette_app, host=host, port=port)
 
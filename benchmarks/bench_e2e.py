@@ -0,0 +1,182 @@
+"""End-to-end throughput benchmark of the green agent over real HTTP.
+
+Starts the green agent and the deterministic stub white agent as separate
+servers, evaluates synthetic problems (from a local problems file, so no
+dataset download or LLM is involved) with a number of concurrent A2A
+clients, and reports evaluations/second, p50/p95/p99 latency and the peak
+RSS of the green agent including its sandbox workers:
+
+    python benchmarks/bench_e2e.py [--evaluations 100] [--concurrency 8] [--output results.json]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import multiprocessing
+
+from common import peak_rss_kb, print_table, save_results, summarize
+
+from a2a.types import Task, TaskState
+from src.my_util import A2AClient, get_result_text, wait_agent_ready
+
+
+def write_problems(path: str, num_problems: int, num_steps: int, num_tests: int) -> None:
+    """
+    Synthetic problems in the SciCode format: every step asks for an adder.
+
+    The last test of a step holds a triple-quoted multi-line string, which
+    the harness must leave as it is.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for p in range(1, num_problems + 1):
+            steps = []
+            for s in range(1, num_steps + 1):
+                name = f"add_{p}_{s}"
+                tests = [f"assert {name}({t}, {t + 1}) == {2 * t + 1}" for t in range(num_tests)]
+                if tests:
+                    tests[-1] = f'expected = """{name}\n3"""\nassert f"{name}\\n{{{name}(1, 2)}}" == expected'
+                steps.append({
+                    "step_number": f"{p}.{s}",
+                    "step_description_prompt": f"Write {name}, returning the sum of its arguments.",
+                    "function_header": f"def {name}(x, y):",
+                    "return_line": "    return result",
+                    "test_cases": tests,
+                })
+            f.write(json.dumps({"problem_id": str(p), "sub_steps": steps}) + "\n")
+
+
+def _quiet():
+    sys.stdout = open(os.devnull, "w")
+
+
+def _start_green(host, port, env, verbose):
+    os.environ.update(env)
+    if not verbose:
+        _quiet()
+    from scicode_green_agent import start_green_agent
+    start_green_agent("tau_green_scicode", host, port, preload_splits=[env["BENCH_PROBLEMS_FILE"]])
+
+
+def _start_white(host, port, delay, verbose):
+    if not verbose:
+        _quiet()
+    from stub_white_agent import start_stub_white_agent
+    start_stub_white_agent(host, port, delay)
+
+
+async def run_evaluations(client: A2AClient, green_url: str, white_url: str, problems_file: str,
+                          num_problems: int, evaluations: int, concurrency: int, eval_mode: str,
+                          use_result_cache: bool) -> dict:
+    latencies = []
+    failures = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(evaluations):
+        queue.put_nowait(str(i % num_problems + 1))
+
+    async def worker():
+        nonlocal failures
+        while True:
+            try:
+                problem_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            task_text = f"""
+<white_agent_url>{white_url}</white_agent_url>
+<scicode_problem_id>{problem_id}</scicode_problem_id>
+<split>{problems_file}</split>
+<eval_mode>{eval_mode}</eval_mode>
+<result_cache>{'on' if use_result_cache else 'off'}</result_cache>
+"""
+            started = time.perf_counter()
+            response = await client.send_message(green_url, task_text)
+            latencies.append(time.perf_counter() - started)
+            result = response.root.result
+            if not (isinstance(result, Task) and result.status.state == TaskState.completed
+                    and "✅" in get_result_text(result)):
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    return {
+        "evaluations": evaluations,
+        "failures": failures,
+        "wall_seconds": wall,
+        "evaluations_per_second": evaluations / wall,
+        "latency": summarize(latencies),
+    }
+
+
+async def main_async(args) -> None:
+    workdir = tempfile.mkdtemp(prefix="scicode_bench_")
+    problems_file = os.path.join(workdir, "problems.jsonl")
+    write_problems(problems_file, args.problems, args.steps, args.tests)
+    env = {
+        "BENCH_PROBLEMS_FILE": problems_file,
+        "SCICODE_DURATIONS_FILE": os.path.join(workdir, "durations.json"),
+        "SCICODE_RESULT_CACHE_PATH": os.path.join(workdir, "results.sqlite"),
+    }
+
+    green_url = f"http://localhost:{args.green_port}"
+    white_url = f"http://localhost:{args.white_port}"
+    ctx = multiprocessing.get_context("spawn")
+    p_green = ctx.Process(target=_start_green, args=("localhost", args.green_port, env, args.verbose))
+    p_white = ctx.Process(target=_start_white, args=("localhost", args.white_port, args.delay, args.verbose))
+    boot_started = time.perf_counter()
+    p_green.start()
+    p_white.start()
+    try:
+        ready = await asyncio.gather(wait_agent_ready(green_url), wait_agent_ready(white_url))
+        assert all(ready), "Agents not ready in time"
+        boot_seconds = time.perf_counter() - boot_started
+
+        client = A2AClient()
+        try:
+            results = {"boot_seconds": boot_seconds}
+            if args.warmup:
+                await run_evaluations(client, green_url, white_url, problems_file, args.problems,
+                                      min(args.warmup, args.evaluations), args.concurrency, args.eval_mode, False)
+            results.update(await run_evaluations(
+                client, green_url, white_url, problems_file, args.problems,
+                args.evaluations, args.concurrency, args.eval_mode, args.result_cache
+            ))
+        finally:
+            await client.close()
+        results["green_peak_rss_kb"] = peak_rss_kb(p_green.pid, include_children=True)
+    finally:
+        for p in (p_green, p_white):
+            p.terminate()
+            p.join(timeout=10)
+
+    print(f"{results['evaluations']} evaluations in {results['wall_seconds']:.2f}s: "
+          f"{results['evaluations_per_second']:.2f} evals/s, {results['failures']} failures, "
+          f"green agent peak RSS {results['green_peak_rss_kb']} KiB")
+    print_table({"evaluation_latency": results["latency"]})
+    save_results("e2e", vars(args), results, args.output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end throughput benchmark of the green agent")
+    parser.add_argument("--evaluations", type=int, default=100, help="Evaluation tasks to send")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent A2A clients")
+    parser.add_argument("--problems", type=int, default=10, help="Synthetic problems")
+    parser.add_argument("--steps", type=int, default=1, help="Sub-steps per problem")
+    parser.add_argument("--tests", type=int, default=5, help="Test cases per step")
+    parser.add_argument("--eval-mode", type=str, default="first_step", choices=["first_step", "all_steps"])
+    parser.add_argument("--result-cache", action="store_true", help="Let repeated submissions hit the result cache")
+    parser.add_argument("--delay", type=float, default=0.0, help="Simulated white agent latency in seconds")
+    parser.add_argument("--warmup", type=int, default=8, help="Untimed evaluations before measuring")
+    parser.add_argument("--verbose", action="store_true", help="Show the agents' logs")
+    parser.add_argument("--green-port", type=int, default=9301)
+    parser.add_argument("--white-port", type=int, default=9302)
+    parser.add_argument("--output", type=str, default=None, help="Result file (default: benchmarks/results/e2e-<time>.json)")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Micro benchmarks of the evaluation hot paths.
+
+Measures tag parsing of large white agent replies, harness generation and
+sandbox spawn-to-result latency (warm pool and cold interpreter), and writes
+the results as JSON for comparison between runs:
+
+    python benchmarks/bench_micro.py [--repeat 50] [--output results.json]
+    python benchmarks/compare.py old.json new.json
+"""
+
+import os
+import asyncio
+import argparse
+import tempfile
+
+from common import measure, peak_rss_kb, print_table, save_results, summarize
+
+from src.my_util import parse_tags
+from src.tag_parser import TagParser
+from src.sandbox import SandboxPool, _result_to_info, run_script_cold_async
+import scicode_green_agent as green
+
+
+def make_reply(size_kb: int) -> str:
+    """A white agent reply of roughly `size_kb` KiB: chatter, a code fence and a <json> block."""
+    chatter = "Let me think about this problem step by step. <b>Note</b>: x < y and y > z.\n" * (size_kb * 1024 // 160)
+    code = "def solve(a, b):\n    return a + b\n" * 8
+    return f"{chatter}```python\n{code}```\n{chatter}<json>{{\"code\": {code!r}}}</json>\nDone."
+
+
+def bench_tags(repeat: int, size_kb: int) -> dict:
+    reply = make_reply(size_kb)
+
+    def stream():
+        parser = TagParser()
+        for i in range(0, len(reply), 64):
+            parser.feed(reply[i:i + 64])
+        parser.close()
+
+    return {
+        f"parse_tags_{size_kb}kb": measure(lambda: parse_tags(reply), repeat),
+        f"extract_code_{size_kb}kb": measure(lambda: green.extract_code(reply), repeat),
+        f"tag_parser_stream_64b_{size_kb}kb": measure(stream, repeat),
+    }
+
+
+def bench_harness(repeat: int, num_tests: int) -> dict:
+    tests = [f"assert solve({i}, {i}) == {2 * i}" for i in range(num_tests)]
+    return {
+        f"build_test_harness_{num_tests}_tests": measure(
+            lambda: green.build_test_harness(tests, "bench.1"), repeat
+        ),
+    }
+
+
+async def bench_sandbox(repeat: int) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        script = os.path.join(tmpdir, "solution.py")
+        with open(script, "w", encoding="utf-8") as f:
+            f.write("import numpy\nprint('ok')\n")
+
+        async def timed(run):
+            samples = []
+            await run()  # warm up
+            for _ in range(repeat):
+                started = asyncio.get_running_loop().time()
+                passed, info = await run()
+                assert passed, info
+                samples.append(asyncio.get_running_loop().time() - started)
+            return summarize(samples)
+
+        results["sandbox_cold"] = await timed(lambda: run_script_cold_async(script, tmpdir, 30))
+
+        pool = SandboxPool(size=1)
+        pool.start()
+        try:
+            async def pooled():
+                return _result_to_info(await pool.run_async(script, tmpdir, 30), 30)
+            results["sandbox_pool"] = await timed(pooled)
+        finally:
+            pool.close()
+
+        tests = ["assert solve(1, 2) == 3", "assert solve(2, 2) == 4"]
+        code = "def solve(a, b):\n    return a + b\n"
+        results["run_tests_against_code"] = await timed(
+            lambda: green.run_tests_against_code(code, tests, "bench.1", use_cache=False)
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro benchmarks of the SciCode evaluation pipeline")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed iterations per benchmark")
+    parser.add_argument("--reply-kb", type=int, default=256, help="Size of the synthetic white agent reply")
+    parser.add_argument("--num-tests", type=int, default=20, help="Test cases per generated harness")
+    parser.add_argument("--output", type=str, default=None, help="Result file (default: benchmarks/results/micro-<time>.json)")
+    args = parser.parse_args()
+
+    results = {}
+    results.update(bench_tags(args.repeat, args.reply_kb))
+    results.update(bench_harness(args.repeat, args.num_tests))
+    results.update(asyncio.run(bench_sandbox(max(1, args.repeat // 5))))
+    results["peak_rss_kb"] = peak_rss_kb()
+
+    print_table(results)
+    save_results("micro", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
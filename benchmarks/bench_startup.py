@@ -0,0 +1,87 @@
+"""Cold-start benchmark: import time of the entry points and agent boot time.
+
+Imports each entry point in a fresh interpreter, then boots the green and
+white agents through the launcher (concurrently, as the launcher does) and
+times launch-to-ready. The green agent preloads a synthetic problems file, so
+no dataset download is involved:
+
+    python benchmarks/bench_startup.py [--repeat 5] [--import-budget-ms 250] [--output results.json]
+
+With --import-budget-ms the script exits non-zero when the launcher import
+exceeds the budget (p50), so it can guard against import-time regressions.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+from common import REPO_ROOT, print_table, save_results, summarize
+from bench_e2e import write_problems
+
+import launcher_scicode_new as launcher
+
+ENTRY_POINTS = ["launcher_scicode_new", "scicode_green_agent", "white_agent_scicode"]
+
+
+def import_seconds(module: str) -> float:
+    """Time to import a module in a fresh interpreter (excluding interpreter startup)."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+async def boot_seconds(green_port: int, white_port: int) -> float:
+    """Launch-to-ready time of the green and white agents booted together."""
+    green_url = f"http://localhost:{green_port}"
+    white_url = f"http://localhost:{white_port}"
+    started = time.perf_counter()
+    processes = await launcher.boot_agents([
+        ("green agent", green_url, launcher.run_green_agent, ("tau_green_scicode", "localhost", green_port), {}),
+        ("white agent", white_url, launcher.run_white_agent, ("general_white_agent", "localhost", white_port),
+         {"llm_cache": "passthrough"}),
+    ])
+    total = time.perf_counter() - started
+    launcher.terminate_agents(processes)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark of the SciCode agents")
+    parser.add_argument("--repeat", type=int, default=5, help="Imports and boots to time")
+    parser.add_argument("--import-budget-ms", type=float, default=None,
+                        help="Fail if the launcher import p50 exceeds this many milliseconds")
+    parser.add_argument("--green-port", type=int, default=9311)
+    parser.add_argument("--white-port", type=int, default=9312)
+    parser.add_argument("--output", type=str, default=None, help="Result file (default: benchmarks/results/startup-<time>.json)")
+    args = parser.parse_args()
+
+    results = {}
+    for module in ENTRY_POINTS:
+        results[f"import_{module}"] = summarize([import_seconds(module) for _ in range(args.repeat)])
+
+    workdir = tempfile.mkdtemp(prefix="scicode_bench_")
+    problems_file = os.path.join(workdir, "problems.jsonl")
+    write_problems(problems_file, 10, 1, 5)
+    os.environ["SCICODE_PRELOAD_SPLITS"] = problems_file
+    os.environ["SCICODE_RESULT_CACHE_PATH"] = os.path.join(workdir, "results.sqlite")
+    results["boot_green_and_white"] = summarize([
+        asyncio.run(boot_seconds(args.green_port, args.white_port)) for _ in range(args.repeat)
+    ])
+
+    print_table(results)
+    save_results("startup", vars(args), results, args.output)
+
+    launcher_p50_ms = results["import_launcher_scicode_new"]["p50"] * 1e3
+    if args.import_budget_ms is not None and launcher_p50_ms > args.import_budget_ms:
+        print(f"Launcher import takes {launcher_p50_ms:.1f} ms, over the budget of {args.import_budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
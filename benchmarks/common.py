@@ -0,0 +1,144 @@
+"""Shared helpers for the benchmark scripts: timing, statistics and result files."""
+
+import os
+import sys
+import json
+import math
+import time
+import platform
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in [0, 100]) of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(q / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Count, mean, min/max and p50/p95/p99 of latency samples (seconds)."""
+    if not samples:
+        return {"n": 0}
+    return {
+        "n": len(samples),
+        "mean": sum(samples) / len(samples),
+        "min": min(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "max": max(samples),
+    }
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """Time `repeat` calls of `fn` after `warmup` untimed calls."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def peak_rss_kb(pid: Optional[int] = None, include_children: bool = False) -> Optional[int]:
+    """
+    Peak resident set size (VmHWM) of a process, in KiB (Linux only).
+
+    With `include_children`, the peaks of all live descendants are added, so a
+    server is measured together with its sandbox workers.
+    """
+    pid = pid or os.getpid()
+
+    def hwm(p):
+        try:
+            with open(f"/proc/{p}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1])
+        except OSError:
+            return 0
+        return 0
+
+    def children(p):
+        try:
+            with open(f"/proc/{p}/task/{p}/children", "r") as f:
+                return [int(c) for c in f.read().split()]
+        except OSError:
+            return []
+
+    if not os.path.exists(f"/proc/{pid}/status"):
+        return None
+    total = hwm(pid)
+    if include_children:
+        stack = children(pid)
+        while stack:
+            child = stack.pop()
+            total += hwm(child)
+            stack.extend(children(child))
+    return total
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def save_results(name: str, config: dict, results: dict, output: Optional[str] = None) -> Path:
+    """
+    Write a benchmark report as JSON.
+
+    Args:
+        name: Benchmark name (used in the default file name)
+        config: Parameters the benchmark ran with
+        results: Measurements
+        output: Output path (default: benchmarks/results/<name>-<timestamp>.json)
+
+    Returns:
+        Path of the written file
+    """
+    path = Path(output) if output else RESULTS_DIR / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "benchmark": name,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": config,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {path}")
+    return path
+
+
+def print_table(results: Dict[str, dict]) -> None:
+    """Print latency summaries as a table (milliseconds)."""
+    print(f"{'benchmark':<40} {'n':>6} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, r in results.items():
+        if not isinstance(r, dict) or "p50" not in r:
+            continue
+        print(
+            f"{name:<40} {r['n']:>6} {r['mean'] * 1e3:>10.3f} {r['p50'] * 1e3:>10.3f} "
+            f"{r['p95'] * 1e3:>10.3f} {r['p99'] * 1e3:>10.3f}"
+        )
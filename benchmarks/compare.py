@@ -0,0 +1,48 @@
+"""Compare two benchmark result files side by side.
+
+    python benchmarks/compare.py benchmarks/results/micro-A.json benchmarks/results/micro-B.json
+"""
+
+import sys
+import json
+import argparse
+
+
+def _flatten(results: dict, prefix: str = "") -> dict:
+    """Numeric leaves of a result tree, keyed by dotted path."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline", help="Result file of the baseline run")
+    parser.add_argument("candidate", help="Result file of the run to compare")
+    parser.add_argument("--metric", default=None, help="Only show paths containing this string (e.g. p50)")
+    args = parser.parse_args()
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, "r", encoding="utf-8") as f:
+        candidate = json.load(f)
+    if baseline.get("benchmark") != candidate.get("benchmark"):
+        print(f"Warning: comparing {baseline.get('benchmark')} with {candidate.get('benchmark')} results", file=sys.stderr)
+
+    old, new = _flatten(baseline["results"]), _flatten(candidate["results"])
+    print(f"{'metric':<50} {'baseline':>14} {'candidate':>14} {'change':>9}")
+    for path in sorted(set(old) & set(new)):
+        if args.metric and args.metric not in path:
+            continue
+        a, b = old[path], new[path]
+        change = f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+        print(f"{path:<50} {a:>14.6g} {b:>14.6g} {change:>9}")
+
+
+if __name__ == "__main__":
+    main()
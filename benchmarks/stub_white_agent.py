@@ -0,0 +1,83 @@
+"""Deterministic stub white agent for offline benchmarks.
+
+Answers every SciCode prompt instantly (or after `--delay` seconds) with a
+solution for the synthetic problems of `bench_e2e.py`: the function named in
+the prompt's signature returning the sum of its two arguments.
+
+    python benchmarks/stub_white_agent.py --port 9102
+"""
+
+import re
+import asyncio
+import argparse
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+
+import uvicorn
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.events import EventQueue
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import AgentCapabilities, AgentCard, AgentSkill
+from a2a.utils import new_agent_text_message
+
+_SIGNATURE = re.compile(r"def (\w+)\(([^)]*)\)")
+
+
+class StubWhiteAgentExecutor(AgentExecutor):
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        match = _SIGNATURE.search(context.get_user_input())
+        if match:
+            name, params = match.group(1), [p.strip() for p in match.group(2).split(",")]
+            code = f"def {name}({', '.join(params)}):\n    return {params[0]} + {params[-1]}\n"
+        else:
+            code = "pass\n"
+        await event_queue.enqueue_event(
+            new_agent_text_message(f"<code>\n{code}</code>", context_id=context.context_id)
+        )
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        raise NotImplementedError
+
+
+def start_stub_white_agent(host: str = "localhost", port: int = 9102, delay: float = 0.0):
+    """Start the stub white agent server."""
+    url = f"http://{host}:{port}"
+    card = AgentCard(
+        name="stub_white_agent",
+        description="Deterministic stub white agent for benchmarks",
+        url=url,
+        version="1.0.0",
+        default_input_modes=["text/plain"],
+        default_output_modes=["text/plain"],
+        capabilities=AgentCapabilities(),
+        skills=[AgentSkill(id="stub", name="Stub", description="Returns canned solutions", tags=["benchmark"])],
+    )
+    app = A2AStarletteApplication(
+        agent_card=card,
+        http_handler=DefaultRequestHandler(
+            agent_executor=StubWhiteAgentExecutor(delay), task_store=InMemoryTaskStore()
+        ),
+    ).build()
+
+    @app.route("/status", methods=["GET"])
+    async def status_endpoint(request):
+        from starlette.responses import JSONResponse
+        return JSONResponse({"status": "online", "agent_type": "white"})
+
+    uvicorn.run(app, host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub white agent for benchmarks")
+    parser.add_argument("--host", type=str, default="localhost")
+    parser.add_argument("--port", type=int, default=9102)
+    parser.add_argument("--delay", type=float, default=0.0, help="Simulated model latency in seconds")
+    args = parser.parse_args()
+    start_stub_white_agent(args.host, args.port, args.delay)
@@ -1,57 +1,114 @@
-"""Launcher script for SciCode evaluation - follows tau-bench pattern."""
+"""Launcher script for SciCode evaluation - follows tau-bench pattern.
+
+The agent modules (and with them a2a, uvicorn and litellm) are imported in
+the agent processes rather than here, so the agents start right away and
+boot concurrently while the launcher loads its A2A client.
+"""
 
 import multiprocessing
 import json
+import time
 import asyncio
-from scicode_green_agent import start_green_agent
-from src.my_util import my_a2a, wait_agent_ready
 
 
-# Import white agent
-try:
-    from white_agent_scicode import start_white_agent
-except ImportError:
+def placeholder_white_agent(agent_name="general_white_agent", host="localhost", port=9002, **kwargs):
+    """Placeholder white agent starter."""
+    print(f"White agent placeholder: {agent_name} at {host}:{port}")
+    print("Note: You need to implement a white agent or use an existing one")
+    time.sleep(3600)  # Keep running
+
+
+def run_green_agent(*args, **kwargs):
+    """Process target: import and start the green agent."""
+    from scicode_green_agent import start_green_agent
+    start_green_agent(*args, **kwargs)
+
+
+def run_white_agent(*args, **kwargs):
+    """Process target: import and start the white agent."""
     try:
-        from white_agent import start_white_agent
+        from white_agent_scicode import start_white_agent
     except ImportError:
-        # Fallback - create a simple white agent starter
-        def start_white_agent(agent_name="general_white_agent", host="localhost", port=9002):
-            """Placeholder white agent starter."""
-            print(f"White agent placeholder: {agent_name} at {host}:{port}")
-            print("Note: You need to implement a white agent or use an existing one")
-            import time
-            time.sleep(3600)  # Keep running
+        try:
+            from white_agent import start_white_agent
+        except ImportError:
+            start_white_agent = placeholder_white_agent
+    start_white_agent(*args, **kwargs)
+
+
+def print_startup_report(ready: dict, names: dict, import_seconds: float, total_seconds: float) -> None:
+    """Print how long each agent took from launch to answering /status."""
+    print("Startup report:")
+    for url, seconds in ready.items():
+        status = f"ready after {seconds:.2f}s" if seconds is not None else "not ready"
+        print(f"  {names[url] + f' ({url})':<48} {status}")
+    print(f"  {'launcher client imports':<48} {import_seconds:.2f}s")
+    print(f"  {'total':<48} {total_seconds:.2f}s")
+
+
+async def boot_agents(agents, timeout=60):
+    """
+    Start agent processes concurrently and wait until all of them are ready.
+    
+    Readiness is polled in parallel over one HTTP client; the launcher's A2A
+    client modules are imported while the agents boot.
+    
+    Args:
+        agents: (name, url, target, args, kwargs) of each agent to launch
+        timeout: Maximum time to wait for the agents in seconds
+        
+    Returns:
+        The started processes
+    """
+    started = time.perf_counter()
+    processes = []
+    for name, url, target, args, kwargs in agents:
+        print(f"Launching {name} at {url}...")
+        process = multiprocessing.Process(target=target, args=args, kwargs=kwargs)
+        process.start()
+        processes.append(process)
+    
+    import_started = time.perf_counter()
+    from src.my_util import wait_agents_ready
+    import_seconds = time.perf_counter() - import_started
+    
+    urls = [url for _, url, *_ in agents]
+    offset = time.perf_counter() - started
+    ready = await wait_agents_ready(urls, timeout=max(0, timeout - offset))
+    # Report time since launch, not since polling started
+    ready = {url: seconds + offset if seconds is not None else None for url, seconds in ready.items()}
+    print_startup_report(ready, {url: name for name, url, *_ in agents}, import_seconds, time.perf_counter() - started)
+    
+    not_ready = [url for url, seconds in ready.items() if seconds is None]
+    if not_ready:
+        terminate_agents(processes)
+    assert not not_ready, f"Agents not ready in time: {', '.join(not_ready)}"
+    return processes
+
+
+def terminate_agents(processes) -> None:
+    for p in processes:
+        p.terminate()
+    for p in processes:
+        p.join(timeout=5)
 
 
 async def launch_scicode_evaluation(problem_id="1", split="validation"):
     """Launch SciCode evaluation with green and white agents."""
-    # Start green agent
-    print("Launching SciCode green agent...")
     green_address = ("localhost", 9001)
     green_url = f"http://{green_address[0]}:{green_address[1]}"
-    p_green = multiprocessing.Process(
-        target=start_green_agent, 
-        args=("tau_green_scicode", green_address[0], green_address[1])
-    )
-    p_green.start()
-    
-    # Wait for green agent to be ready
-    assert await wait_agent_ready(green_url), "Green agent not ready in time"
-    print("Green agent is ready.")
-    
-    # Start white agent
-    print("Launching white agent...")
     white_address = ("localhost", 9002)
     white_url = f"http://{white_address[0]}:{white_address[1]}"
-    p_white = multiprocessing.Process(
-        target=start_white_agent, 
-        args=("general_white_agent", white_address[0], white_address[1])
-    )
-    p_white.start()
     
-    # Wait for white agent to be ready
-    assert await wait_agent_ready(white_url), "White agent not ready in time"
-    print("White agent is ready.")
+    # Boot both agents concurrently
+    processes = await boot_agents([
+        ("SciCode green agent", green_url, run_green_agent, ("tau_green_scicode", *green_address), {}),
+        ("white agent", white_url, run_white_agent, ("general_white_agent", *white_address), {}),
+    ])
+    print("Agents are ready.")
+    
+    from a2a.types import TaskStatusUpdateEvent
+    from src.my_util import my_a2a, get_result_text
     
     # Send the task description to green agent
     print("Sending task description to green agent...")
@@ -76,34 +133,196 @@ You should use the following problem configuration:
     print(task_text)
     print("Sending...")
     
-    response = await my_a2a.send_message(green_url, task_text)
-    print("Response from green agent:")
-    print(f"Response type: {type(response)}")
-    if hasattr(response, 'root') and hasattr(response.root, 'result'):
-        if hasattr(response.root.result, 'parts'):
-            from a2a.utils import get_text_parts
-            text_parts = get_text_parts(response.root.result.parts)
-            print("\n".join(text_parts))
-        else:
-            print(response.root.result)
-    else:
-        print(response)
+    # Stream progress events as the green agent publishes them
+    async for event in my_a2a.stream_message(green_url, task_text):
+        text = get_result_text(event)
+        if isinstance(event, TaskStatusUpdateEvent) and event.final:
+            print("Response from green agent:")
+            print(text)
+        elif text:
+            print(f"[green agent] {text}")
     
     print("Evaluation complete. Terminating agents...")
-    p_green.terminate()
-    p_green.join(timeout=5)
-    p_white.terminate()
-    p_white.join(timeout=5)
+    terminate_agents(processes)
     print("Agents terminated.")
 
 
+async def agent_running(agent_url: str) -> bool:
+    """Whether an agent already answers its status endpoint at this URL."""
+    from src.my_util import wait_agent_ready
+    return await wait_agent_ready(agent_url, timeout=0)
+
+
+async def run_tournament_entry(green_url, label, white_url, problem_ids, split, eval_mode):
+    """Evaluate one white agent on the problem set through the green agent; returns the suite results."""
+    from a2a.types import TaskStatusUpdateEvent
+    from src.my_util import my_a2a, get_result_text, get_result_data
+    
+    task_text = f"""
+Your task is to evaluate a white agent on a set of SciCode problems. The agent is located at:
+
+<white_agent_url>
+{white_url}
+</white_agent_url>
+
+<problem_ids>
+{problem_ids}
+</problem_ids>
+
+<split>
+{split}
+</split>
+
+<eval_mode>
+{eval_mode}
+</eval_mode>
+    """
+    started = time.time()
+    final = None
+    async for event in my_a2a.stream_message(green_url, task_text):
+        if isinstance(event, TaskStatusUpdateEvent) and event.final:
+            final = event
+        else:
+            text = get_result_text(event)
+            if text:
+                print(f"[{label}] {text}")
+    data = get_result_data(final) if final is not None else None
+    if data is None:
+        print(f"[{label}] No structured results: {get_result_text(final) if final is not None else 'no final event'}")
+        data = {"metrics": {}, "results": []}
+    data["wall_time"] = time.time() - started
+    return data
+
+
+def print_tournament_table(labels, outcomes):
+    """Print rewards side by side: one row per problem, one column per white agent."""
+    problem_ids = []
+    for outcome in outcomes:
+        for r in outcome["results"]:
+            if r["problem_id"] not in problem_ids:
+                problem_ids.append(r["problem_id"])
+    width = max([12] + [len(label) for label in labels])
+    print(f"{'problem':<12}" + "".join(f" {label:>{width}}" for label in labels))
+    for pid in problem_ids:
+        cells = []
+        for outcome in outcomes:
+            r = next((r for r in outcome["results"] if r["problem_id"] == pid), None)
+            if r is None:
+                cells.append("-")
+            elif "error" in r:
+                cells.append("error")
+            else:
+                cells.append(f"{r['reward']:.2f}")
+        print(f"{pid:<12}" + "".join(f" {cell:>{width}}" for cell in cells))
+    summary = [
+        ("passed", lambda m, o: f"{m.get('passed', 0)}/{m.get('problems', 0)}"),
+        ("mean reward", lambda m, o: f"{m.get('mean_reward', 0.0):.3f}"),
+        ("time (s)", lambda m, o: f"{o['wall_time']:.1f}"),
+    ]
+    print("-" * (12 + (width + 1) * len(labels)))
+    for name, fmt in summary:
+        print(f"{name:<12}" + "".join(f" {fmt(o['metrics'], o):>{width}}" for o in outcomes))
+
+
+async def launch_scicode_tournament(models, problem_ids, split="validation", eval_mode="first_step",
+                                    green_port=9001, white_base_port=9002, green_url=None, white_urls=None,
+                                    llm_cache=None, keep_alive=False):
+    """
+    Evaluate several white agents on the same problems through one green agent.
+
+    The green agent (and with it the problem store, target store, result cache
+    and sandbox pool) is shared by all white agents, which are evaluated
+    concurrently. Agents already answering at their URL are reused instead of
+    launched.
+
+    Args:
+        models: Models to launch a white agent for, on ports white_base_port + i
+        problem_ids: Problem selection (list, ranges or "all")
+        green_url: URL of a running green agent (default: launch one on green_port)
+        white_urls: URLs of running white agents to include as well
+        llm_cache: Completion cache mode of the launched white agents
+        keep_alive: Leave launched agents running after the tournament
+    """
+    white_urls = list(white_urls or [])
+    launched = [(model, f"http://localhost:{white_base_port + i}") for i, model in enumerate(models)]
+    entries = [(url, url) for url in white_urls] + launched
+    if not entries:
+        raise ValueError("No white agents to evaluate")
+
+    to_boot = []
+    if green_url:
+        print(f"Using green agent at {green_url}.")
+    elif await agent_running(f"http://localhost:{green_port}"):
+        green_url = f"http://localhost:{green_port}"
+        print(f"Reusing green agent at {green_url}.")
+    else:
+        green_url = f"http://localhost:{green_port}"
+        to_boot.append(("SciCode green agent", green_url, run_green_agent, ("tau_green_scicode", "localhost", green_port), {}))
+
+    running = await asyncio.gather(*(agent_running(url) for _, url in launched))
+    for (model, url), is_running in zip(launched, running):
+        if is_running:
+            print(f"Reusing white agent at {url} for {model}.")
+            continue
+        port = int(url.rsplit(":", 1)[1])
+        to_boot.append((f"white agent for {model}", url, run_white_agent,
+                        (f"white_agent_{port}", "localhost", port), {"llm_cache": llm_cache, "model": model}))
+
+    processes = await boot_agents(to_boot) if to_boot else []
+    try:
+        from src.my_util import wait_agents_ready
+        reused = [green_url] + white_urls
+        not_ready = [url for url, seconds in (await wait_agents_ready(reused)).items() if seconds is None]
+        assert not not_ready, f"Agents not ready in time: {', '.join(not_ready)}"
+        print(f"All agents are ready. Evaluating {len(entries)} white agents on problems {problem_ids}...")
+
+        labels = [label for label, _ in entries]
+        outcomes = await asyncio.gather(*(
+            run_tournament_entry(green_url, label, url, problem_ids, split, eval_mode)
+            for label, url in entries
+        ))
+        print_tournament_table(labels, outcomes)
+    finally:
+        if keep_alive and processes:
+            print("Tournament complete. Launched agents keep running (Ctrl-C to stop).")
+            try:
+                for p in processes:
+                    p.join()
+            except KeyboardInterrupt:
+                pass
+        if processes:
+            print("Terminating launched agents...")
+        terminate_agents(processes)
+    return dict(zip(labels, outcomes))
+
+
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description="SciCode Evaluation Launcher")
     parser.add_argument("--problem-id", type=str, default="1", help="SciCode problem ID")
     parser.add_argument("--split", type=str, default="validation", help="Dataset split (validation/test)")
+    parser.add_argument("--tournament-models", type=str, default=None,
+                        help="Comma-separated models to compare; launches one white agent per model")
+    parser.add_argument("--white-urls", type=str, default=None,
+                        help="Comma-separated URLs of running white agents to add to the tournament")
+    parser.add_argument("--problem-ids", type=str, default=None, help="Tournament problems (e.g. 1,2,5-8 or all)")
+    parser.add_argument("--eval-mode", type=str, default="first_step", choices=["first_step", "all_steps"])
+    parser.add_argument("--green-url", type=str, default=None, help="URL of a running green agent to reuse")
+    parser.add_argument("--llm-cache", type=str, default=None, choices=["record", "replay", "passthrough"],
+                        help="Completion cache mode of the launched white agents")
+    parser.add_argument("--keep-alive", action="store_true", help="Leave launched agents running afterwards")
     
     args = parser.parse_args()
-    asyncio.run(launch_scicode_evaluation(problem_id=args.problem_id, split=args.split))
+    if args.tournament_models or args.white_urls:
+        def split_list(value):
+            return [v.strip() for v in (value or "").split(",") if v.strip()]
+        
+        asyncio.run(launch_scicode_tournament(
+            split_list(args.tournament_models), args.problem_ids or args.problem_id, split=args.split,
+            eval_mode=args.eval_mode, green_url=args.green_url, white_urls=split_list(args.white_urls),
+            llm_cache=args.llm_cache, keep_alive=args.keep_alive
+        ))
+    else:
+        asyncio.run(launch_scicode_evaluation(problem_id=args.problem_id, split=args.split))
 
@@ -8,12 +8,12 @@ try:
     import tomllib
 except ImportError:
     import tomli as tomllib
+import ast
 import json
 import time
+import asyncio
+import contextlib
 import os
-import sys
-import tempfile
-import subprocess
 from pathlib import Path
 from typing import Optional
 
@@ -21,14 +21,48 @@ from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
-from a2a.server.tasks import InMemoryTaskStore
-from a2a.types import AgentCard, SendMessageSuccessResponse, Message
-from a2a.utils import new_agent_text_message, get_text_parts
+from a2a.server.tasks import TaskUpdater
+from a2a.types import AgentCard, SendMessageSuccessResponse, Message, Part, TextPart, DataPart
+from a2a.utils import new_agent_text_message, new_task, get_text_parts
 
 from src.my_util import parse_tags, my_a2a
+from src.tag_parser import TagParser, FENCE
+from src.sandbox import TEST_RECORDER_SOURCE, resource_limits, run_script_async, sandbox_pool, sandbox_concurrency
+from src.suite import DurationHistory, SuiteLimits, parse_problem_selection, run_suite
+from src.problem_store import problem_store
+from src.progress import ProgressReporter
+from src.target_store import LOADER_SOURCE, get_target_store
+from src.result_cache import result_cache, result_key
+from src.task_store import LocalTaskRequestHandler, SQLiteTaskStore, make_task_store
+from src.feedback import compact_feedback
+from src.harness_cache import harness_cache
+from src.sharding import max_shards, merge_shard_results, plan_shards, shard_min_seconds, test_timings
+from src.preflight import failure_info, preflight_check
+from src.metrics import Counter, Gauge, Histogram, metrics_endpoint
 
 dotenv.load_dotenv()
 
+# Sub-millisecond buckets for in-process work such as tag parsing
+FAST_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+PROBLEM_LOAD = Histogram("scicode_problem_load_seconds", "Time to load a problem from the problem store")
+WHITE_ROUND_TRIP = Histogram("scicode_white_round_trip_seconds", "White agent round trip per turn")
+TAG_PARSE = Histogram("scicode_tag_parse_seconds", "Time to extract the submitted code from a white agent reply", buckets=FAST_BUCKETS)
+HARNESS_BUILD = Histogram("scicode_harness_build_seconds", "Time to generate the test harness of a step")
+TEST_RUN = Histogram("scicode_test_run_seconds", "Time to test one submission, including waits for a sandbox slot")
+RESULT_CACHE_LOOKUPS = Counter("scicode_result_cache_lookups_total", "Result cache lookups", ["result"])
+EVALUATION = Histogram("scicode_evaluation_seconds", "Time to evaluate one problem", ["eval_mode"])
+EVALUATIONS_IN_FLIGHT = Gauge("scicode_evaluations_in_flight", "Problem evaluations in progress")
+PREFLIGHT_FAILURES = Counter("scicode_preflight_failures_total", "Submissions rejected before the sandbox", ["kind"])
+RETESTS = Counter("scicode_retests_total", "Repair turns that re-ran the previously failing tests before the full suite", ["result"])
+SMOKE_TESTS = Counter("scicode_smoke_tests_total", "Fail-fast smoke runs of a single test before the full suite", ["result"])
+TEST_SHARDS = Histogram("scicode_test_shards", "Sandbox processes the tests of a step run were split across", buckets=(1, 2, 3, 4, 6, 8, 16, 32))
+FEEDBACK_BUILD = Histogram("scicode_feedback_build_seconds", "Time to compact the sandbox output of a failed run", buckets=FAST_BUCKETS)
+FEEDBACK_BYTES = Histogram(
+    "scicode_feedback_bytes", "Size of the compacted feedback in repair messages",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+)
+
 
 def load_agent_card_toml(agent_name):
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -41,29 +75,27 @@ def load_scicode_problem(problem_id: str, split: str = "validation"):
     """
     Load SciCode problem from the dataset.
     Returns dict with keys: 'problem_id', 'sub_steps', etc.
+
+    Problems are served from the process-wide `problem_store`, so the split is
+    only read from the dataset once per process.
     """
-    try:
-        # Try to import and use SciCode dataset loader
-        sys.path.insert(0, str(Path(__file__).parent / "SciCode" / "src"))
-        from scicode.parse.parse import read_from_hf_dataset
-        
-        dataset = read_from_hf_dataset(split)
-        problems = list(dataset)
-        
-        # Find problem by ID
-        for problem in problems:
-            if str(problem.get("problem_id")) == str(problem_id):
-                return problem
-        
-        # If not found, try to get by index
+    with PROBLEM_LOAD.time():
+        return _load_scicode_problem(problem_id, split)
+
+
+async def load_scicode_problem_async(problem_id: str, split: str = "validation"):
+    """`load_scicode_problem` reading a split that is not loaded yet off the event loop."""
+    with PROBLEM_LOAD.time():
         try:
-            idx = int(problem_id)
-            if 0 <= idx < len(problems):
-                return problems[idx]
-        except ValueError:
-            pass
-        
-        raise ValueError(f"Problem {problem_id} not found in {split} split")
+            await problem_store.load_split_async(split)
+        except Exception:
+            pass  # _load_scicode_problem reports the (remembered) failure
+        return _load_scicode_problem(problem_id, split)
+
+
+def _load_scicode_problem(problem_id: str, split: str):
+    try:
+        return problem_store.get(problem_id, split=split)
         
     except Exception as e:
         print(f"Warning: Failed to load from SciCode dataset: {e}")
@@ -79,90 +111,477 @@ def load_scicode_problem(problem_id: str, split: str = "validation"):
         }
 
 
-def run_tests_against_code(code_str: str, test_cases: list, step_id: str, h5py_file: Optional[str] = None, timeout: int = 30):
+# Cached location of the SciCode HDF5 test data (probed once per process)
+_h5py_file = None
+
+
+def find_h5py_file() -> Optional[str]:
+    """Locate SciCode's test_data.h5, remembering the path once found."""
+    global _h5py_file
+    if _h5py_file is None:
+        scicode_root = Path(__file__).parent / "SciCode"
+        possible_h5py_paths = [
+            scicode_root / "eval" / "data" / "test_data.h5",
+            scicode_root / "data" / "test_data.h5",
+        ]
+        for path in possible_h5py_paths:
+            if path.exists():
+                _h5py_file = str(path)
+                break
+    return _h5py_file
+
+
+def build_test_harness(test_cases: list, step_id: str, h5py_file: Optional[str] = None, keep_going: bool = False, only: Optional[list] = None) -> str:
+    """
+    Build the test execution code appended after a submission.
+    Depends only on the step, so it can be generated ahead of time.
+
+    Targets come from the memory-mapped target store when the step could be
+    cached, and are decoded from the HDF5 file in the sandbox otherwise.
+    May convert the step's targets on first use, so call it off the event loop.
+
+    Every test case reports a structured record through the sandbox results
+    pipe. With HDF5 targets the run stops at the first failing test unless
+    `keep_going` is set; without them all tests always run.
+
+    The harness is also compiled into the harness cache here, so runs only
+    write the submission and a loader for the cached code object.
+
+    `only` restricts the harness to the test cases at these 0-based indices
+    (one shard of the step); tests keep their numbers.
+    """
+    started = time.perf_counter()
+    lines = [TEST_RECORDER_SOURCE]
+    with_targets = bool(h5py_file and os.path.exists(h5py_file))
+    if with_targets:
+        store = get_target_store(h5py_file)
+        targets_path = store.targets_path(step_id, len(test_cases)) if store else None
+        if targets_path:
+            lines.append(LOADER_SOURCE)
+            lines.append(f"targets = _scicode_load_targets({targets_path!r})\n")
+        else:
+            lines.append("from scicode.parse.parse import process_hdf5_to_tuple\n")
+            lines.append(f"targets = process_hdf5_to_tuple('{step_id}', {len(test_cases)}, '{h5py_file}')\n")
+    else:
+        # Fallback: execute test cases directly
+        keep_going = True
+    
+    selected = None if only is None else set(only)
+    for i, test_case in enumerate(test_cases):
+        if selected is not None and i not in selected:
+            continue
+        lines.append(f"# Test {i+1}\n")
+        lines.append(_guarded_test_source(str(test_case), i, with_targets, keep_going))
+    lines.append("if _scicode_failed > 0:\n")
+    lines.append("    _scicode_sys.exit(1)\n")
+    harness = harness_cache.prepare("".join(lines))
+    HARNESS_BUILD.observe(time.perf_counter() - started)
+    return harness
+
+
+def _guarded_test_source(test_case: str, index: int, with_targets: bool, keep_going: bool) -> str:
+    """
+    One test case wrapped in a try block that records its outcome.
+
+    The test's statements are moved into the try block as AST nodes rather
+    than by indenting its text, which would also indent the lines of
+    multi-line string literals.
+    """
+    guard = ast.parse(
+        "_scicode_started = _scicode_time.perf_counter()\n"
+        "try:\n"
+        + (f"    target = targets[{index}]\n" if with_targets else "")
+        + "    pass\n"
+        "except Exception as _scicode_error:\n"
+        f"    _scicode_record({index + 1}, _scicode_started, _scicode_error)\n"
+        # Stopping re-raises, so the traceback ends the output as before
+        + ("    import traceback; traceback.print_exc()\n" if keep_going else "    raise\n")
+        + "else:\n"
+        f"    _scicode_record({index + 1}, _scicode_started)\n"
+    )
+    guard.body[1].body[-1:] = ast.parse(test_case).body or [ast.Pass()]
+    return ast.unparse(guard) + "\n"
+
+
+async def run_tests_against_code(code_str: str, test_cases: list, step_id: str, h5py_file: Optional[str] = None, timeout: int = 30, harness: Optional[str] = None, limits: Optional[SuiteLimits] = None, use_cache: bool = True, keep_going: bool = False, function_header: Optional[str] = None, smoke_test: bool = False, retest: Optional[list] = None):
     """
     Run the given code against SciCode test cases.
     Returns (pass_bool, info_dict)
+
+    `harness` may carry a prebuilt `build_test_harness` result for the step;
+    `limits` bounds concurrent sandbox runs of a suite. Results of identical
+    submissions are served from the result cache unless `use_cache` is False.
+    With `keep_going`, tests after a failing one still run (for partial credit).
+
+    Steps whose tests are known to be slow are split into shards that run in
+    parallel sandbox processes, each with its own `timeout` (see src.sharding);
+    the info then carries the number of "shards".
+
+    With `smoke_test`, the test expected to be cheapest (from the step's
+    runtime history) runs alone first; if it fails, the full suite is skipped
+    and the info names it as "smoke_test". A smoke failure implies a failing
+    run, but counts only the one test, so it is not for final partial-credit
+    evaluations. Likewise, `retest` (0-based indices of the tests that failed
+    on the previous turn) runs those tests first; if one fails again, the
+    rest are skipped and the info lists them as "retested". Retesting takes
+    precedence over the smoke test. Such short-circuited infos are marked
+    "partial": their "tests_passed" counts only the "tests_run".
+
+    Code that does not compile, or does not define the function of
+    `function_header`, fails pre-flight without a sandbox run; the info then
+    carries the failure (with line and column) as "preflight".
+
+    The info carries the per-test records ("tests") and the counts
+    "tests_passed" / "num_tests" / "tests_run" (test cases executed by this
+    call, 0 when served from the cache).
     """
-    # Create temporary directory for test execution
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # Write the code to a temporary file
-        code_file = os.path.join(tmpdir, "solution.py")
-        with open(code_file, "w", encoding="utf-8") as f:
-            f.write(code_str)
-            f.write("\n\n")
-            
-            # Add test execution code
-            if h5py_file and os.path.exists(h5py_file):
-                f.write("from scicode.parse.parse import process_hdf5_to_tuple\n")
-                f.write(f"targets = process_hdf5_to_tuple('{step_id}', {len(test_cases)}, '{h5py_file}')\n")
-                for i, test_case in enumerate(test_cases):
-                    f.write(f"target = targets[{i}]\n")
-                    f.write(f"{test_case}\n")
+    failure = preflight_check(code_str, function_header)
+    if failure is not None:
+        PREFLIGHT_FAILURES.inc(kind=failure["kind"])
+        info = failure_info(failure, len(test_cases))
+        info["tests_run"] = 0
+        return False, info
+    
+    if harness is None:
+        harness = build_test_harness(test_cases, step_id, h5py_file, keep_going=keep_going)
+    
+    cache_key = None
+    if use_cache and result_cache is not None and not result_cache.is_excluded(step_id):
+        store = get_target_store(h5py_file) if h5py_file else None
+        cache_key = result_key(code_str, step_id, harness, store.version if store else "", timeout, resource_limits)
+        cached = await result_cache.get_async(cache_key)
+        RESULT_CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+        if cached is not None:
+            passed, info = cached
+            info["cached"] = True
+            info["tests_run"] = 0
+            return passed, info
+    
+    # Fail fast: tests likely to fail (or cheap to run) go first, alone
+    first, tier = None, None
+    if retest and len(retest) < len(test_cases):
+        first, tier = sorted(retest), RETESTS
+    elif smoke_test and len(test_cases) > 1:
+        first, tier = [test_timings.cheapest(step_id, len(test_cases))], SMOKE_TESTS
+    tests_run = 0
+    if first:
+        first_harness = await asyncio.to_thread(build_test_harness, test_cases, step_id, h5py_file, False, first)
+        first_tests = [i + 1 for i in first]
+        with TEST_RUN.time():
+            passed, info = await _run_harness(code_str, first_harness, timeout, limits)
+        passed = check_test_records(passed, info, first_tests)
+        test_timings.record(step_id, first_tests, info, timeout)
+        tier.inc(result="passed" if passed else "failed")
+        tests_run = len(latest_test_outcomes(info.get("tests"), first_tests))
+        if not passed:
+            # Not cached: the entry would stand for the full suite
+            if tier is RETESTS:
+                info["retested"] = first_tests
             else:
-                # Fallback: execute test cases directly
-                f.write("if __name__ == '__main__':\n")
-                f.write("    import sys\n")
-                f.write("    passed_count = 0\n")
-                f.write("    failed_count = 0\n")
-                for i, test_case in enumerate(test_cases):
-                    f.write(f"    # Test {i+1}\n")
-                    f.write(f"    try:\n")
-                    f.write(f"        {test_case}\n")
-                    f.write(f"        passed_count += 1\n")
-                    f.write(f"        print(f'Test {i+1} passed')\n")
-                    f.write(f"    except Exception as e:\n")
-                    f.write(f"        failed_count += 1\n")
-                    f.write(f"        print(f'Test {i+1} failed: {{e}}', file=sys.stderr)\n")
-                f.write("    if failed_count > 0:\n")
-                f.write("        sys.exit(1)\n")
+                info["smoke_test"] = first[0] + 1
+            info["num_tests"] = len(test_cases)
+            info["tests_passed"] = count_passed_tests(info, len(first), first_tests)
+            info["tests_run"] = tests_run
+            info["partial"] = True
+            return False, info
+    
+    shards = plan_shards(step_id, len(test_cases), max_shards, shard_min_seconds, test_timings)
+    TEST_SHARDS.observe(len(shards))
+    with TEST_RUN.time():
+        if len(shards) > 1:
+            passed, info = await _run_sharded(code_str, test_cases, step_id, h5py_file, timeout, limits, keep_going, shards)
+        else:
+            passed, info = await _run_harness(code_str, harness, timeout, limits)
+            test_timings.record(step_id, range(1, len(test_cases) + 1), info, timeout)
+    all_tests = range(1, len(test_cases) + 1)
+    passed = check_test_records(passed, info, all_tests)
+    info["num_tests"] = len(test_cases)
+    info["tests_passed"] = count_passed_tests(info, len(test_cases))
+    info["tests_run"] = tests_run + len(latest_test_outcomes(info.get("tests"), all_tests))
+    # Timeouts and sandbox errors depend on load, not on the submission
+    if cache_key is not None and not info.get("timeout") and "error" not in info:
+        await result_cache.put_async(cache_key, passed, info)
+    return passed, info
+
+
+async def _run_harness(code_str: str, harness: str, timeout: int, limits: Optional[SuiteLimits]):
+    """Write the submission and the compiled harness' loader to a work dir and run it in the sandbox."""
+    with harness_cache.work_dir() as work_dir:
+        code_file = harness_cache.write_script(work_dir, code_str, harness)
         
-        # Run the test
+        # Run the test (warm worker pool, or a fresh interpreter as fallback)
+        async with limits.sandbox if limits else contextlib.nullcontext():
+            return await run_script_async(code_file, work_dir, timeout=timeout)
+
+
+async def _run_sharded(code_str: str, test_cases: list, step_id: str, h5py_file: Optional[str], timeout: int,
+                       limits: Optional[SuiteLimits], keep_going: bool, shards: list):
+    """Run each shard of a step's tests in its own sandbox process and merge the results in shard order."""
+    harnesses = await asyncio.to_thread(
+        lambda: [build_test_harness(test_cases, step_id, h5py_file, keep_going=keep_going, only=shard) for shard in shards]
+    )
+    results = await asyncio.gather(*(_run_harness(code_str, h, timeout, limits) for h in harnesses))
+    for shard, (_, info) in zip(shards, results):
+        test_timings.record(step_id, [i + 1 for i in shard], info, timeout)
+    return merge_shard_results(list(results))
+
+
+def latest_test_outcomes(records: Optional[list], tests) -> dict:
+    """Outcome of the last record of each of `tests` (1-based numbers); records of other tests are ignored."""
+    tests = set(tests)
+    outcomes = {}
+    for record in records or ():
+        test = record.get("test")
+        if type(test) is int and test in tests:
+            outcomes[test] = record.get("passed") is True
+    return outcomes
+
+
+def check_test_records(passed: bool, info: dict, tests) -> bool:
+    """
+    Confirm the verdict of a run from its test records.
+
+    A run that exits cleanly only passes if each of `tests` reported exactly
+    one passing record, and that record is the test's last one. Code that exits
+    before the harness runs, or writes records of its own to the results pipe,
+    fails. Runs without a results pipe keep their verdict.
+    """
+    if not passed or "tests" not in info:
+        return passed
+    passes = {}
+    for record in info["tests"]:
+        if record.get("passed") is True:
+            passes[record.get("test")] = passes.get(record.get("test"), 0) + 1
+    latest = latest_test_outcomes(info["tests"], tests)
+    missing = [t for t in tests if passes.get(t) != 1 or not latest.get(t)]
+    if not missing:
+        return True
+    info["passed"] = False
+    info["stderr"] = info.get("stderr", "") + (
+        f"\nNo single passing result was reported for test(s) {', '.join(map(str, missing))}; "
+        "the code must not exit or write to the test results pipe\n"
+    )
+    return False
+
+
+def count_passed_tests(info: dict, num_tests: int, tests=None) -> int:
+    """
+    Number of passed test cases, from the last structured record of each test when available.
+
+    Only records of `tests` (1-based numbers, default 1..num_tests) count.
+    """
+    if "tests_passed" in info:
+        return info["tests_passed"]
+    if "tests" in info:
+        outcomes = latest_test_outcomes(info["tests"], range(1, num_tests + 1) if tests is None else tests)
+        return sum(outcomes.values())
+    if info.get("passed"):
+        return num_tests
+    # Runs without a results pipe: fall back to the runner output
+    return sum(
+        1 for line in info.get("stdout", "").splitlines()
+        if line.startswith("Test ") and line.endswith(" passed")
+    )
+
+
+def step_reward(passed: bool, info: dict, partial_credit: bool = False) -> float:
+    """1.0 for a pass; with `partial_credit`, the fraction of tests passed otherwise."""
+    if passed:
+        return 1.0
+    if partial_credit and info.get("num_tests"):
+        return info.get("tests_passed", 0) / info["num_tests"]
+    return 0.0
+
+
+def record_outcomes(outcomes: dict, info: dict, num_tests: int) -> None:
+    """Remember the latest outcome of every test (1..num_tests) that ran, by test number."""
+    outcomes.update(latest_test_outcomes(info.get("tests"), range(1, num_tests + 1)))
+
+
+def failing_tests(outcomes: dict) -> list:
+    """0-based indices of the tests whose latest outcome is a failure."""
+    return [test - 1 for test, passed in sorted(outcomes.items()) if not passed]
+
+
+def turn_timing(turn: int, info: dict) -> dict:
+    """Test time of one turn and how much of the suite it ran, for the result info."""
+    return {
+        "turn": turn,
+        "test_seconds": info.get("test_seconds", 0.0),
+        "tests_run": info.get("tests_run", 0),
+        "short_circuit": bool(info.get("retested") or info.get("smoke_test")),
+        "cached": bool(info.get("cached")),
+        "passed": bool(info.get("passed")),
+    }
+
+
+async def run_tests_with_progress(progress: ProgressReporter, step_id: str, turn: int, code_str: str, test_cases: list, **kwargs):
+    """
+    `run_tests_against_code` wrapped in tests_started / tests_finished progress
+    events; the info gets the wall time of the call as "test_seconds".
+    """
+    await progress.emit(
+        "tests_started", f"Running {len(test_cases)} tests for step {step_id} (turn {turn})",
+        step_id=step_id, turn=turn, num_tests=len(test_cases)
+    )
+    started = time.perf_counter()
+    passed, info = await run_tests_against_code(code_str, test_cases, step_id, **kwargs)
+    info["test_seconds"] = round(time.perf_counter() - started, 4)
+    tests_passed = count_passed_tests(info, len(test_cases))
+    if info.get("partial"):
+        # Short-circuited: only the re-run (or smoke) tests ran
+        summary = f"{tests_passed}/{info['tests_run']} tests run passed, {len(test_cases) - info['tests_run']} skipped"
+    else:
+        summary = f"{tests_passed}/{len(test_cases)} tests passed"
+    await progress.emit(
+        "tests_finished", f"Step {step_id} (turn {turn}): {summary}",
+        step_id=step_id, turn=turn, passed=passed, tests_passed=tests_passed,
+        num_tests=len(test_cases), timeout=bool(info.get("timeout")), cached=bool(info.get("cached")),
+        preflight_failed=bool(info.get("preflight")), tests_run=info.get("tests_run"), partial=bool(info.get("partial"))
+    )
+    return passed, info
+
+
+def build_step_prompt(problem_id, step: dict, step_id: str, step_index: int = 0, num_steps: int = 1) -> str:
+    """Build the initial message asking the white agent to solve one sub-step."""
+    step_prompt = step.get("step_description_prompt", "")
+    function_header = step.get("function_header", "")
+    return_line = step.get("return_line", "")
+    
+    if num_steps > 1:
+        position = f"\nThis is step {step_index + 1} of {num_steps}. Functions you wrote for earlier steps will be available to this step.\n"
+    else:
+        position = ""
+    
+    return f"""
+SciCode problem (id={problem_id}, step={step_id}):
+{position}
+{step_prompt}
+
+Function signature:
+{function_header}
+
+{return_line}
+
+Please reply with the Python code that solves this problem.
+Wrap the code inside <code>...</code> tags, or reply JSON: <json>{{"code": "..."}}</json>.
+Do NOT include extraneous commentary inside the tags.
+
+We will run your code against SciCode testcases and report pass/fail.
+    """
+
+
+def build_repair_message(info: dict, step_id: Optional[str] = None, test_cases: Optional[list] = None) -> str:
+    """
+    Build the follow-up message reporting failed tests to the white agent.
+
+    The sandbox output is compacted to the feedback budget (see src/feedback.py),
+    since the white agent keeps every message in its history.
+    """
+    header = f"Test run result for step {step_id} (tests failed):" if step_id else "Test run result (tests failed):"
+    started = time.perf_counter()
+    feedback = compact_feedback(info, test_cases)
+    FEEDBACK_BUILD.observe(time.perf_counter() - started)
+    FEEDBACK_BYTES.observe(len(feedback.encode("utf-8")))
+    return f"""{header}
+{feedback}
+
+Please produce a revised submission (again wrap code in <code>...</code> or <json> tags)."""
+
+
+def extract_code(white_text: str) -> str:
+    """Pull the submitted code out of a white agent reply."""
+    started = time.perf_counter()
+    parser = TagParser()
+    parser.feed(white_text)
+    parser.close()
+    code_candidate = None
+    
+    # Prefer JSON with "code" (the last <json> block, as parse_tags would), then <code> tag,
+    # then python code fences, then raw body
+    json_tags = [m.content for m in parser.matches if m.name == "json"]
+    if json_tags:
         try:
-            result = subprocess.run(
-                [sys.executable, code_file],
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                cwd=tmpdir
+            j = json.loads(json_tags[-1])
+            code_candidate = j.get("code") or j.get("submission") or j.get("solution")
+        except Exception:
+            pass
+    
+    if code_candidate is None:
+        code_tags = [m.content for m in parser.matches if m.name == "code"]
+        if code_tags:
+            code_candidate = code_tags[-1]
+    
+    if code_candidate is None:
+        fences = [m.content for m in parser.matches if m.name == FENCE and m.lang.lower() in ("", "python", "py")]
+        if fences:
+            # Later blocks redefine earlier ones when run together
+            code_candidate = "\n\n".join(fences)
+    
+    if code_candidate is None:
+        # Fallback: use the entire message body as code (risky)
+        code_candidate = white_text
+    
+    TAG_PARSE.observe(time.perf_counter() - started)
+    return code_candidate
+
+
+async def send_to_white_agent(white_agent_url: str, message: str, context_id: Optional[str] = None, limits: Optional[SuiteLimits] = None):
+    """
+    Send one message to the white agent in the given conversation.
+
+    Returns:
+        Tuple of (white agent reply text, context_id of the conversation)
+    """
+    print(
+        f"@@@ Green agent: Sending message to white agent{'ctx_id=' + str(context_id) if context_id else ''}... -->\n{message[:200]}..."
+    )
+    
+    async with limits.white_agent if limits else contextlib.nullcontext():
+        with WHITE_ROUND_TRIP.time():
+            white_agent_response = await my_a2a.send_message(
+                white_agent_url, message, context_id=context_id
             )
-            
-            passed = result.returncode == 0
-            info = {
-                "returncode": result.returncode,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "passed": passed
-            }
-            return passed, info
-            
-        except subprocess.TimeoutExpired:
-            return False, {
-                "returncode": -1,
-                "stdout": "",
-                "stderr": f"Test execution timed out after {timeout} seconds",
-                "passed": False,
-                "timeout": True
-            }
-        except Exception as e:
-            return False, {
-                "returncode": -1,
-                "stdout": "",
-                "stderr": f"Error running tests: {str(e)}",
-                "passed": False,
-                "error": str(e)
-            }
+    
+    res_root = white_agent_response.root
+    assert isinstance(res_root, SendMessageSuccessResponse)
+    res_result = res_root.result
+    assert isinstance(res_result, Message)
+    
+    if context_id is None:
+        context_id = res_result.context_id
+    else:
+        assert context_id == res_result.context_id, (
+            "Context ID should remain the same in a conversation"
+        )
+    
+    text_parts = get_text_parts(res_result.parts)
+    assert len(text_parts) >= 1, "Expecting at least one text part from the white agent"
+    
+    white_text = "\n".join(text_parts)
+    print(f"@@@ White agent response:\n{white_text[:500]}...")
+    return white_text, context_id
 
 
-async def ask_agent_to_solve(white_agent_url, problem_id, split="validation", max_num_steps=10):
+async def ask_agent_to_solve(white_agent_url, problem_id, split="validation", max_num_steps=10, limits=None, use_result_cache=True, progress=None, keep_going=False, partial_credit=False, smoke_test=False, incremental=True):
     """
     Orchestrate sending SciCode problem to the white agent and evaluate the returned code.
     Similar to tau-bench's ask_agent_to_solve but adapted for SciCode.
+    Only the first sub-step is evaluated; see `ask_agent_to_solve_all_steps`.
+    Per-turn progress events are published through `progress` when given.
+    With `smoke_test`, each turn first runs a single test and answers a
+    failure without running the rest (except a final turn under `partial_credit`).
+    With `incremental`, tests that failed on an earlier turn of the
+    conversation are re-run first in the same way; a pass still requires a
+    full run. The info reports the test time of every turn ("turns").
     """
     total_cost = 0.0
+    progress = progress or ProgressReporter()
     
     # Load problem
-    problem = load_scicode_problem(problem_id, split=split)
+    load_started = time.perf_counter()
+    problem = await load_scicode_problem_async(problem_id, split=split)
+    problem_load_time = time.perf_counter() - load_started
     sub_steps = problem.get("sub_steps", [])
     
     if not sub_steps:
@@ -172,100 +591,44 @@ async def ask_agent_to_solve(white_agent_url, problem_id, split="validation", ma
             "total_cost": total_cost
         }
     
-    # For simplicity, we'll test the first sub-step
-    # In a full implementation, you'd iterate through all sub-steps
     first_step = sub_steps[0]
     step_id = first_step.get("step_number", f"{problem_id}_0")
-    step_prompt = first_step.get("step_description_prompt", "")
-    function_header = first_step.get("function_header", "")
-    return_line = first_step.get("return_line", "")
     test_cases = first_step.get("test_cases", [])
     
     # Prepare initial message to the white agent
-    task_description = f"""
-SciCode problem (id={problem_id}, step={step_id}):
-
-{step_prompt}
-
-Function signature:
-{function_header}
-
-{return_line}
-
-Please reply with the Python code that solves this problem.
-Wrap the code inside <code>...</code> tags, or reply JSON: <json>{{"code": "..."}}</json>.
-Do NOT include extraneous commentary inside the tags.
-
-We will run your code against SciCode testcases and report pass/fail.
-    """
-    
-    next_message = task_description
+    next_message = build_step_prompt(problem_id, first_step, step_id)
     context_id = None
     last_eval_info = {}
     final_pass = False
+    h5py_file = find_h5py_file()
+    keep_going = keep_going or partial_credit
+    harness = await asyncio.to_thread(build_test_harness, test_cases, step_id, h5py_file, keep_going)
+    outcomes = {}
+    turn_timings = []
     
     for turn in range(max_num_steps):
-        print(
-            f"@@@ Green agent: Sending message to white agent{'ctx_id=' + str(context_id) if context_id else ''}... -->\n{next_message[:200]}..."
+        white_text, context_id = await send_to_white_agent(
+            white_agent_url, next_message, context_id=context_id, limits=limits
         )
-        
-        white_agent_response = await my_a2a.send_message(
-            white_agent_url, next_message, context_id=context_id
+        await progress.emit(
+            "white_response_received", f"White agent replied for step {step_id} (turn {turn + 1})",
+            step_id=step_id, turn=turn + 1
         )
         
-        res_root = white_agent_response.root
-        assert isinstance(res_root, SendMessageSuccessResponse)
-        res_result = res_root.result
-        assert isinstance(res_result, Message)
-        
-        if context_id is None:
-            context_id = res_result.context_id
-        else:
-            assert context_id == res_result.context_id, (
-                "Context ID should remain the same in a conversation"
-            )
-        
-        text_parts = get_text_parts(res_result.parts)
-        assert len(text_parts) >= 1, "Expecting at least one text part from the white agent"
-        
-        white_text = "\n".join(text_parts)
-        print(f"@@@ White agent response:\n{white_text[:500]}...")
-        
         # Parse code out of the white agent reply
-        tags = parse_tags(white_text)
-        code_candidate = None
-        
-        # Prefer JSON with "code", then <code> tag, then raw body
-        if "json" in tags:
-            try:
-                j = json.loads(tags["json"])
-                code_candidate = j.get("code") or j.get("submission") or j.get("solution")
-            except Exception:
-                pass
-        
-        if code_candidate is None and "code" in tags:
-            code_candidate = tags["code"]
-        
-        if code_candidate is None:
-            # Fallback: use the entire message body as code (risky)
-            code_candidate = white_text
-        
-        # Find h5py file for test execution
-        h5py_file = None
-        scicode_root = Path(__file__).parent / "SciCode"
-        possible_h5py_paths = [
-            scicode_root / "eval" / "data" / "test_data.h5",
-            scicode_root / "data" / "test_data.h5",
-        ]
-        for path in possible_h5py_paths:
-            if path.exists():
-                h5py_file = str(path)
-                break
+        code_candidate = extract_code(white_text)
         
-        # Run tests
-        passed, info = run_tests_against_code(
-            code_candidate, test_cases, step_id, h5py_file=h5py_file, timeout=30
+        # Run tests (a final partial-credit turn needs the full suite)
+        full_run = partial_credit and turn + 1 == max_num_steps
+        passed, info = await run_tests_with_progress(
+            progress, step_id, turn + 1, code_candidate, test_cases,
+            h5py_file=h5py_file, timeout=30, harness=harness, limits=limits,
+            use_cache=use_result_cache, keep_going=keep_going, function_header=first_step.get("function_header"),
+            smoke_test=smoke_test and not full_run,
+            retest=failing_tests(outcomes) if incremental and not full_run else None
         )
+        turn_timings.append(turn_timing(turn + 1, info))
+        record_outcomes(outcomes, info, len(test_cases))
         last_eval_info = info
         final_pass = passed
         
@@ -274,29 +637,177 @@ We will run your code against SciCode testcases and report pass/fail.
             break
         
         # Otherwise, give the white agent test failures and let it attempt to repair
-        next_message = f"""Test run result (tests failed):
-{info.get('stderr', '')}
+        next_message = build_repair_message(info, test_cases=test_cases)
+        if turn + 1 < max_num_steps:
+            await progress.emit(
+                "repair_requested", f"Requesting a repair of step {step_id}",
+                step_id=step_id, turn=turn + 2
+            )
+    
+    reward = step_reward(final_pass, last_eval_info, partial_credit)
+    return {
+        "reward": reward,
+        "info": {
+            "eval_info": last_eval_info,
+            "problem_id": problem_id,
+            "step_id": step_id,
+            "tests_passed": last_eval_info.get("tests_passed", 0),
+            "num_tests": len(test_cases),
+            "tests_run": last_eval_info.get("tests_run", 0),
+            "partial": bool(last_eval_info.get("partial")),
+            "problem_load_time": problem_load_time,
+            "turns": turn_timings,
+            "test_time": round(sum(t["test_seconds"] for t in turn_timings), 4)
+        },
+        "total_cost": total_cost
+    }
 
-Test runner stdout:
-{info.get('stdout', '')}
 
-Please produce a revised submission (again wrap code in <code>...</code> or <json> tags)."""
+async def ask_agent_to_solve_all_steps(white_agent_url, problem_id, split="validation", max_num_steps=10, limits=None, use_result_cache=True, progress=None, keep_going=False, partial_credit=False, smoke_test=False, incremental=True):
+    """
+    Evaluate every sub-step of a SciCode problem in one white agent conversation.
+
+    Each step is tested together with the latest code of all earlier steps and
+    gets up to `max_num_steps` turns of repair. Work is pipelined: while the
+    submission for step k is being tested, the prompt for step k+1 is already
+    sent to the white agent, and the test harnesses of all steps are built in
+    the background up front.
+
+    The reward is 1.0 only if every step passes (with `partial_credit`, the
+    mean fraction of tests passed per step); per-step results and the step
+    pass rate are reported in the info. `smoke_test` and `incremental` work
+    as in `ask_agent_to_solve`, per step.
+    """
+    total_cost = 0.0
+    progress = progress or ProgressReporter()
     
-    reward = 1.0 if final_pass else 0.0
+    # Load problem
+    load_started = time.perf_counter()
+    problem = await load_scicode_problem_async(problem_id, split=split)
+    problem_load_time = time.perf_counter() - load_started
+    sub_steps = problem.get("sub_steps", [])
+    
+    if not sub_steps:
+        return {
+            "reward": 0.0,
+            "info": {"error": "No sub_steps found in problem"},
+            "total_cost": total_cost
+        }
+    
+    num_steps = len(sub_steps)
+    step_ids = [step.get("step_number", f"{problem_id}_{i}") for i, step in enumerate(sub_steps)]
+    h5py_file = find_h5py_file()
+    
+    # Prefetch the harness of every step off the event loop
+    keep_going = keep_going or partial_credit
+    harness_task = asyncio.create_task(asyncio.to_thread(
+        lambda: [
+            build_test_harness(step.get("test_cases", []), step_ids[i], h5py_file, keep_going)
+            for i, step in enumerate(sub_steps)
+        ]
+    ))
+    
+    context_id = None
+    codes = [None] * num_steps
+    turns = [0] * num_steps
+    outcomes = [{} for _ in range(num_steps)]
+    turn_timings = [[] for _ in range(num_steps)]
+    step_results = []
+    
+    async def submit(k, message):
+        nonlocal context_id
+        white_text, context_id = await send_to_white_agent(
+            white_agent_url, message, context_id=context_id, limits=limits
+        )
+        turns[k] += 1
+        codes[k] = extract_code(white_text)
+        await progress.emit(
+            "white_response_received", f"White agent replied for step {step_ids[k]} (turn {turns[k]})",
+            step_id=step_ids[k], turn=turns[k]
+        )
+    
+    await submit(0, build_step_prompt(problem_id, sub_steps[0], step_ids[0], 0, num_steps))
+    harnesses = await harness_task
+    
+    for k in range(num_steps):
+        while True:
+            # Earlier steps' latest code is part of this step's program
+            program = "\n\n".join(codes[:k + 1])
+            full_run = partial_credit and turns[k] >= max_num_steps
+            test_task = asyncio.create_task(run_tests_with_progress(
+                progress, step_ids[k], turns[k], program, sub_steps[k].get("test_cases", []),
+                h5py_file=h5py_file, timeout=30, harness=harnesses[k], limits=limits,
+                use_cache=use_result_cache, keep_going=keep_going, function_header=sub_steps[k].get("function_header"),
+                smoke_test=smoke_test and not full_run,
+                retest=failing_tests(outcomes[k]) if incremental and not full_run else None
+            ))
+            
+            # Overlap: ask for the next step while this one is being tested
+            if k + 1 < num_steps and codes[k + 1] is None:
+                try:
+                    await submit(k + 1, build_step_prompt(problem_id, sub_steps[k + 1], step_ids[k + 1], k + 1, num_steps))
+                except BaseException:
+                    test_task.cancel()
+                    raise
+            
+            passed, info = await test_task
+            turn_timings[k].append(turn_timing(turns[k], info))
+            record_outcomes(outcomes[k], info, len(sub_steps[k].get("test_cases", [])))
+            if passed or turns[k] >= max_num_steps:
+                break
+            
+            # Otherwise, give the white agent test failures and let it attempt to repair
+            await progress.emit(
+                "repair_requested", f"Requesting a repair of step {step_ids[k]}",
+                step_id=step_ids[k], turn=turns[k] + 1
+            )
+            await submit(k, build_repair_message(info, step_id=step_ids[k], test_cases=sub_steps[k].get("test_cases", [])))
+        
+        step_results.append({
+            "step_id": step_ids[k],
+            "passed": passed,
+            "reward": step_reward(passed, info, partial_credit),
+            "tests_passed": info.get("tests_passed", 0),
+            "num_tests": len(sub_steps[k].get("test_cases", [])),
+            "tests_run": info.get("tests_run", 0),
+            "partial": bool(info.get("partial")),
+            "turns": turns[k],
+            "turn_timings": turn_timings[k],
+            "eval_info": info
+        })
+    
+    steps_passed = sum(1 for r in step_results if r["passed"])
+    if partial_credit:
+        reward = sum(r["reward"] for r in step_results) / num_steps
+    else:
+        reward = 1.0 if steps_passed == num_steps else 0.0
     return {
         "reward": reward,
         "info": {
-            "eval_info": last_eval_info,
             "problem_id": problem_id,
-            "step_id": step_id
+            "steps": step_results,
+            "step_rewards": [r["reward"] for r in step_results],
+            "steps_passed": steps_passed,
+            "num_steps": num_steps,
+            "step_pass_rate": steps_passed / num_steps,
+            "problem_load_time": problem_load_time,
+            "test_time": round(sum(t["test_seconds"] for timings in turn_timings for t in timings), 4)
         },
         "total_cost": total_cost
     }
 
 
+def tag_enabled(tags: dict, name: str, default: bool) -> bool:
+    """Read an on/off task tag."""
+    value = tags.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("off", "false", "0", "no")
+
+
 class SciCodeGreenAgentExecutor(AgentExecutor):
     def __init__(self):
-        pass
+        self.duration_history = DurationHistory()
 
     async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
         # parse the task
@@ -306,7 +817,21 @@ class SciCodeGreenAgentExecutor(AgentExecutor):
         
         white_agent_url = tags.get("white_agent_url")
         problem_id = tags.get("scicode_problem_id") or tags.get("problem_id")
+        problem_ids = tags.get("problem_ids")
         split = tags.get("split", "validation")
+        eval_mode = tags.get("eval_mode", "first_step")
+        # <result_cache>off</result_cache> re-runs every submission (for nondeterministic problems)
+        use_result_cache = tag_enabled(tags, "result_cache", True)
+        # <keep_going>on</keep_going> runs every test after a failure; <partial_credit>on</partial_credit>
+        # also rewards the fraction of tests passed; <smoke_test>on</smoke_test> runs one cheap test
+        # before the full suite and reports its failure right away; <incremental>off</incremental> stops
+        # re-running previously failing tests first on repair turns
+        scoring = {
+            "keep_going": tag_enabled(tags, "keep_going", False),
+            "partial_credit": tag_enabled(tags, "partial_credit", False),
+            "smoke_test": tag_enabled(tags, "smoke_test", False),
+            "incremental": tag_enabled(tags, "incremental", True),
+        }
         
         if not white_agent_url:
             await event_queue.enqueue_event(
@@ -314,44 +839,215 @@ class SciCodeGreenAgentExecutor(AgentExecutor):
             )
             return
         
+        if problem_ids:
+            await self.execute_suite(context, white_agent_url, problem_ids, split, eval_mode, tags, event_queue, use_result_cache, scoring)
+            return
+        
         if not problem_id:
             await event_queue.enqueue_event(
-                new_agent_text_message("Missing required tag: scicode_problem_id or problem_id")
+                new_agent_text_message("Missing required tag: scicode_problem_id, problem_id or problem_ids")
             )
             return
         
         print(f"Green agent: Setting up evaluation for problem {problem_id}...")
+        updater = await self.start_task(context, event_queue)
+        progress = ProgressReporter(updater, problem_id=str(problem_id))
         
         metrics = {}
         print("Green agent: Starting evaluation...")
         timestamp_started = time.time()
+        await progress.emit("evaluation_started", f"Evaluating problem {problem_id} ({split}, {eval_mode})")
         
-        res = await ask_agent_to_solve(white_agent_url, problem_id, split=split)
+        try:
+            res = await self.evaluate_problem(white_agent_url, problem_id, split, eval_mode, use_result_cache=use_result_cache, progress=progress, **scoring)
+        except Exception as e:
+            await self.fail_task(updater, f"Evaluation of problem {problem_id} failed: {e}")
+            raise
         
         metrics["time_used"] = time.time() - timestamp_started
+        if "step_pass_rate" in res["info"]:
+            metrics["step_pass_rate"] = res["info"]["step_pass_rate"]
+        if scoring["partial_credit"]:
+            metrics["reward"] = res["reward"]
         result_bool = metrics["success"] = res["reward"] == 1.0
         result_emoji = "✅" if result_bool else "❌"
+        self.duration_history.record(split, str(problem_id), metrics["time_used"], eval_mode)
+        self.duration_history.save()
         
         print("Green agent: Evaluation complete.")
-        await event_queue.enqueue_event(
-            new_agent_text_message(
-                f"Finished. White agent success: {result_emoji}\nMetrics: {json.dumps(metrics, indent=2)}\nDetails: {json.dumps(res['info'], indent=2)}\n"
+        await self.complete_task(
+            updater,
+            f"Finished. White agent success: {result_emoji}\nMetrics: {json.dumps(metrics, indent=2)}\nDetails: {json.dumps(res['info'], indent=2)}\n",
+            data={"metrics": metrics, "reward": res["reward"], "info": res["info"]},
+        )
+
+    async def start_task(self, context: RequestContext, event_queue: EventQueue) -> TaskUpdater:
+        """Create the A2A task that carries progress updates and the final report."""
+        task = context.current_task
+        if task is None:
+            task = new_task(context.message)
+            await event_queue.enqueue_event(task)
+        updater = TaskUpdater(event_queue, task.id, task.context_id)
+        await updater.start_work()
+        return updater
+
+    async def complete_task(self, updater: TaskUpdater, text: str, data: Optional[dict] = None) -> None:
+        """Complete the task with the text report and, if given, the same results as a data part."""
+        parts = [Part(root=TextPart(text=text))]
+        if data is not None:
+            parts.append(Part(root=DataPart(data=data)))
+        await updater.complete(updater.new_agent_message(parts))
+
+    async def fail_task(self, updater: TaskUpdater, text: str) -> None:
+        await updater.failed(updater.new_agent_message([Part(root=TextPart(text=text))]))
+
+    async def evaluate_problem(self, white_agent_url, problem_id, split, eval_mode, limits=None, use_result_cache=True, progress=None, keep_going=False, partial_credit=False, smoke_test=False, incremental=True):
+        """Evaluate one problem in the requested mode."""
+        solve = ask_agent_to_solve_all_steps if eval_mode == "all_steps" else ask_agent_to_solve
+        with EVALUATIONS_IN_FLIGHT.track_inprogress(), EVALUATION.time(eval_mode=eval_mode):
+            return await solve(
+                white_agent_url, problem_id, split=split, limits=limits, use_result_cache=use_result_cache,
+                progress=progress, keep_going=keep_going, partial_credit=partial_credit, smoke_test=smoke_test,
+                incremental=incremental
+            )
+
+    async def execute_suite(self, context: RequestContext, white_agent_url, problem_ids, split, eval_mode, tags, event_queue: EventQueue, use_result_cache=True, scoring=None) -> None:
+        """
+        Evaluate a list, range or whole split of problems concurrently.
+
+        Optional tags: <suite_concurrency> (problems in flight, default 8),
+        <white_agent_concurrency> (concurrent white agent calls, default 8) and
+        <sandbox_concurrency> (concurrent sandbox runs, default: process limit).
+        """
+        def int_tag(name, default):
+            try:
+                return max(1, int(tags.get(name, default)))
+            except ValueError:
+                return default
+        
+        try:
+            await problem_store.load_split_async(split)
+            all_ids = problem_store.problem_ids(split)
+        except Exception as e:
+            print(f"Warning: Failed to list problems of {split} split: {e}")
+            all_ids = []
+        try:
+            selected = parse_problem_selection(problem_ids, all_ids)
+        except ValueError as e:
+            await event_queue.enqueue_event(new_agent_text_message(f"{e} (in {split} split)"))
+            return
+        if not selected:
+            await event_queue.enqueue_event(
+                new_agent_text_message(f"No problems selected by problem_ids={problem_ids!r} in {split} split")
+            )
+            return
+        
+        ordered = self.duration_history.order(split, selected, eval_mode)
+        limits = SuiteLimits(
+            white_agent_calls=int_tag("white_agent_concurrency", 8),
+            sandbox_runs=int_tag("sandbox_concurrency", sandbox_concurrency),
+        )
+        print(f"Green agent: Starting suite of {len(ordered)} problems ({split}, {eval_mode})...")
+        updater = await self.start_task(context, event_queue)
+        progress = ProgressReporter(updater)
+        timestamp_started = time.time()
+        await progress.emit(
+            "suite_started", f"Evaluating {len(ordered)} problems ({split}, {eval_mode})",
+            num_problems=len(ordered)
+        )
+        finished = {"count": 0, "passed": 0}
+        
+        async def evaluate(pid):
+            problem_progress = progress.bind(problem_id=pid)
+            await problem_progress.emit("problem_started", f"Problem {pid} started")
+            try:
+                res = await self.evaluate_problem(white_agent_url, pid, split, eval_mode, limits=limits, use_result_cache=use_result_cache, progress=problem_progress, **(scoring or {}))
+            except Exception as e:
+                finished["count"] += 1
+                await problem_progress.emit(
+                    "problem_finished", f"Problem {pid} failed to evaluate: {e}",
+                    reward=0.0, error=str(e), completed=finished["count"], num_problems=len(ordered)
+                )
+                raise
+            finished["count"] += 1
+            finished["passed"] += res["reward"] == 1.0
+            await problem_progress.emit(
+                "problem_finished",
+                f"Problem {pid} finished with reward {res['reward']} ({finished['count']}/{len(ordered)} done, {finished['passed']} passed)",
+                reward=res["reward"], completed=finished["count"], passed_so_far=finished["passed"], num_problems=len(ordered)
             )
+            return res
+        
+        try:
+            results = await run_suite(ordered, evaluate, concurrency=int_tag("suite_concurrency", 8))
+        except Exception as e:
+            await self.fail_task(updater, f"Suite evaluation failed: {e}")
+            raise
+        # Report in the order the problems were requested
+        position = {pid: i for i, pid in enumerate(selected)}
+        results.sort(key=lambda r: position[r["problem_id"]])
+        
+        for r in results:
+            if "error" not in r:
+                self.duration_history.record(split, r["problem_id"], r["time_used"], eval_mode)
+        self.duration_history.save()
+        
+        passed = sum(1 for r in results if r["reward"] == 1.0)
+        metrics = {
+            "time_used": time.time() - timestamp_started,
+            "problems": len(results),
+            "passed": passed,
+            "pass_rate": passed / len(results),
+            "errors": sum(1 for r in results if "error" in r),
+            "mean_reward": sum(r["reward"] for r in results) / len(results),
+        }
+        step_rates = [r["info"]["step_pass_rate"] for r in results if "step_pass_rate" in r["info"]]
+        if step_rates:
+            metrics["mean_step_pass_rate"] = sum(step_rates) / len(step_rates)
+        
+        print(f"Green agent: Suite complete ({passed}/{len(results)} passed).")
+        await self.complete_task(
+            updater,
+            f"Finished suite. Pass rate: {passed}/{len(results)}\nMetrics: {json.dumps(metrics, indent=2)}\nDetails: {json.dumps(results, indent=2)}\n",
+            data={"metrics": metrics, "results": results},
         )
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
-        raise NotImplementedError
+        # The request handler cancels the running execute() after this. Cancelling
+        # a sandbox run kills its process (the cold interpreter's session, or the
+        # pool worker's forked child) before the run's work dir is released.
+        print(f"Green agent: Cancelling task {context.task_id}...")
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await updater.cancel()
 
 
-def start_green_agent(agent_name="tau_green_scicode", host="localhost", port=9001):
-    print("Starting green agent...")
+def _preload_splits_from_env():
+    return [s for s in os.getenv("SCICODE_PRELOAD_SPLITS", "validation").split(",") if s.strip()]
+
+
+def _prepare_worker(preload_splits):
+    """Per-process startup: load the problem tables and start the sandbox pool."""
+    # Load the problem tables before serving so the first request does no dataset I/O.
+    problem_store.preload(s.strip() for s in preload_splits)
+    if sandbox_pool is not None:
+        sandbox_pool.start()
+
+
+def build_green_app(agent_name="tau_green_scicode", url="http://localhost:9001", task_store=None, shared=False):
+    """
+    Build the green agent's Starlette app (A2A endpoints, /status and /metrics).
+
+    `shared` marks one of several worker processes sharing the task store; it
+    only cancels and resubscribes to tasks it runs itself.
+    """
     agent_card_dict = load_agent_card_toml(agent_name)
-    url = f"http://{host}:{port}"
     agent_card_dict["url"] = url  # complete all required card fields
+    task_store = task_store if task_store is not None else make_task_store(agent_name)
     
-    request_handler = DefaultRequestHandler(
+    handler_class = LocalTaskRequestHandler if shared else DefaultRequestHandler
+    request_handler = handler_class(
         agent_executor=SciCodeGreenAgentExecutor(),
-        task_store=InMemoryTaskStore(),
+        task_store=task_store,
     )
     
     app = A2AStarletteApplication(
@@ -369,9 +1065,78 @@ def start_green_agent(agent_name="tau_green_scicode", host="localhost", port=900
             "status": "online",
             "agent_type": "green",
             "name": agent_card_dict.get("name", "tau_green_scicode"),
-            "capabilities": list(agent_card_dict.get("capabilities", {}).keys()) if isinstance(agent_card_dict.get("capabilities"), dict) else []
+            "capabilities": list(agent_card_dict.get("capabilities", {}).keys()) if isinstance(agent_card_dict.get("capabilities"), dict) else [],
+            "worker_pid": os.getpid(),
+            "problem_store": problem_store.stats(),
+            "result_cache": result_cache.stats() if result_cache is not None else None,
+            "harness_cache": harness_cache.stats(),
+            "task_store": task_store.stats() if isinstance(task_store, SQLiteTaskStore) else None
         })
     
+    metrics_endpoint(starlette_app)
+    return starlette_app
+
+
+def create_app():
+    """
+    App factory for multi-worker servers: uvicorn imports this module in every
+    worker process and calls it. Configured through the environment by
+    `start_green_agent` (SCICODE_GREEN_AGENT_NAME, SCICODE_GREEN_URL,
+    SCICODE_PRELOAD_SPLITS).
+    """
+    _prepare_worker(_preload_splits_from_env())
+    return build_green_app(
+        os.getenv("SCICODE_GREEN_AGENT_NAME", "tau_green_scicode"),
+        os.getenv("SCICODE_GREEN_URL", "http://localhost:9001"),
+        shared=True,
+    )
+
+
+def start_green_agent(agent_name="tau_green_scicode", host="localhost", port=9001, preload_splits=None, workers=None):
+    """
+    Start the green agent server.
+    
+    Args:
+        preload_splits: Splits to load at startup (default: $SCICODE_PRELOAD_SPLITS
+                        or "validation"; "" disables preloading)
+        workers: Server processes (default: $SCICODE_GREEN_WORKERS or 1). More than
+                 one needs the SQLite task store, which all workers share; each
+                 worker has its own sandbox pool, caches in memory and metrics.
+                 A worker only cancels (tasks/cancel) and streams
+                 (tasks/resubscribe) tasks it runs itself, and refuses requests for
+                 tasks running in another worker.
+    """
+    print("Starting green agent...")
+    if preload_splits is None:
+        preload_splits = _preload_splits_from_env()
+    if workers is None:
+        try:
+            workers = max(1, int(os.getenv("SCICODE_GREEN_WORKERS", 1)))
+        except ValueError:
+            workers = 1
+    url = f"http://{host}:{port}"
+    
+    task_store = make_task_store(f"{agent_name}-{port}")
+    if isinstance(task_store, SQLiteTaskStore):
+        interrupted = task_store.fail_interrupted()
+        if interrupted:
+            print(f"Green agent: Marked {interrupted} tasks interrupted by the last shutdown as failed.")
+    elif workers > 1:
+        print("Warning: Multiple workers need the SQLite task store; starting a single worker.")
+        workers = 1
+    
+    if workers > 1:
+        os.environ["SCICODE_GREEN_AGENT_NAME"] = agent_name
+        os.environ["SCICODE_GREEN_URL"] = url
+        os.environ["SCICODE_PRELOAD_SPLITS"] = ",".join(s.strip() for s in preload_splits)
+        os.environ["SCICODE_TASK_STORE_PATH"] = str(task_store.path)
+        print(f"Starting SciCode Green Agent on {url} with {workers} workers")
+        uvicorn.run("scicode_green_agent:create_app", factory=True, host=host, port=port, workers=workers)
+        return
+    
+    _prepare_worker(preload_splits)
+    starlette_app = build_green_app(agent_name, url, task_store)
+    
     print(f"Starting SciCode Green Agent on {url}")
     uvicorn.run(starlette_app, host=host, port=port)
 
@@ -383,7 +1148,10 @@ if __name__ == "__main__":
     parser.add_argument("--host", type=str, default="localhost", help="Host to bind to")
     parser.add_argument("--port", type=int, default=9001, help="Port to bind to")
     parser.add_argument("--agent-name", type=str, default="tau_green_scicode", help="Agent name (for card file)")
+    parser.add_argument("--preload-splits", type=str, default=None, help="Comma-separated splits to load at startup (default: $SCICODE_PRELOAD_SPLITS or 'validation')")
+    parser.add_argument("--workers", type=int, default=None, help="Server processes (default: $SCICODE_GREEN_WORKERS or 1)")
     
     args = parser.parse_args()
-    start_green_agent(agent_name=args.agent_name, host=args.host, port=args.port)
+    preload_splits = args.preload_splits.split(",") if args.preload_splits is not None else None
+    start_green_agent(agent_name=args.agent_name, host=args.host, port=args.port, preload_splits=preload_splits, workers=args.workers)
 
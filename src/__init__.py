@@ -1,5 +1,40 @@
-"""Source package for SciCode AgentBeats utilities."""
+"""Source package for SciCode AgentBeats utilities.
 
-from .my_util import parse_tags, my_a2a, A2AClient, wait_agent_ready
+Names are imported from their submodules on first access, so importing one
+submodule (e.g. `src.metrics` in the white agent) does not load the sandbox,
+problem store and A2A client along with it.
+"""
 
-__all__ = ["parse_tags", "my_a2a", "A2AClient", "wait_agent_ready"]
+import importlib
+
+_EXPORTS = {
+    "parse_tags": "my_util", "my_a2a": "my_util", "A2AClient": "my_util", "wait_agent_ready": "my_util",
+    "wait_agents_ready": "my_util", "get_result_text": "my_util", "get_result_data": "my_util",
+    "ProblemStore": "problem_store", "problem_store": "problem_store",
+    "SandboxPool": "sandbox", "sandbox_pool": "sandbox", "run_script": "sandbox", "run_script_async": "sandbox",
+    "TargetStore": "target_store", "get_target_store": "target_store",
+    "ResultCache": "result_cache", "result_cache": "result_cache",
+    "ConversationStore": "conversation_store",
+    "CompletionCache": "completion_cache",
+    "SQLiteTaskStore": "task_store", "make_task_store": "task_store", "LocalTaskRequestHandler": "task_store",
+    "compact_feedback": "feedback",
+    "preflight_check": "preflight",
+    "HarnessCache": "harness_cache", "harness_cache": "harness_cache",
+    "TestTimings": "sharding", "plan_shards": "sharding", "merge_shard_results": "sharding",
+    "TagParser": "tag_parser", "TagMatch": "tag_parser", "find_tags": "tag_parser",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,117 @@
+"""Persistent record/replay cache of white-agent LLM completions.
+
+Completions are keyed on a hash of the full message history, the model and
+the request parameters, so rerunning a deterministic evaluation
+(temperature 0) replays the recorded responses instead of querying the model.
+
+Modes:
+    record       Return recorded completions; query the model and record on a miss
+    replay       Only return recorded completions; a miss is an error (no network needed)
+    passthrough  Always query the model, never read or write the cache (default)
+
+Recording is opt-in: a recorded completion is replayed even after the
+provider updates the model behind the same name, and sampled (temperature
+> 0) outputs would be frozen, so only record deterministic runs.
+
+Configuration (environment variables):
+    WHITE_AGENT_LLM_CACHE       Mode: "record", "replay" or "passthrough" (default)
+    WHITE_AGENT_LLM_CACHE_PATH  SQLite file (default: ~/.cache/scicode_agentbeats/completions.sqlite)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "scicode_agentbeats" / "completions.sqlite"
+MODES = ("record", "replay", "passthrough")
+
+
+def completion_key(messages: List[dict], model: str, **params) -> str:
+    """Content hash of one completion request."""
+    request = {"messages": messages, "model": model, "params": params}
+    data = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+class CompletionCache:
+    """SQLite-backed store of recorded completions."""
+
+    def __init__(self, path: Optional[Path] = None, mode: str = "record"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown completion cache mode {mode!r} (expected one of {', '.join(MODES)})")
+        self.path = Path(path or DEFAULT_CACHE_PATH)
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = None
+
+    @property
+    def replay_only(self) -> bool:
+        return self.mode == "replay"
+
+    def _conn(self) -> sqlite3.Connection:
+        """Open the database on first use (call with the lock held)."""
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL, content TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db = db
+        return self._db
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the recorded completion text for a key, or None on a miss."""
+        if self.mode == "passthrough":
+            return None
+        try:
+            with self._lock:
+                row = self._conn().execute("SELECT content FROM completions WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Warning: Completion cache lookup failed: {e}")
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, model: str, content: str) -> None:
+        """Record a completion (only in record mode)."""
+        if self.mode != "record":
+            return
+        try:
+            with self._lock:
+                self._conn().execute(
+                    "INSERT OR REPLACE INTO completions (key, model, content, created) VALUES (?, ?, ?, ?)",
+                    (key, model, content, time.time()),
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: Completion cache store failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def make_completion_cache(mode: Optional[str] = None) -> Optional[CompletionCache]:
+    """Completion cache configured from the environment (None in passthrough mode)."""
+    mode = (mode or os.getenv("WHITE_AGENT_LLM_CACHE", "passthrough")).lower()
+    if mode in ("passthrough", "off", "0", "false", "no"):
+        return None
+    return CompletionCache(path=os.getenv("WHITE_AGENT_LLM_CACHE_PATH") or None, mode=mode)
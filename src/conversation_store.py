@@ -0,0 +1,137 @@
+"""Bounded per-context conversation history for the white agent.
+
+Conversations are evicted when they have been idle for longer than the TTL,
+and least recently used conversations are dropped whenever the store holds
+more than `max_contexts` conversations or `max_bytes` of message content.
+
+Configuration (environment variables):
+    WHITE_AGENT_MAX_CONTEXTS     Max conversations kept (default: 1000)
+    WHITE_AGENT_CONTEXT_TTL      Seconds a conversation survives without activity (default: 3600)
+    WHITE_AGENT_CONTEXT_MAX_MB   Max total size of stored messages (default: 64)
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+def _message_size(message: dict) -> int:
+    """Approximate memory footprint of a chat message (content bytes plus role)."""
+    content = message.get("content") or ""
+    if not isinstance(content, str):
+        content = str(content)
+    return len(content.encode("utf-8", errors="replace")) + len(message.get("role", ""))
+
+
+class _Conversation:
+    __slots__ = ("messages", "size", "last_used")
+
+    def __init__(self):
+        self.messages: List[dict] = []
+        self.size = 0
+        self.last_used = time.monotonic()
+
+
+class ConversationStore:
+    """LRU store of conversation histories with TTL expiry and a byte bound."""
+
+    def __init__(self, max_contexts: int = 1000, ttl: float = 3600.0, max_bytes: int = 64 * 1024 * 1024):
+        self.max_contexts = max_contexts
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self._conversations: "OrderedDict[str, _Conversation]" = OrderedDict()
+
+    def get(self, context_id: str) -> List[dict]:
+        """Return a copy of the history of a conversation (empty if unknown or expired)."""
+        with self._lock:
+            self._expire()
+            conv = self._conversations.get(context_id)
+            if conv is None:
+                return []
+            conv.last_used = time.monotonic()
+            self._conversations.move_to_end(context_id)
+            return list(conv.messages)
+
+    def append(self, context_id: str, *messages: dict) -> None:
+        """Append messages to a conversation, evicting others if the store is over its bounds."""
+        with self._lock:
+            conv = self._conversations.get(context_id)
+            if conv is None:
+                conv = self._conversations[context_id] = _Conversation()
+            for message in messages:
+                size = _message_size(message)
+                conv.messages.append(message)
+                conv.size += size
+                self.total_bytes += size
+            conv.last_used = time.monotonic()
+            self._conversations.move_to_end(context_id)
+            self._expire()
+            self._evict(keep=context_id)
+
+    def discard(self, context_id: str) -> None:
+        with self._lock:
+            conv = self._conversations.pop(context_id, None)
+            if conv is not None:
+                self.total_bytes -= conv.size
+
+    def _expire(self) -> None:
+        """Drop idle conversations (call with the lock held). Oldest are first in LRU order."""
+        if self.ttl <= 0:
+            return
+        cutoff = time.monotonic() - self.ttl
+        while self._conversations:
+            context_id, conv = next(iter(self._conversations.items()))
+            if conv.last_used >= cutoff:
+                break
+            del self._conversations[context_id]
+            self.total_bytes -= conv.size
+            self.expirations += 1
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Drop least recently used conversations until within bounds (call with the lock held)."""
+        while self._conversations and (
+            len(self._conversations) > self.max_contexts or self.total_bytes > self.max_bytes
+        ):
+            context_id = next(iter(self._conversations))
+            if context_id == keep:
+                # Never drop the conversation being written, even if it alone exceeds the bound
+                if len(self._conversations) == 1:
+                    break
+                self._conversations.move_to_end(context_id)
+                continue
+            conv = self._conversations.pop(context_id)
+            self.total_bytes -= conv.size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "contexts": len(self._conversations),
+                "bytes": self.total_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+
+def make_conversation_store() -> ConversationStore:
+    """Conversation store configured from the environment."""
+    def env(name, default, cast):
+        try:
+            return cast(os.getenv(name, default))
+        except ValueError:
+            return default
+
+    return ConversationStore(
+        max_contexts=env("WHITE_AGENT_MAX_CONTEXTS", 1000, int),
+        ttl=env("WHITE_AGENT_CONTEXT_TTL", 3600.0, float),
+        max_bytes=int(env("WHITE_AGENT_CONTEXT_MAX_MB", 64.0, float) * 1024 * 1024),
+    )
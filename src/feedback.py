@@ -0,0 +1,217 @@
+"""Compact repair feedback for the white agent.
+
+Failed test runs are reported back to the white agent, which keeps every
+message in its history, so the raw sandbox output would be paid for on every
+later turn. `compact_feedback` keeps what a repair needs within a byte budget:
+
+- a per-test summary from the structured test records,
+- the source of the first failing test case,
+- stderr with repeated tracebacks collapsed into one plus a repeat count,
+- stdout without the runner's "Test N passed" lines,
+- long lines and multi-line array dumps cut down to their head and tail.
+
+Configuration (environment variables):
+    SCICODE_FEEDBACK_MAX_BYTES   Budget of one repair message body (default: 6000)
+    SCICODE_FEEDBACK_MAX_TOKENS  Budget in tokens instead (about 4 bytes each); overrides the above
+"""
+
+import os
+import re
+from typing import List, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 6000
+BYTES_PER_TOKEN = 4
+
+# Lines longer than this are cut to their head and tail
+MAX_LINE_BYTES = 400
+# Runs of array-like lines longer than this are collapsed
+MAX_ARRAY_LINES = 6
+# Failing tests listed individually in the summary
+MAX_LISTED_FAILURES = 10
+
+_ARRAY_LINE = re.compile(r"^[\s\[\]\(\),.eE+\-\d:jnaif]*$")
+_RUNNER_PASSED = re.compile(r"^Test \d+ passed$")
+_RUNNER_FAILED = re.compile(r"^Test \d+ failed: ")
+_FRAME = re.compile(r'^\s+File "[^"]*", line \d+, in (\S+)')
+
+
+def feedback_budget() -> int:
+    """Byte budget of a repair message from the environment."""
+    try:
+        tokens = os.getenv("SCICODE_FEEDBACK_MAX_TOKENS")
+        if tokens:
+            return max(500, int(tokens) * BYTES_PER_TOKEN)
+        return max(500, int(os.getenv("SCICODE_FEEDBACK_MAX_BYTES", DEFAULT_MAX_BYTES)))
+    except ValueError:
+        return DEFAULT_MAX_BYTES
+
+
+def truncate_middle(text: str, max_bytes: int) -> str:
+    """Cut `text` to about `max_bytes` UTF-8 bytes, keeping its head and tail."""
+    data = text.encode("utf-8")
+    if len(data) <= max_bytes:
+        return text
+    if max_bytes < 80:
+        return data[:max_bytes].decode("utf-8", errors="ignore")
+    marker = f"\n... [{len(data) - max_bytes} bytes omitted] ...\n"
+    keep = max(0, max_bytes - len(marker))
+    head = data[:keep * 2 // 3].decode("utf-8", errors="ignore")
+    tail = data[len(data) - keep // 3:].decode("utf-8", errors="ignore")
+    return head + marker + tail
+
+
+def _compact_lines(lines: List[str]) -> List[str]:
+    """Shorten long lines and collapse runs of array-dump lines."""
+    out = []
+    run: List[str] = []
+
+    def flush():
+        if len(run) > MAX_ARRAY_LINES:
+            out.extend(run[:3])
+            out.append(f"    ... [{len(run) - 4} similar lines omitted] ...")
+            out.append(run[-1])
+        else:
+            out.extend(run)
+        run.clear()
+
+    for line in lines:
+        if len(line.encode("utf-8")) > MAX_LINE_BYTES:
+            line = truncate_middle(line, MAX_LINE_BYTES).replace("\n", " ")
+        if line.strip() and _ARRAY_LINE.match(line):
+            run.append(line)
+            continue
+        flush()
+        out.append(line)
+    flush()
+    return out
+
+
+def _split_tracebacks(text: str) -> List[Tuple[str, List[str]]]:
+    """Split output into ("traceback", lines) blocks and ("text", [line]) items, in order."""
+    items: List[Tuple[str, List[str]]] = []
+    lines = text.splitlines()
+    i = 0
+    while i < len(lines):
+        if lines[i].startswith("Traceback (most recent call last):"):
+            block = [lines[i]]
+            i += 1
+            # Frames are indented; the exception line and its message (up to a blank line) end the block
+            while i < len(lines) and lines[i].startswith(" "):
+                block.append(lines[i])
+                i += 1
+            while i < len(lines) and lines[i].strip() and not lines[i].startswith("Traceback (most recent call last):") \
+                    and not _RUNNER_FAILED.match(lines[i]):
+                block.append(lines[i])
+                i += 1
+            items.append(("traceback", block))
+        else:
+            items.append(("text", [lines[i]]))
+            i += 1
+    return items
+
+
+def _traceback_key(block: List[str]) -> Tuple:
+    """Identity of a traceback for de-duplication: the frame functions and the exception type."""
+    functions = tuple(m.group(1) for m in (_FRAME.match(line) for line in block) if m)
+    exception = next((line.split(":", 1)[0] for line in block[1:] if not line.startswith(" ")), "")
+    return functions, exception
+
+
+def compact_stderr(stderr: str, drop_runner_lines: bool = False) -> str:
+    """stderr with repeated tracebacks collapsed and long output shortened."""
+    items = _split_tracebacks(stderr)
+    counts = {}
+    for kind, block in items:
+        if kind == "traceback":
+            key = _traceback_key(block)
+            counts[key] = counts.get(key, 0) + 1
+    seen = set()
+    out: List[str] = []
+    for kind, block in items:
+        if kind == "text":
+            if drop_runner_lines and _RUNNER_FAILED.match(block[0]):
+                continue
+            out.extend(block)
+            continue
+        key = _traceback_key(block)
+        if key in seen:
+            continue
+        seen.add(key)
+        out.extend(block)
+        if counts[key] > 1:
+            out.append(f"(the same error occurred {counts[key] - 1} more times)")
+    return "\n".join(_compact_lines(out)).strip("\n")
+
+
+def compact_stdout(stdout: str) -> str:
+    """stdout without the runner's pass lines, with long output shortened."""
+    lines = [line for line in stdout.splitlines() if not _RUNNER_PASSED.match(line.strip())]
+    return "\n".join(_compact_lines(lines)).strip("\n")
+
+
+def summarize_tests(info: dict) -> Optional[str]:
+    """One line per failing test (from the structured records) after a pass count."""
+    records = info.get("tests")
+    if not records:
+        return None
+    failed = [r for r in records if not r.get("passed")]
+    passed = info.get("tests_passed", len(records) - len(failed))
+    if info.get("retested"):
+        lines = [f"Re-ran the {len(info['retested'])} tests that failed before; the other tests were not run"]
+    elif info.get("smoke_test"):
+        lines = [f"Smoke test (test {info['smoke_test']} of {info.get('num_tests') or len(records)}) failed; the other tests were not run"]
+    else:
+        lines = [f"Tests passed: {passed}/{info.get('num_tests') or len(records)}"]
+    for r in failed[:MAX_LISTED_FAILURES]:
+        message = truncate_middle(f"{r.get('error')}: {r.get('message') or ''}".rstrip(": "), 300).replace("\n", " ")
+        lines.append(f"Test {r.get('test')} failed: {message}")
+    if len(failed) > MAX_LISTED_FAILURES:
+        lines.append(f"... and {len(failed) - MAX_LISTED_FAILURES} more failing tests")
+    return "\n".join(lines)
+
+
+def first_failing_test(info: dict, test_cases: Optional[list]) -> Optional[str]:
+    """Source of the first failing test case, if it is known."""
+    if not test_cases:
+        return None
+    for r in info.get("tests") or ():
+        if not r.get("passed") and isinstance(r.get("test"), int) and 1 <= r["test"] <= len(test_cases):
+            return f"Test {r['test']}:\n{str(test_cases[r['test'] - 1]).strip()}"
+    return None
+
+
+def compact_feedback(info: dict, test_cases: Optional[list] = None, max_bytes: Optional[int] = None) -> str:
+    """
+    Compact description of a failed test run.
+
+    Sections are filled in priority order (test summary, first failing test,
+    errors, stdout); each is cut to what is left of the budget.
+
+    Args:
+        info: Result info of run_tests_against_code
+        test_cases: Test case sources of the step (to quote the first failing one)
+        max_bytes: Budget in UTF-8 bytes (default: `feedback_budget()`)
+
+    Returns:
+        The feedback text
+    """
+    budget = feedback_budget() if max_bytes is None else max_bytes
+    has_records = bool(info.get("tests"))
+    sections = [
+        ("", summarize_tests(info)),
+        ("First failing test:", first_failing_test(info, test_cases)),
+        ("Errors:", compact_stderr(info.get("stderr", ""), drop_runner_lines=has_records)),
+        ("Test runner stdout:", compact_stdout(info.get("stdout", ""))),
+    ]
+    parts = []
+    remaining = budget
+    for title, body in sections:
+        if not body or remaining <= 0:
+            continue
+        overhead = len(title.encode("utf-8")) + 3
+        text = truncate_middle(body, max(0, remaining - overhead))
+        if not text.strip():
+            continue
+        parts.append(f"{title}\n{text}" if title else text)
+        remaining -= len(text.encode("utf-8")) + overhead
+    return "\n\n".join(parts)
@@ -0,0 +1,198 @@
+"""Precompiled test harnesses and reusable sandbox work directories.
+
+A step's harness depends only on the step, so it is compiled once: the code
+object is marshalled next to its source under the work root, and a run's
+script is just the submission followed by a two-line loader that executes
+the cached code object in the submission's namespace. Tracebacks of failing
+tests point into the harness source file.
+
+Runs get a work directory from a free list instead of a fresh temporary
+directory; it is emptied when the run ends and reused by the next one. The
+work root is on tmpfs (/dev/shm) when that has room for the sandbox file-size
+limit, and in the system temp dir otherwise.
+
+The marshalled code is only valid for the interpreter that wrote it; the
+sandbox runs submissions with that same interpreter (`sys.executable`).
+Harness files are written read-only; like the result cache and the target
+store, they rely on submissions not writing outside their work directory.
+
+Configuration (environment variables):
+    SCICODE_WORK_DIR        Base directory of the work root (default: /dev/shm if large enough, else the temp dir)
+    SCICODE_HARNESS_CACHE   Compiled harnesses kept per process (default: 512)
+"""
+
+import os
+import atexit
+import shutil
+import marshal
+import hashlib
+import tempfile
+import threading
+import contextlib
+from collections import OrderedDict
+from typing import Iterator, List, Optional
+
+from .metrics import Counter
+
+HARNESS_CACHE_LOOKUPS = Counter("scicode_harness_cache_lookups_total", "Compiled harness lookups", ["result"])
+
+TMPFS = "/dev/shm"
+# Free tmpfs space required to put the work root there
+_TMPFS_MIN_FREE = 512 * 1024 * 1024
+# Idle work directories kept for reuse
+_MAX_FREE_DIRS = 64
+
+SOLUTION_FILE = "solution.py"
+
+
+def default_work_base() -> str:
+    """Directory the work root is created in (see module docstring)."""
+    configured = os.getenv("SCICODE_WORK_DIR")
+    if configured:
+        return configured
+    try:
+        st = os.statvfs(TMPFS)
+        if os.access(TMPFS, os.W_OK) and st.f_bavail * st.f_frsize >= _TMPFS_MIN_FREE:
+            return TMPFS
+    except OSError:
+        pass
+    return tempfile.gettempdir()
+
+
+class HarnessCache:
+    """Per-process cache of compiled harnesses plus a free list of work directories."""
+
+    def __init__(self, base: Optional[str] = None, max_entries: int = 512):
+        self.base = base
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._root = None
+        self._paths = OrderedDict()  # harness hash -> marshalled code path
+        self._free: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def root(self) -> str:
+        """Work root of this process, created on first use and removed at exit."""
+        with self._lock:
+            if self._root is None:
+                base = self.base or default_work_base()
+                os.makedirs(base, exist_ok=True)
+                self._root = tempfile.mkdtemp(prefix=f"scicode-{os.getpid()}-", dir=base)
+                atexit.register(shutil.rmtree, self._root, True)
+            return self._root
+
+    def code_path(self, harness: str) -> str:
+        """
+        Path of the marshalled code object of `harness`, compiling it on first use.
+
+        Compiling can take a while for large test sources, so callers that build
+        harnesses ahead of time should call this off the event loop too.
+        """
+        digest = hashlib.sha256(harness.encode("utf-8", errors="surrogatepass")).hexdigest()[:32]
+        with self._lock:
+            path = self._paths.get(digest)
+            if path is not None:
+                self._paths.move_to_end(digest)
+                self.hits += 1
+        if path is not None:
+            HARNESS_CACHE_LOOKUPS.inc(result="hit")
+            return path
+
+        HARNESS_CACHE_LOOKUPS.inc(result="miss")
+        source_path = os.path.join(self.root, f"harness-{digest}.py")
+        path = os.path.join(self.root, f"harness-{digest}.code")
+        code = compile(harness, source_path, "exec", dont_inherit=True)
+        _write_read_only(source_path, harness.encode("utf-8", errors="surrogatepass"))
+        _write_read_only(path, marshal.dumps(code))
+
+        with self._lock:
+            self.misses += 1
+            self._paths[digest] = path
+            while len(self._paths) > self.max_entries:
+                _, old = self._paths.popitem(last=False)
+                for stale in (old, old[:-len(".code")] + ".py"):
+                    with contextlib.suppress(OSError):
+                        os.remove(stale)
+        return path
+
+    def prepare(self, harness: str) -> str:
+        """Compile `harness` ahead of its first run; returns it unchanged."""
+        self.code_path(harness)
+        return harness
+
+    def loader_source(self, harness: str) -> str:
+        """Lines appended to a submission to run the compiled `harness` in its namespace."""
+        return (
+            "import marshal as _scicode_marshal\n"
+            f"with open({self.code_path(harness)!r}, 'rb') as _scicode_harness:\n"
+            "    exec(_scicode_marshal.load(_scicode_harness))\n"
+        )
+
+    @contextlib.contextmanager
+    def work_dir(self) -> Iterator[str]:
+        """An empty directory for one run, returned to the free list afterwards."""
+        with self._lock:
+            path = self._free.pop() if self._free else None
+        if path is None:
+            path = tempfile.mkdtemp(prefix="run-", dir=self.root)
+        try:
+            yield path
+        finally:
+            if _empty_dir(path):
+                with self._lock:
+                    if len(self._free) < _MAX_FREE_DIRS:
+                        self._free.append(path)
+                        path = None
+            if path is not None:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def write_script(self, work_dir: str, code_str: str, harness: str) -> str:
+        """Write the submission followed by the harness loader; returns the script path."""
+        script = os.path.join(work_dir, SOLUTION_FILE)
+        with open(script, "w", encoding="utf-8") as f:
+            f.write(code_str)
+            f.write("\n\n")
+            f.write(self.loader_source(harness))
+        return script
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "root": self._root, "entries": len(self._paths), "hits": self.hits,
+                "misses": self.misses, "free_work_dirs": len(self._free),
+            }
+
+
+def _write_read_only(path: str, data: bytes) -> None:
+    """Atomically replace `path` with a read-only file holding `data`."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.chmod(tmp, 0o444)
+    os.replace(tmp, path)
+
+
+def _empty_dir(path: str) -> bool:
+    """Remove everything a run left in its work directory. Returns False if that failed."""
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.remove(entry.path)
+        return True
+    except OSError:
+        return False
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+harness_cache = HarnessCache(max_entries=_env_int("SCICODE_HARNESS_CACHE", 512))
@@ -1,17 +1,27 @@
 """Utility functions for A2A agent communication and tag parsing."""
 
-import re
+import os
+import time
+import uuid
 import httpx
 import asyncio
-from typing import Dict, Optional
-from a2a.types import SendMessageSuccessResponse, Message
-from a2a.utils import get_text_parts
+from typing import AsyncIterator, Dict, Optional
+from a2a.types import (
+    SendMessageSuccessResponse, SendMessageResponse, SendMessageRequest, SendStreamingMessageRequest,
+    SendStreamingMessageSuccessResponse, MessageSendParams, Message, Task, TaskStatusUpdateEvent,
+)
+from a2a.utils import get_data_parts, get_text_parts
+from .tag_parser import find_tags
 
 
 def parse_tags(text: str) -> Dict[str, str]:
     """
     Parse tags from text (e.g., <json>...</json>, <code>...</code>, etc.)
     
+    Tags nested inside another tag are part of its content; for repeated
+    tags the last occurrence wins. Use `src.tag_parser` for all occurrences,
+    offsets, code fences or streamed input.
+    
     Args:
         text: Text containing tagged content
         
@@ -19,45 +29,111 @@ def parse_tags(text: str) -> Dict[str, str]:
         Dictionary mapping tag names to their content
     """
     tags = {}
-    # Pattern to match <tag_name>content</tag_name>
-    pattern = r'<(\w+)>(.*?)</\1>'
-    
-    for match in re.finditer(pattern, text, re.DOTALL):
-        tag_name = match.group(1)
-        tag_content = match.group(2).strip()
-        tags[tag_name] = tag_content
+    outer_end = -1
+    for match in sorted(find_tags(text, fences=False), key=lambda m: m.start):
+        if match.start < outer_end:
+            continue
+        tags[match.name] = match.content
+        outer_end = match.end
     
     return tags
 
 
+def get_result_text(result) -> str:
+    """
+    Text of an A2A result: a Message, or the status message of a Task or
+    TaskStatusUpdateEvent (as returned by streaming agents).
+    """
+    if isinstance(result, (Task, TaskStatusUpdateEvent)):
+        result = result.status.message
+    if isinstance(result, Message):
+        return "\n".join(get_text_parts(result.parts))
+    return ""
+
+
+def get_result_data(result) -> Optional[dict]:
+    """
+    Structured results of an A2A result: the first data part of a Message, or
+    of the status message of a Task or TaskStatusUpdateEvent. None if absent.
+    """
+    if isinstance(result, (Task, TaskStatusUpdateEvent)):
+        result = result.status.message
+    if isinstance(result, Message):
+        data = get_data_parts(result.parts)
+        if data:
+            return data[0]
+    return None
+
+
 class A2AClient:
-    """Client for sending messages via A2A protocol using the official A2A SDK."""
+    """
+    Client for sending messages via A2A protocol using the official A2A SDK.
+
+    One SDK client is cached per agent URL, all sharing a single pooled
+    `httpx.AsyncClient`. Pool settings come from the environment:
+
+        A2A_HTTP2                 "1" to negotiate HTTP/2 (needs the `h2` package)
+        A2A_MAX_CONNECTIONS       Max open connections (default: 100)
+        A2A_MAX_KEEPALIVE         Max idle keep-alive connections (default: 20)
+        A2A_KEEPALIVE_EXPIRY      Idle connection lifetime in seconds (default: 30)
+        A2A_TIMEOUT               Request timeout in seconds (default: 300)
+    """
     
     def __init__(self):
         try:
             from a2a.client import A2AClient as OfficialA2AClient
             from a2a.utils import new_agent_text_message
-            from a2a.types import Message, TextPart, Role
             self._use_official = True
             self._OfficialA2AClient = OfficialA2AClient
             self._new_agent_text_message = new_agent_text_message
-            self._Message = Message
-            self._TextPart = TextPart
-            self._Role = Role
-            # Create httpx client for A2A client
-            self._httpx_client = httpx.AsyncClient(timeout=300.0)
         except ImportError as e:
             # Fallback to HTTP client if A2A SDK not available
             self._use_official = False
             self._import_error = e
-            self.client = httpx.AsyncClient(timeout=300.0)
+        self._httpx_client: Optional[httpx.AsyncClient] = None
+        self._loop = None
+        self._clients: Dict[str, object] = {}
+
+    @staticmethod
+    def _make_httpx_client() -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("A2A_MAX_CONNECTIONS", 100)),
+            max_keepalive_connections=int(os.getenv("A2A_MAX_KEEPALIVE", 20)),
+            keepalive_expiry=float(os.getenv("A2A_KEEPALIVE_EXPIRY", 30.0)),
+        )
+        http2 = os.getenv("A2A_HTTP2", "0").lower() in ("1", "true", "yes")
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("Warning: A2A_HTTP2 requested but the 'h2' package is not installed; using HTTP/1.1")
+                http2 = False
+        return httpx.AsyncClient(
+            timeout=float(os.getenv("A2A_TIMEOUT", 300.0)), limits=limits, http2=http2
+        )
+
+    def _client_for(self, agent_url: str):
+        """Return the cached SDK client for an agent URL."""
+        # Connection pools belong to an event loop; start fresh if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._httpx_client is None or self._loop is not loop:
+            self._httpx_client = self._make_httpx_client()
+            self._loop = loop
+            self._clients.clear()
+        
+        client = self._clients.get(agent_url)
+        if client is None:
+            client = self._clients[agent_url] = self._OfficialA2AClient(
+                httpx_client=self._httpx_client, url=agent_url
+            )
+        return client
     
     async def send_message(
         self, 
         agent_url: str, 
         message: str, 
         context_id: Optional[str] = None
-    ):
+    ) -> SendMessageResponse:
         """
         Send a message to another agent via A2A protocol.
         
@@ -67,86 +143,107 @@ class A2AClient:
             context_id: Optional context ID for the conversation
             
         Returns:
-            Object with .root attribute containing SendMessageSuccessResponse
+            The SDK's SendMessageResponse; its .root is a SendMessageSuccessResponse
+            (with the Message or Task as .result) or an error response
         """
-        if self._use_official:
-            # Use official A2A SDK client
-            from a2a.types import SendMessageRequest, MessageSendParams
-            
-            # Create client for this agent URL
-            client = self._OfficialA2AClient(httpx_client=self._httpx_client, url=agent_url)
-            
-            # Create message object using A2A utils
-            msg = self._new_agent_text_message(message, context_id=context_id)
-            
-            # Send message - client.send_message expects SendMessageRequest
-            import uuid
-            params = MessageSendParams(message=msg)
-            request = SendMessageRequest(id=str(uuid.uuid4()), params=params)
-            response = await client.send_message(request)
-            
-            # Wrap response to match expected interface
-            # The response is SendMessageResponse which has a result field
-            # We need to convert it to match SendMessageSuccessResponse format
-            from a2a.types import SendMessageSuccessResponse
-            
-            class ResponseWrapper:
-                def __init__(self, resp):
-                    # resp is SendMessageResponse with result field containing the Message
-                    # Convert to SendMessageSuccessResponse format
-                    resp_dict = resp.model_dump()
-                    if 'result' in resp_dict and resp_dict['result'] is not None:
-                        # resp.result is the Message, wrap it in SendMessageSuccessResponse
-                        from a2a.types import Message
-                        message = Message(**resp_dict['result'])
-                        self.root = SendMessageSuccessResponse(result=message)
-                    else:
-                        # Fallback: try to use response as-is
-                        self.root = resp
-            
-            return ResponseWrapper(response)
-        else:
+        if not self._use_official:
             # Fallback HTTP implementation (should not be used if A2A SDK available)
             raise ImportError(f"A2A SDK client not available: {self._import_error}. Please install a2a-sdk.")
+        
+        client = self._client_for(agent_url)
+        msg = self._new_agent_text_message(message, context_id=context_id)
+        request = SendMessageRequest(id=str(uuid.uuid4()), params=MessageSendParams(message=msg))
+        return await client.send_message(request)
+    
+    async def stream_message(
+        self,
+        agent_url: str,
+        message: str,
+        context_id: Optional[str] = None
+    ) -> AsyncIterator:
+        """
+        Send a message and yield the agent's events as they arrive (message/stream).
+        
+        Yields:
+            Task, TaskStatusUpdateEvent, TaskArtifactUpdateEvent or Message objects;
+            use `get_result_text` to read their text
+        """
+        if not self._use_official:
+            raise ImportError(f"A2A SDK client not available: {self._import_error}. Please install a2a-sdk.")
+        
+        client = self._client_for(agent_url)
+        msg = self._new_agent_text_message(message, context_id=context_id)
+        request = SendStreamingMessageRequest(id=str(uuid.uuid4()), params=MessageSendParams(message=msg))
+        async for response in client.send_message_streaming(request):
+            if isinstance(response.root, SendStreamingMessageSuccessResponse):
+                yield response.root.result
+            else:
+                raise RuntimeError(f"A2A streaming error: {response.root.error}")
     
     async def close(self):
         """Close the HTTP client."""
-        if self._use_official and hasattr(self, '_httpx_client'):
+        if self._httpx_client is not None:
             await self._httpx_client.aclose()
-        elif not self._use_official and hasattr(self, 'client'):
-            await self.client.aclose()
+            self._httpx_client = None
+            self._clients.clear()
 
 
-async def wait_agent_ready(agent_url: str, timeout: int = 30, check_interval: float = 0.5) -> bool:
+async def wait_agent_ready(agent_url: str, timeout: float = 30, check_interval: float = 0.5,
+                           client: Optional[httpx.AsyncClient] = None) -> bool:
     """
     Wait for an agent to become ready by checking its status endpoint.
     
+    Polls with exponential backoff, from 50 ms up to `check_interval`, so an
+    agent that comes up quickly is noticed quickly.
+    
     Args:
         agent_url: URL of the agent to check
-        timeout: Maximum time to wait in seconds
-        check_interval: Time between checks in seconds
+        timeout: Maximum time to wait in seconds (0 checks once)
+        check_interval: Longest time between checks in seconds
+        client: HTTP client to poll with (default: a client for this call)
         
     Returns:
         True if agent is ready, False if timeout
     """
-    import time
-    import httpx
+    if client is None:
+        async with httpx.AsyncClient(timeout=5.0) as own_client:
+            return await wait_agent_ready(agent_url, timeout, check_interval, own_client)
     
-    start_time = time.time()
+    deadline = time.monotonic() + timeout
     check_url = agent_url.rstrip("/") + "/status"
+    delay = min(0.05, check_interval)
     
-    while time.time() - start_time < timeout:
+    while True:
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(check_url)
-                if response.status_code == 200:
-                    return True
-        except Exception:
+            response = await client.get(check_url)
+            if response.status_code == 200:
+                return True
+        except httpx.HTTPError:
             pass
         
-        await asyncio.sleep(check_interval)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, check_interval)
+
+
+async def wait_agents_ready(agent_urls, timeout: float = 30, check_interval: float = 0.5) -> Dict[str, Optional[float]]:
+    """
+    Wait for several agents in parallel, polling over one shared HTTP client.
     
-    return False
+    Returns:
+        Seconds until each agent was ready, by URL (None if it timed out)
+    """
+    started = time.monotonic()
+    
+    async with httpx.AsyncClient(timeout=5.0) as client:
+        async def wait(url):
+            ready = await wait_agent_ready(url, timeout, check_interval, client)
+            return time.monotonic() - started if ready else None
+        
+        elapsed = await asyncio.gather(*(wait(url) for url in agent_urls))
+    return dict(zip(agent_urls, elapsed))
 
 
 # Global instance
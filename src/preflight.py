@@ -0,0 +1,107 @@
+"""In-process pre-flight check of submissions before they reach the sandbox.
+
+Compiling a candidate takes milliseconds, while a sandbox run that fails on
+a syntax error still pays for a process and the scientific-stack imports. A
+submission fails pre-flight if it does not compile (syntax, indentation or
+scoping errors) or does not define the function (or class) named in the
+step's `function_header`. The failure carries the line and column so the
+repair message can point at it.
+"""
+
+import re
+import ast
+from typing import Optional
+
+_HEADER_NAME = re.compile(r"^\s*(?:async\s+)?(?:def|class)\s+([A-Za-z_]\w*)", re.MULTILINE)
+
+
+def expected_name(function_header: Optional[str]) -> Optional[str]:
+    """Name of the function or class declared by a step's function header."""
+    match = _HEADER_NAME.search(function_header or "")
+    return match.group(1) if match else None
+
+
+def _top_level_names(statements) -> set:
+    """Names bound at module level: definitions, assignments and imports."""
+    names = set()
+    for node in statements:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                names.update(n.id for n in ast.walk(target) if isinstance(n, ast.Name))
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+        elif isinstance(node, (ast.If, ast.Try, ast.ExceptHandler, ast.With)):
+            # Conditional definitions (e.g. try/except ImportError fallbacks)
+            names.update(_top_level_names(ast.iter_child_nodes(node)))
+    return names
+
+
+def preflight_check(code: str, function_header: Optional[str] = None, filename: str = "solution.py") -> Optional[dict]:
+    """
+    Compile a submission and check that it defines the expected function.
+
+    Args:
+        code: Submitted code
+        function_header: Header of the step's function (e.g. "def f(x):")
+        filename: File name reported in errors (the sandbox's file name)
+
+    Returns:
+        None if the submission passes, else a failure dict with kind
+        ("syntax" or "missing_function"), error, message, lineno, col and text
+    """
+    try:
+        tree = ast.parse(code, filename=filename)
+        compile(tree, filename, "exec", dont_inherit=True)
+    except (SyntaxError, ValueError) as e:
+        return {
+            "kind": "syntax",
+            "error": type(e).__name__,
+            "message": getattr(e, "msg", None) or str(e),
+            "lineno": getattr(e, "lineno", None),
+            "col": getattr(e, "offset", None),
+            "text": (getattr(e, "text", None) or "").rstrip("\n"),
+        }
+    except (RecursionError, MemoryError):
+        return None  # too deeply nested to check here; the sandbox will tell
+
+    name = expected_name(function_header)
+    if name and name not in _top_level_names(tree.body):
+        return {
+            "kind": "missing_function",
+            "error": "NameError",
+            "message": f"the submission does not define {name!r} (expected from the header {function_header.strip().splitlines()[0]!r})",
+            "lineno": None,
+            "col": None,
+            "text": "",
+        }
+    return None
+
+
+def format_failure(failure: dict, filename: str = "solution.py") -> str:
+    """Render a pre-flight failure like the interpreter would report it."""
+    if failure["lineno"] is None:
+        return f"{failure['error']}: {failure['message']}"
+    lines = [f'  File "{filename}", line {failure["lineno"]}']
+    if failure["text"]:
+        lines.append(f"    {failure['text'].strip()}")
+        if failure["col"]:
+            indent = len(failure["text"]) - len(failure["text"].lstrip())
+            lines.append("    " + " " * max(0, failure["col"] - 1 - indent) + "^")
+    lines.append(f"{failure['error']}: {failure['message']} (line {failure['lineno']}, column {failure['col']})")
+    return "\n".join(lines)
+
+
+def failure_info(failure: dict, num_tests: int) -> dict:
+    """Test result info for a submission that failed pre-flight (no test ran)."""
+    return {
+        "returncode": 1,
+        "stdout": "",
+        "stderr": format_failure(failure),
+        "passed": False,
+        "preflight": failure,
+        "num_tests": num_tests,
+        "tests_passed": 0,
+    }
@@ -0,0 +1,170 @@
+"""Process-wide, indexed store of SciCode problems.
+
+A split is normally a HuggingFace dataset split ("validation", "test"). A
+path to a local .json/.jsonl file of problems in the same format is accepted
+as well, which allows offline runs and benchmarks.
+
+Async callers use `load_split_async`, which reads a split that is not
+loaded yet on a worker thread. A split that failed to load is not retried
+for SCICODE_PROBLEM_RETRY_SECONDS (default: 300); lookups re-raise the
+remembered error meanwhile.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Iterable
+
+
+# Local SciCode checkout (same layout the green agent has always used)
+SCICODE_SRC = Path(__file__).resolve().parent.parent / "SciCode" / "src"
+
+
+class _SplitIndex:
+    """Problems of a single split, indexed by problem_id and by position."""
+
+    def __init__(self, problems: List[dict], load_seconds: float):
+        self.problems = problems
+        self.by_id = {str(p.get("problem_id")): p for p in problems}
+        self.load_seconds = load_seconds
+
+
+class ProblemStore:
+    """
+    Loads each SciCode split once and serves problems from in-memory tables.
+
+    The dataset is only read the first time a split is requested (or when
+    `preload` is called at server startup); every later lookup is a dict or
+    list access with no dataset I/O.
+    """
+
+    def __init__(self, scicode_src: Optional[Path] = None):
+        self._scicode_src = Path(scicode_src) if scicode_src else SCICODE_SRC
+        self._splits: Dict[str, _SplitIndex] = {}
+        # split -> (error, time.monotonic() of the failed load)
+        self._failures: Dict[str, tuple] = {}
+        self._retry_seconds = float(os.getenv("SCICODE_PROBLEM_RETRY_SECONDS", 300))
+        self._lock = threading.Lock()
+        self._lookups = 0
+        self._lookup_seconds = 0.0
+
+    def _read_split(self, split: str) -> List[dict]:
+        """Read a split from a local problems file, or from the HuggingFace dataset via the SciCode loader."""
+        if split.endswith((".json", ".jsonl")) and os.path.isfile(split):
+            with open(split, "r", encoding="utf-8") as f:
+                if split.endswith(".jsonl"):
+                    return [json.loads(line) for line in f if line.strip()]
+                return list(json.load(f))
+
+        src = str(self._scicode_src)
+        if src not in sys.path:
+            sys.path.insert(0, src)
+        from scicode.parse.parse import read_from_hf_dataset
+
+        return list(read_from_hf_dataset(split))
+
+    def load_split(self, split: str) -> _SplitIndex:
+        """
+        Return the index for a split, loading it on first use.
+
+        Args:
+            split: Dataset split name (validation/test)
+
+        Returns:
+            The split index
+
+        Raises:
+            Exception: The error of a failed load, remembered for a while (see module docstring)
+        """
+        index = self._splits.get(split)
+        if index is not None:
+            return index
+
+        with self._lock:
+            index = self._splits.get(split)
+            if index is None:
+                failure = self._failures.get(split)
+                if failure is not None and time.monotonic() - failure[1] < self._retry_seconds:
+                    raise failure[0]
+                start = time.perf_counter()
+                try:
+                    problems = self._read_split(split)
+                except Exception as e:
+                    self._failures[split] = (e, time.monotonic())
+                    raise
+                self._failures.pop(split, None)
+                index = _SplitIndex(problems, time.perf_counter() - start)
+                self._splits[split] = index
+                print(
+                    f"Problem store: loaded {len(problems)} problems from "
+                    f"'{split}' in {index.load_seconds:.3f}s"
+                )
+        return index
+
+    async def load_split_async(self, split: str) -> _SplitIndex:
+        """`load_split` that does not block the event loop while a split is read."""
+        index = self._splits.get(split)
+        if index is not None:
+            return index
+        return await asyncio.to_thread(self.load_split, split)
+
+    def preload(self, splits: Iterable[str]) -> None:
+        """Load the given splits eagerly, logging (not raising) failures."""
+        for split in splits:
+            try:
+                self.load_split(split)
+            except Exception as e:
+                print(f"Warning: Failed to preload SciCode split '{split}': {e}")
+
+    def get(self, problem_id: str, split: str = "validation") -> dict:
+        """
+        Look up a problem by problem_id, falling back to its index in the split.
+
+        Raises:
+            ValueError: If the problem is not in the split
+        """
+        index = self.load_split(split)
+        start = time.perf_counter()
+        try:
+            problem = index.by_id.get(str(problem_id))
+            if problem is not None:
+                return problem
+
+            try:
+                idx = int(problem_id)
+                if 0 <= idx < len(index.problems):
+                    return index.problems[idx]
+            except ValueError:
+                pass
+
+            raise ValueError(f"Problem {problem_id} not found in {split} split")
+        finally:
+            self._lookups += 1
+            self._lookup_seconds += time.perf_counter() - start
+
+    def problem_ids(self, split: str = "validation") -> List[str]:
+        """Return the problem ids of a split, in dataset order."""
+        return [str(p.get("problem_id")) for p in self.load_split(split).problems]
+
+    def stats(self) -> dict:
+        """Load and lookup timings, for /status and evaluation metrics."""
+        return {
+            "splits": {
+                name: {
+                    "problems": len(index.problems),
+                    "load_seconds": index.load_seconds,
+                }
+                for name, index in self._splits.items()
+            },
+            "lookups": self._lookups,
+            "lookup_seconds_total": self._lookup_seconds,
+            "lookup_seconds_avg": self._lookup_seconds / self._lookups if self._lookups else 0.0,
+        }
+
+
+# Global instance
+problem_store = ProblemStore()
@@ -0,0 +1,34 @@
+"""Evaluation progress events published as A2A task status updates."""
+
+from typing import Optional
+
+from a2a.server.tasks import TaskUpdater
+from a2a.types import Part, TaskState, TextPart
+
+
+class ProgressReporter:
+    """
+    Emits `working` status updates with a short text and machine-readable metadata.
+
+    Every event carries {"event": <name>, ...fields} in the status update
+    metadata, so orchestrators can follow an evaluation without parsing text.
+    A reporter without an updater is a no-op.
+    """
+
+    def __init__(self, updater: Optional[TaskUpdater] = None, **fields):
+        self._updater = updater
+        self._fields = fields
+
+    def bind(self, **fields) -> "ProgressReporter":
+        """Return a reporter that adds `fields` (e.g. problem_id) to every event."""
+        return ProgressReporter(self._updater, **{**self._fields, **fields})
+
+    async def emit(self, event: str, text: str, **data) -> None:
+        if self._updater is None:
+            return
+        metadata = {"event": event, **self._fields, **data}
+        await self._updater.update_status(
+            TaskState.working,
+            message=self._updater.new_agent_message([Part(root=TextPart(text=text))], metadata=metadata),
+            metadata=metadata,
+        )
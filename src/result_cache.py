@@ -0,0 +1,184 @@
+"""Persistent, content-addressed cache of sandbox test results.
+
+Submissions are keyed on a hash of the normalized code, the step id, the
+harness (which pins the test cases), the target data version, the timeout
+and the sandbox resource limits (which decide memory and CPU failures), so
+resubmitting identical code - within a conversation, across problems or across
+reruns - returns the stored `(passed, info)` without spawning a sandbox.
+
+The evaluator uses `get_async` / `put_async`, which run the SQLite I/O off
+the event loop. The total size is tracked as entries are stored and
+evicted; it is re-read from the table every few hundred stores and before
+evicting, to account for other processes sharing the cache file.
+
+Configuration (environment variables):
+    SCICODE_RESULT_CACHE          "0" disables the cache (default: enabled)
+    SCICODE_RESULT_CACHE_PATH     SQLite file (default: ~/.cache/scicode_agentbeats/results.sqlite)
+    SCICODE_RESULT_CACHE_MAX_MB   Size bound; least recently used entries are evicted (default: 256)
+    SCICODE_RESULT_CACHE_EXCLUDE  Comma-separated problem or step ids that are never cached
+                                  (for nondeterministic problems)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "scicode_agentbeats" / "results.sqlite"
+
+# The running size total is re-read from the table every this many stores
+_RESYNC_EVERY = 200
+
+
+def normalize_code(code: str) -> str:
+    """Normalize line endings, trailing whitespace and surrounding blank lines."""
+    lines = [line.rstrip() for line in code.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    return "\n".join(lines).strip("\n")
+
+
+def result_key(code: str, step_id: str, harness: str, target_version: str, timeout: int, limits: Optional[dict] = None) -> str:
+    """Content hash identifying one test run."""
+    h = hashlib.sha256()
+    limits = json.dumps(limits or {}, sort_keys=True)
+    for part in (normalize_code(code), str(step_id), harness, target_version, str(timeout), limits):
+        data = part.encode("utf-8", errors="surrogatepass")
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """SQLite-backed LRU cache of (passed, info) results, bounded by total bytes."""
+
+    def __init__(self, path: Optional[Path] = None, max_bytes: int = 256 * 1024 * 1024, exclude=()):
+        self.path = Path(path or DEFAULT_CACHE_PATH)
+        self.max_bytes = max_bytes
+        self.exclude = {str(e).strip() for e in exclude if str(e).strip()}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _conn(self) -> sqlite3.Connection:
+        """Open the database on first use (call with the lock held)."""
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, passed INTEGER NOT NULL, info TEXT NOT NULL,"
+                " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results(last_used)")
+            self._db = db
+            self._resync()
+        return self._db
+
+    def _resync(self) -> None:
+        """Re-read the total size from the table (call with the lock held)."""
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def is_excluded(self, step_id: str) -> bool:
+        """True if the step, or the problem it belongs to, opted out of caching."""
+        step_id = str(step_id)
+        return step_id in self.exclude or step_id.split(".")[0] in self.exclude
+
+    def get(self, key: str) -> Optional[Tuple[bool, dict]]:
+        """Return the stored (passed, info) for a key, or None on a miss."""
+        try:
+            with self._lock:
+                row = self._conn().execute("SELECT passed, info FROM results WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                self._db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+                self.hits += 1
+        except sqlite3.Error as e:
+            print(f"Warning: Result cache lookup failed: {e}")
+            return None
+        return bool(row[0]), json.loads(row[1])
+
+    def put(self, key: str, passed: bool, info: dict) -> None:
+        """Store a result, evicting least recently used entries over the size bound."""
+        data = json.dumps(info)
+        try:
+            with self._lock:
+                db = self._conn()
+                replaced = db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+                db.execute(
+                    "INSERT OR REPLACE INTO results (key, passed, info, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (key, int(passed), data, len(data), time.time()),
+                )
+                self._bytes += len(data) - (replaced[0] if replaced else 0)
+                self._puts += 1
+                if self._puts % _RESYNC_EVERY == 0 or self._bytes > self.max_bytes:
+                    self._resync()
+                if self._bytes > self.max_bytes:
+                    self._evict()
+        except sqlite3.Error as e:
+            print(f"Warning: Result cache store failed: {e}")
+
+    async def get_async(self, key: str) -> Optional[Tuple[bool, dict]]:
+        """`get` without blocking the event loop."""
+        return await asyncio.to_thread(self.get, key)
+
+    async def put_async(self, key: str, passed: bool, info: dict) -> None:
+        """`put` without blocking the event loop."""
+        await asyncio.to_thread(self.put, key, passed, info)
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until we are under 90% of the bound (call with the lock held)."""
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        doomed = []
+        for key, size in self._db.execute("SELECT key, size FROM results ORDER BY last_used"):
+            if self._bytes - freed <= target:
+                break
+            doomed.append((key,))
+            freed += size
+        self._db.executemany("DELETE FROM results WHERE key = ?", doomed)
+        self._bytes -= freed
+        self.evictions += len(doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+def _make_default_cache() -> Optional[ResultCache]:
+    if os.getenv("SCICODE_RESULT_CACHE", "1").lower() in ("0", "false", "off", "no"):
+        return None
+    try:
+        max_mb = float(os.getenv("SCICODE_RESULT_CACHE_MAX_MB", 256))
+        return ResultCache(
+            path=os.getenv("SCICODE_RESULT_CACHE_PATH") or None,
+            max_bytes=int(max_mb * 1024 * 1024),
+            exclude=os.getenv("SCICODE_RESULT_CACHE_EXCLUDE", "").split(","),
+        )
+    except ValueError as e:
+        print(f"Warning: Result cache disabled: {e}")
+        return None
+
+
+# Global instance (None when disabled)
+result_cache = _make_default_cache()
@@ -0,0 +1,658 @@
+"""Sandboxed execution of generated test harnesses.
+
+Harness scripts are run either in a fresh interpreter (the cold path) or by a
+pool of warm worker processes that have already imported the scientific stack
+and fork a clean child per submission (see `sandbox_worker.py`).
+
+Configuration (environment variables):
+    SCICODE_SANDBOX_MODE       "pool" (default) or "cold"
+    SCICODE_SANDBOX_POOL_SIZE  Number of warm workers (default: min(4, CPU count))
+    SCICODE_SANDBOX_MAX_RUNS   Recycle a worker after this many runs (default: 100)
+    SCICODE_SANDBOX_PRELOAD    Comma-separated modules workers import up front
+    SCICODE_SANDBOX_CONCURRENCY  Max concurrent sandbox runs (default: the pool size, or the CPU count
+                                 on the cold path)
+
+Every run is subject to the CPU-time, address-space, file-size and process
+limits and the BLAS thread pinning configured in `sandbox_limits.py`; its CPU
+time and peak RSS are returned as info["usage"].
+
+Harnesses report one JSON record per test case through a dedicated pipe whose
+write end is passed in $SCICODE_RESULTS_FD (see `TEST_RECORDER_SOURCE`); the
+parsed records are returned as info["tests"] (empty if the run wrote none).
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import signal
+import select
+import asyncio
+import threading
+import contextlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from .metrics import Counter, Histogram
+from .sandbox_limits import cgroup_create, cgroup_remove, cgroup_usage, limits_from_env, thread_env
+
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+DEFAULT_PRELOAD = ["numpy", "scipy", "h5py", "scicode.parse.parse"]
+
+# Extra time allowed for the worker round trip on top of the run timeout
+_WORKER_GRACE = 5.0
+
+RESULTS_FD_ENV = "SCICODE_RESULTS_FD"
+
+SANDBOX_SPAWN = Histogram("scicode_sandbox_spawn_seconds", "Time to start a sandboxed run (fork or interpreter spawn)", ["mode"])
+SANDBOX_RUN = Histogram("scicode_sandbox_run_seconds", "Wall-clock time of sandboxed runs, spawn to result", ["mode"])
+SANDBOX_TIMEOUTS = Counter("scicode_sandbox_timeouts_total", "Sandboxed runs killed at their timeout")
+SANDBOX_POOL_FALLBACKS = Counter("scicode_sandbox_pool_fallbacks_total", "Runs the worker pool could not serve (run cold instead)")
+TEST_CASE_RUNTIME = Histogram("scicode_test_case_seconds", "Runtime of single test cases, as reported by the harness")
+SANDBOX_CPU = Histogram("scicode_sandbox_cpu_seconds", "CPU time used by sandboxed runs")
+SANDBOX_LIMIT_KILLS = Counter("scicode_sandbox_limit_kills_total", "Sandboxed runs killed by a resource limit", ["limit"])
+
+# Signals of runs killed by an rlimit
+_LIMIT_SIGNALS = {-signal.SIGXCPU: "cpu", -signal.SIGXFSZ: "file_size"}
+
+# Prepended to the test part of harnesses; records survive a failing test or a crash
+TEST_RECORDER_SOURCE = f'''
+import os as _scicode_os, sys as _scicode_sys, time as _scicode_time, json as _scicode_json
+try:
+    import resource as _scicode_resource
+except ImportError:
+    _scicode_resource = None
+_scicode_fd = _scicode_os.environ.pop("{RESULTS_FD_ENV}", None)
+_scicode_results = _scicode_os.fdopen(int(_scicode_fd), "w", buffering=1) if _scicode_fd else None
+_scicode_failed = 0
+
+def _scicode_record(test, started, error=None):
+    global _scicode_failed
+    duration = _scicode_time.perf_counter() - started
+    if error is None:
+        print(f"Test {{test}} passed")
+    else:
+        _scicode_failed += 1
+        print(f"Test {{test}} failed: {{type(error).__name__}}: {{error}}", file=_scicode_sys.stderr)
+    if _scicode_results is not None:
+        record = {{
+            "test": test,
+            "passed": error is None,
+            "error": type(error).__name__ if error is not None else None,
+            "message": str(error)[:300] if error is not None else None,
+            "duration": round(duration, 6),
+            "peak_rss_kb": _scicode_resource.getrusage(_scicode_resource.RUSAGE_SELF).ru_maxrss if _scicode_resource else None,
+        }}
+        _scicode_results.write(_scicode_json.dumps(record) + "\\n")
+
+def _scicode_report_usage():
+    # Cold runs only; warm workers measure their children themselves
+    if _scicode_results is None or _scicode_resource is None:
+        return
+    own = _scicode_resource.getrusage(_scicode_resource.RUSAGE_SELF)
+    children = _scicode_resource.getrusage(_scicode_resource.RUSAGE_CHILDREN)
+    usage = {{
+        "cpu_seconds": round(own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime, 4),
+        "peak_rss_kb": max(own.ru_maxrss, children.ru_maxrss),
+    }}
+    _scicode_results.write(_scicode_json.dumps({{"usage": usage}}) + "\\n")
+
+import atexit as _scicode_atexit
+_scicode_atexit.register(_scicode_report_usage)
+'''
+
+
+def _parse_test_records(raw: str) -> List[dict]:
+    """Parse the JSON-lines test records written by TEST_RECORDER_SOURCE."""
+    records = []
+    for line in raw.splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            records.append(record)
+    return records
+
+
+def _result_to_info(result: dict, timeout: int) -> Tuple[bool, dict]:
+    """
+    Convert a raw run result into the (passed, info) contract of run_tests_against_code.
+
+    A timed-out run keeps the records of the tests that finished before the timeout.
+    """
+    if result.get("timeout"):
+        info = {
+            "returncode": -1,
+            "stdout": "",
+            "stderr": f"Test execution timed out after {timeout} seconds",
+            "passed": False,
+            "timeout": True
+        }
+        usage = result.get("usage")
+        if "results" in result:
+            records = _parse_test_records(result["results"])
+            info["tests"] = [r for r in records if "usage" not in r]
+            usage = usage or next((r["usage"] for r in records if "usage" in r), None)
+        if usage:
+            info["usage"] = usage
+        return False, info
+    passed = result["returncode"] == 0
+    info = {
+        "returncode": result["returncode"],
+        "stdout": result["stdout"],
+        "stderr": result["stderr"],
+        "passed": passed
+    }
+    usage = result.get("usage")
+    if "results" in result:
+        records = _parse_test_records(result["results"])
+        info["tests"] = [r for r in records if "usage" not in r]
+        usage = usage or next((r["usage"] for r in records if "usage" in r), None)
+    if usage:
+        info["usage"] = usage
+    if result.get("error"):
+        info["error"] = result["error"]
+    limit = _LIMIT_SIGNALS.get(result["returncode"])
+    if limit:
+        info["limit_exceeded"] = limit
+        info["stderr"] += f"\nKilled: {limit.replace('_', ' ')} limit exceeded\n"
+    return passed, info
+
+
+# Started by cold runs in place of the script: enters the run's cgroup, applies the rlimits and
+# execs the script in the same process (so its session and cgroup carry over). A preexec_fn
+# would run Python code between fork and exec, which can deadlock in a multithreaded server.
+_COLD_LAUNCHER = (
+    "import os, sys, json\n"
+    "sys.path.insert(0, sys.argv[1])\n"
+    "from sandbox_limits import apply_limits, cgroup_enter\n"
+    "cgroup_enter(sys.argv[3] or None)\n"
+    "apply_limits(json.loads(sys.argv[2]))\n"
+    "os.execv(sys.executable, [sys.executable, sys.argv[4]])\n"
+)
+
+
+def _cold_command(script: str, limits: dict, cgroup: Optional[str]) -> List[str]:
+    """Command line of a cold run of `script` under `limits`."""
+    return [
+        sys.executable, "-S", "-c", _COLD_LAUNCHER,
+        os.path.dirname(WORKER_SCRIPT), json.dumps(limits), cgroup or "", script,
+    ]
+
+
+def _cold_env(limits: dict, results_w: int) -> dict:
+    return {**os.environ, **thread_env(limits), RESULTS_FD_ENV: str(results_w)}
+
+
+def run_script_cold(script: str, cwd: str, timeout: int = 30, limits: Optional[dict] = None) -> Tuple[bool, dict]:
+    """Run a harness script in a fresh interpreter."""
+    limits = resource_limits if limits is None else limits
+    results_r, results_w = os.pipe()
+    chunks = []
+    cgroup = cgroup_create(limits)
+
+    def drain():
+        # Chunk by chunk, so records written before a timeout are kept
+        with os.fdopen(results_r, "rb", 0) as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                chunks.append(chunk)
+
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    try:
+        result = subprocess.run(
+            _cold_command(script, limits, cgroup),
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            cwd=cwd,
+            env=_cold_env(limits, results_w),
+            pass_fds=(results_w,),
+        )
+        os.close(results_w)
+        results_w = None
+        reader.join(timeout=1.0)
+        return _result_to_info(
+            {
+                "returncode": result.returncode,
+                "stdout": result.stdout,
+                "stderr": result.stderr,
+                "results": b"".join(chunks).decode("utf-8", errors="replace"),
+                "usage": cgroup_usage(cgroup),
+            },
+            timeout,
+        )
+    except subprocess.TimeoutExpired:
+        os.close(results_w)
+        results_w = None
+        reader.join(timeout=1.0)
+        return _result_to_info(
+            {"timeout": True, "results": b"".join(chunks).decode("utf-8", errors="replace")}, timeout
+        )
+    except Exception as e:
+        return False, {
+            "returncode": -1,
+            "stdout": "",
+            "stderr": f"Error running tests: {str(e)}",
+            "passed": False,
+            "error": str(e)
+        }
+    finally:
+        if results_w is not None:
+            os.close(results_w)
+        cgroup_remove(cgroup)
+
+
+async def _read_pipe(fd: int) -> bytes:
+    """Read a pipe to EOF on the event loop (takes ownership of `fd`)."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(fd, "rb", 0)
+    )
+    try:
+        return await reader.read()
+    finally:
+        transport.close()
+
+
+async def run_script_cold_async(script: str, cwd: str, timeout: int = 30, limits: Optional[dict] = None) -> Tuple[bool, dict]:
+    """Run a harness script in a fresh interpreter without blocking the event loop."""
+    limits = resource_limits if limits is None else limits
+    results_r, results_w = os.pipe()
+    cgroup = cgroup_create(limits)
+    spawn_started = time.perf_counter()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *_cold_command(script, limits, cgroup),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+            env=_cold_env(limits, results_w),
+            pass_fds=(results_w,),
+            start_new_session=True,
+        )
+    except Exception as e:
+        os.close(results_r)
+        cgroup_remove(cgroup)
+        return False, {
+            "returncode": -1,
+            "stdout": "",
+            "stderr": f"Error running tests: {str(e)}",
+            "passed": False,
+            "error": str(e)
+        }
+    finally:
+        os.close(results_w)
+    SANDBOX_SPAWN.observe(time.perf_counter() - spawn_started, mode="cold")
+
+    results_task = asyncio.ensure_future(_read_pipe(results_r))
+    run_task = asyncio.ensure_future(proc.communicate())
+    try:
+        # asyncio.wait (unlike wait_for) leaves the reads running at the timeout
+        done, _ = await asyncio.wait((run_task, results_task), timeout=timeout)
+        timed_out = len(done) < 2
+    except asyncio.CancelledError:
+        timed_out = None
+    if timed_out is not False:
+        # Kill the whole session so children spawned by the submission die too
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await proc.wait()
+        usage = cgroup_usage(cgroup)
+        cgroup_remove(cgroup)
+        if timed_out is None:
+            run_task.cancel()
+            results_task.cancel()
+            raise asyncio.CancelledError()
+        run_task.cancel()
+        # The session is dead, so the results pipe reaches EOF with the records written so far
+        try:
+            results = await asyncio.wait_for(results_task, timeout=1.0)
+        except (asyncio.TimeoutError, OSError):
+            results = b""
+        return _result_to_info(
+            {"timeout": True, "usage": usage, "results": results.decode("utf-8", errors="replace")}, timeout
+        )
+
+    stdout, stderr = run_task.result()
+    results = results_task.result()
+    usage = cgroup_usage(cgroup)
+    cgroup_remove(cgroup)
+    return _result_to_info(
+        {
+            "returncode": proc.returncode,
+            "stdout": stdout.decode("utf-8", errors="replace"),
+            "stderr": stderr.decode("utf-8", errors="replace"),
+            "results": results.decode("utf-8", errors="replace"),
+            "usage": usage,
+        },
+        timeout,
+    )
+
+
+class _RunHandle:
+    """Lets the caller of a pool run kill its forked child (a process group) when it stops waiting."""
+
+    def __init__(self):
+        self.cancelled = False
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _kill(self) -> None:
+        try:
+            os.killpg(self._pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def started(self, pid: int) -> None:
+        with self._lock:
+            self._pid = pid
+            if self.cancelled:
+                self._kill()
+
+    def finished(self) -> None:
+        with self._lock:
+            self._pid = None
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self._pid is not None:
+                self._kill()
+
+
+class _Worker:
+    """A warm worker process speaking the JSON-lines protocol of sandbox_worker.py."""
+
+    def __init__(self, preload: List[str], start_timeout: float, threads_env: Optional[dict] = None):
+        # Thread pool sizes must be set before the worker imports numpy
+        self.proc = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT, *preload],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env={**os.environ, **(threads_env or {})},
+        )
+        self.runs = 0
+        self._buf = b""
+        ready = self._readline(time.monotonic() + start_timeout)
+        if ready is None or not ready.get("ready"):
+            self.kill()
+            raise RuntimeError("Sandbox worker failed to start")
+        self.preloaded = ready.get("preloaded", [])
+
+    def _readline(self, deadline: float) -> Optional[dict]:
+        fd = self.proc.stdout.fileno()
+        while b"\n" not in self._buf:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                return None
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                return None
+            self._buf += chunk
+        line, self._buf = self._buf.split(b"\n", 1)
+        return json.loads(line)
+
+    def run(self, script: str, cwd: str, timeout: int, limits: Optional[dict] = None, handle: Optional[_RunHandle] = None) -> Optional[dict]:
+        request = {"script": script, "cwd": cwd, "timeout": timeout, "limits": limits or {}}
+        self.proc.stdin.write((json.dumps(request) + "\n").encode())
+        self.proc.stdin.flush()
+        self.runs += 1
+        deadline = time.monotonic() + timeout + _WORKER_GRACE
+        try:
+            message = self._readline(deadline)
+            if message is not None and "started" in message:
+                if handle is not None:
+                    handle.started(message["started"])
+                message = self._readline(deadline)
+            return message
+        finally:
+            if handle is not None:
+                handle.finished()
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def kill(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+
+
+class SandboxPool:
+    """
+    Pool of warm sandbox workers.
+
+    Workers are started lazily (or via `start()` at server startup), recycled
+    after `max_runs` submissions and replaced in the background. Any worker
+    failure makes `run` return None so the caller can fall back to the cold path.
+    Workers are started with the BLAS thread pinning of `limits` (default:
+    the environment's), which also applies to every run.
+    """
+
+    def __init__(self, size: int, max_runs: int = 100, preload: Optional[List[str]] = None, start_timeout: float = 120.0, limits: Optional[dict] = None):
+        self.size = size
+        self.max_runs = max_runs
+        self.preload = list(DEFAULT_PRELOAD if preload is None else preload)
+        self.start_timeout = start_timeout
+        self.limits = limits_from_env() if limits is None else limits
+        # Each slot holds a warm _Worker or None (not started yet / being replaced)
+        self._slots: "queue.Queue[Optional[_Worker]]" = queue.Queue()
+        for _ in range(size):
+            self._slots.put(None)
+        # Round trips block a thread while waiting for a worker; keep them off the default executor
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="sandbox-pool")
+        self._closed = False
+
+    def _spawn(self) -> Optional[_Worker]:
+        try:
+            return _Worker(self.preload, self.start_timeout, thread_env(self.limits))
+        except Exception as e:
+            print(f"Warning: Failed to start sandbox worker: {e}")
+            return None
+
+    def _replace_in_background(self) -> None:
+        def refill():
+            self._slots.put(None if self._closed else self._spawn())
+        threading.Thread(target=refill, daemon=True).start()
+
+    def start(self) -> None:
+        """Start all workers now instead of on first use."""
+        slots = [self._slots.get() for _ in range(self.size)]
+        for i, worker in enumerate(slots):
+            if worker is None:
+                slots[i] = self._spawn()
+        for worker in slots:
+            self._slots.put(worker)
+
+    def run(self, script: str, cwd: str, timeout: int = 30, limits: Optional[dict] = None, handle: Optional[_RunHandle] = None) -> Optional[dict]:
+        """
+        Run a harness script in a forked child of a warm worker.
+
+        Args:
+            limits: Resource limits of the run (default: the pool's)
+            handle: Receives the child's pid, so the run can be killed from another thread
+
+        Returns:
+            Raw result dict (returncode, stdout, stderr, timeout, usage), or
+            None if the pool could not serve the request (including runs the
+            worker failed to start, e.g. a failed fork)
+        """
+        if handle is not None and handle.cancelled:
+            return None
+        worker = self._slots.get()
+        if worker is None or not worker.alive():
+            worker = self._spawn()
+            if worker is None:
+                self._slots.put(None)
+                return None
+
+        try:
+            result = worker.run(script, cwd, timeout, self.limits if limits is None else limits, handle)
+        except Exception:
+            result = None
+
+        if result is not None and "spawn" in result:
+            SANDBOX_SPAWN.observe(result["spawn"], mode="pool")
+        if result is None or not worker.alive() or worker.runs >= self.max_runs:
+            worker.kill()
+            self._replace_in_background()
+        else:
+            self._slots.put(worker)
+        if result is not None and result.get("error"):
+            # A worker-side failure says nothing about the submission
+            return None
+        return result
+
+    async def run_async(self, script: str, cwd: str, timeout: int = 30, limits: Optional[dict] = None) -> Optional[dict]:
+        """
+        `run` without blocking the event loop. The worker round trip runs on the
+        pool's own threads (one per worker), so runs waiting for a worker never
+        hold up other `asyncio.to_thread` work.
+
+        Cancelling the caller kills the run's child and waits for the worker
+        to report back, so the run's directory is not reused while the child
+        still runs in it.
+        """
+        handle = _RunHandle()
+        cfuture = self._executor.submit(self.run, script, cwd, timeout, limits, handle)
+        future = asyncio.wrap_future(cfuture)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            handle.cancel()
+            if not cfuture.cancel():
+                with contextlib.suppress(Exception):
+                    await future
+            raise
+
+    def close(self) -> None:
+        """Stop all idle workers."""
+        self._closed = True
+        self._executor.shutdown(wait=False)
+        while True:
+            try:
+                worker = self._slots.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.kill()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _make_default_pool() -> Optional[SandboxPool]:
+    if os.getenv("SCICODE_SANDBOX_MODE", "pool").lower() == "cold":
+        return None
+    size = _env_int("SCICODE_SANDBOX_POOL_SIZE", min(4, os.cpu_count() or 1))
+    if size <= 0:
+        return None
+    preload_env = os.getenv("SCICODE_SANDBOX_PRELOAD")
+    preload = [m.strip() for m in preload_env.split(",") if m.strip()] if preload_env is not None else None
+    return SandboxPool(size, max_runs=_env_int("SCICODE_SANDBOX_MAX_RUNS", 100), preload=preload, limits=resource_limits)
+
+
+# Resource limits of every sandboxed run (see sandbox_limits.py)
+resource_limits = limits_from_env()
+
+# Global pool (None when the cold path is configured)
+sandbox_pool = _make_default_pool()
+
+# Global limit on concurrent sandbox runs, shared by every evaluation in the process;
+# with the pool, more runs than workers would only queue for a worker
+sandbox_concurrency = max(1, _env_int(
+    "SCICODE_SANDBOX_CONCURRENCY", sandbox_pool.size if sandbox_pool is not None else (os.cpu_count() or 1)
+))
+_semaphores = {}
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Return the sandbox semaphore of the running event loop."""
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        _semaphores.clear()
+        sem = _semaphores[loop] = asyncio.Semaphore(sandbox_concurrency)
+    return sem
+
+
+def _observe_run(info: dict, mode: str, started: float) -> None:
+    SANDBOX_RUN.observe(time.perf_counter() - started, mode=mode)
+    if info.get("timeout"):
+        SANDBOX_TIMEOUTS.inc()
+    for record in info.get("tests", ()):
+        if isinstance(record.get("duration"), (int, float)):
+            TEST_CASE_RUNTIME.observe(record["duration"])
+    if isinstance(info.get("usage", {}).get("cpu_seconds"), (int, float)):
+        SANDBOX_CPU.observe(info["usage"]["cpu_seconds"])
+    if info.get("limit_exceeded"):
+        SANDBOX_LIMIT_KILLS.inc(limit=info["limit_exceeded"])
+
+
+def run_script(script: str, cwd: str, timeout: int = 30, limits: Optional[dict] = None) -> Tuple[bool, dict]:
+    """
+    Run a harness script in the sandbox.
+
+    Uses the warm worker pool when enabled and falls back to a fresh
+    interpreter otherwise (or if the pool fails).
+
+    Args:
+        script: Path of the harness script
+        cwd: Working directory for the run
+        timeout: Wall-clock timeout in seconds
+        limits: Resource limits (default: `resource_limits`, from the environment)
+
+    Returns:
+        Tuple of (passed: bool, info: dict) with returncode, stdout, stderr, passed,
+        usage (cpu_seconds, peak_rss_kb) when measured, limit_exceeded when a
+        resource limit killed the run and, on timeout, timeout=True
+    """
+    limits = resource_limits if limits is None else limits
+    started = time.perf_counter()
+    if sandbox_pool is not None:
+        result = sandbox_pool.run(script, cwd, timeout, limits)
+        if result is not None:
+            passed, info = _result_to_info(result, timeout)
+            _observe_run(info, "pool", started)
+            return passed, info
+        SANDBOX_POOL_FALLBACKS.inc()
+    passed, info = run_script_cold(script, cwd, timeout, limits)
+    _observe_run(info, "cold", started)
+    return passed, info
+
+
+async def run_script_async(script: str, cwd: str, timeout: int = 30, limits: Optional[dict] = None) -> Tuple[bool, dict]:
+    """
+    Asynchronous `run_script`, bounded by the process-wide sandbox semaphore.
+
+    Time spent waiting for a free slot does not count towards `timeout`.
+    """
+    limits = resource_limits if limits is None else limits
+    async with _get_semaphore():
+        started = time.perf_counter()
+        if sandbox_pool is not None:
+            result = await sandbox_pool.run_async(script, cwd, timeout, limits)
+            if result is not None:
+                passed, info = _result_to_info(result, timeout)
+                _observe_run(info, "pool", started)
+                return passed, info
+            SANDBOX_POOL_FALLBACKS.inc()
+        passed, info = await run_script_cold_async(script, cwd, timeout, limits)
+        _observe_run(info, "cold", started)
+        return passed, info
@@ -0,0 +1,173 @@
+"""Per-run resource limits and usage accounting for sandboxed submissions.
+
+Standard library only: imported by file name by the launcher `src.sandbox`
+starts cold runs with (it applies the limits, then execs the script) and by
+`sandbox_worker.py` for its forked children.
+
+Configuration (environment variables; 0 disables a limit):
+    SCICODE_SANDBOX_CPU_SECONDS  CPU time per run, RLIMIT_CPU (default: 0, wall-clock timeout only)
+    SCICODE_SANDBOX_MEMORY_MB    Address space per run, RLIMIT_AS (default: 4096)
+    SCICODE_SANDBOX_FILE_MB      Largest file a run may write, RLIMIT_FSIZE (default: 256)
+    SCICODE_SANDBOX_MAX_PROCS    Processes of the sandbox user, RLIMIT_NPROC (default: 0)
+    SCICODE_SANDBOX_THREADS      BLAS/OpenMP threads per run (default: 1)
+    SCICODE_SANDBOX_CGROUP       Delegated cgroup v2 directory; each run then gets a child
+                                 cgroup with memory.max and pids.max, and its usage is
+                                 read from there (default: unset)
+"""
+
+import os
+import time
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Thread pool sizes read by numpy's BLAS backends, OpenMP and numexpr at import time
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS",
+)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+def limits_from_env() -> dict:
+    """Resource limits configured in the environment (see module docstring)."""
+    return {
+        "cpu_seconds": _env_int("SCICODE_SANDBOX_CPU_SECONDS", 0),
+        "memory_mb": _env_int("SCICODE_SANDBOX_MEMORY_MB", 4096),
+        "file_mb": _env_int("SCICODE_SANDBOX_FILE_MB", 256),
+        "max_procs": _env_int("SCICODE_SANDBOX_MAX_PROCS", 0),
+        "threads": _env_int("SCICODE_SANDBOX_THREADS", 1),
+        "cgroup": os.getenv("SCICODE_SANDBOX_CGROUP") or None,
+    }
+
+
+def thread_env(limits: dict) -> dict:
+    """Environment variables pinning the BLAS/OpenMP thread pools (empty if unpinned)."""
+    threads = limits.get("threads")
+    return {name: str(threads) for name in THREAD_ENV_VARS} if threads else {}
+
+
+def _set_rlimit(which: int, soft: int, hard: Optional[int] = None) -> None:
+    hard = soft if hard is None else hard
+    _, current_hard = resource.getrlimit(which)
+    if current_hard != resource.RLIM_INFINITY:
+        # Only privileged processes may raise the hard limit
+        soft, hard = min(soft, current_hard), min(hard, current_hard)
+    try:
+        resource.setrlimit(which, (soft, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def apply_limits(limits: dict) -> None:
+    """
+    Apply rlimits and thread pinning to the current process.
+
+    Called in the sandboxed process before the submission runs. The CPU limit
+    sends SIGXCPU at the limit and SIGKILL one second later.
+    """
+    os.environ.update(thread_env(limits))
+    if resource is None:
+        return
+    if limits.get("cpu_seconds"):
+        _set_rlimit(resource.RLIMIT_CPU, limits["cpu_seconds"], limits["cpu_seconds"] + 1)
+    if limits.get("memory_mb"):
+        _set_rlimit(resource.RLIMIT_AS, limits["memory_mb"] * 1024 * 1024)
+    if limits.get("file_mb"):
+        _set_rlimit(resource.RLIMIT_FSIZE, limits["file_mb"] * 1024 * 1024)
+    if limits.get("max_procs") and hasattr(resource, "RLIMIT_NPROC"):
+        _set_rlimit(resource.RLIMIT_NPROC, limits["max_procs"])
+
+
+def rusage_usage(rusage) -> dict:
+    """Usage of a waited-for process from its rusage (ru_maxrss is KiB on Linux)."""
+    return {
+        "cpu_seconds": round(rusage.ru_utime + rusage.ru_stime, 4),
+        "peak_rss_kb": rusage.ru_maxrss,
+    }
+
+
+def cgroup_create(limits: dict) -> Optional[str]:
+    """
+    Create a child cgroup for one run under the configured delegated cgroup.
+
+    Returns:
+        Path of the new cgroup, or None if cgroups are not configured or usable
+    """
+    base = limits.get("cgroup")
+    if not base:
+        return None
+    path = os.path.join(base, f"run-{os.getpid()}-{time.monotonic_ns()}")
+    try:
+        os.mkdir(path)
+    except OSError:
+        return None
+    settings = {"memory.swap.max": "0"}
+    if limits.get("memory_mb"):
+        settings["memory.max"] = str(limits["memory_mb"] * 1024 * 1024)
+    if limits.get("max_procs"):
+        settings["pids.max"] = str(limits["max_procs"])
+    for name, value in settings.items():
+        try:
+            with open(os.path.join(path, name), "w") as f:
+                f.write(value)
+        except OSError:
+            pass  # controller not enabled in the delegated subtree
+    return path
+
+
+def cgroup_enter(path: Optional[str]) -> None:
+    """Move the current process into a cgroup (called in the sandboxed process)."""
+    if not path:
+        return
+    try:
+        with open(os.path.join(path, "cgroup.procs"), "w") as f:
+            f.write(str(os.getpid()))
+    except OSError:
+        pass
+
+
+def cgroup_usage(path: Optional[str]) -> Optional[dict]:
+    """CPU time and peak memory of everything that ran in a cgroup (None if unreadable)."""
+    if not path:
+        return None
+    usage = {}
+    try:
+        with open(os.path.join(path, "cpu.stat")) as f:
+            for line in f:
+                key, _, value = line.partition(" ")
+                if key == "usage_usec":
+                    usage["cpu_seconds"] = round(int(value) / 1e6, 4)
+        with open(os.path.join(path, "memory.peak")) as f:
+            usage["peak_rss_kb"] = int(f.read()) // 1024
+    except (OSError, ValueError):
+        pass
+    return usage or None
+
+
+def cgroup_remove(path: Optional[str]) -> None:
+    """Kill whatever is left in a run's cgroup and remove it."""
+    if not path:
+        return
+    try:
+        with open(os.path.join(path, "cgroup.kill"), "w") as f:
+            f.write("1")
+    except OSError:
+        pass
+    for _ in range(50):
+        try:
+            os.rmdir(path)
+            return
+        except FileNotFoundError:
+            return
+        except OSError:
+            time.sleep(0.01)  # killed processes are still exiting
@@ -0,0 +1,236 @@
+"""Warm sandbox worker - imports the scientific stack once, then forks a child per test run.
+
+Run as a script by `src.sandbox.SandboxPool` (not imported), so it must only depend
+on the standard library plus the modules it is asked to preload:
+
+    python sandbox_worker.py numpy scipy h5py scicode.parse.parse
+
+Protocol (one JSON object per line):
+    stdin:  {"script": "/tmp/x/solution.py", "cwd": "/tmp/x", "timeout": 30, "limits": {...}}
+    stdout: {"started": 1234}  (pid, also the process group, of the forked child)
+            {"returncode": 0, "stdout": "...", "stderr": "...", "results": "...", "timeout": false, "spawn": 0.001,
+             "usage": {"cpu_seconds": 0.2, "peak_rss_kb": 81234}}
+
+"results" holds what the run wrote to the pipe passed in $SCICODE_RESULTS_FD
+(also for a run killed at its timeout);
+"spawn" is the time taken to fork the child, in seconds. "limits" are the
+resource limits applied to the child (see sandbox_limits.py) and "usage" its
+CPU time and peak RSS.
+
+The first line written is {"ready": true, "preloaded": [...]} once imports are done.
+"""
+
+import os
+import sys
+import json
+import time
+import runpy
+import fcntl
+import select
+import signal
+import tempfile
+import importlib
+import traceback
+
+from sandbox_limits import apply_limits, cgroup_create, cgroup_enter, cgroup_remove, cgroup_usage, rusage_usage
+
+
+def _preload(modules):
+    loaded = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception:
+            pass
+    return loaded
+
+
+RESULTS_FD_ENV = "SCICODE_RESULTS_FD"
+
+
+def _child(script, cwd, out, err, proto_fds, results_w, limits, cgroup):
+    """Body of the forked child: behave like `python script` run in `cwd`."""
+    code = 1
+    try:
+        os.setpgid(0, 0)
+        cgroup_enter(cgroup)
+        apply_limits(limits)
+        for fd in proto_fds:
+            os.close(fd)
+        os.environ[RESULTS_FD_ENV] = str(results_w)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(out.fileno(), 1)
+        os.dup2(err.fileno(), 2)
+        os.chdir(cwd)
+        sys.argv = [script]
+        sys.path[0] = os.path.dirname(os.path.abspath(script))
+
+        # A fresh interpreter would seed its RNGs from the OS; do the same here
+        import random
+        random.seed()
+        if "numpy" in sys.modules:
+            sys.modules["numpy"].random.seed()
+
+        try:
+            runpy.run_path(script, run_name="__main__")
+            code = 0
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except BaseException as e:
+            # Drop the worker/runpy frames so the traceback reads like `python script`
+            tb = e.__traceback__
+            while tb is not None and tb.tb_frame.f_code.co_filename != script:
+                tb = tb.tb_next
+            traceback.print_exception(type(e), e, tb)
+            code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except Exception:
+            pass
+        os._exit(code & 0xFF)
+
+
+def _drain(fd, chunks):
+    """Read what is available on a non-blocking pipe. Returns False at EOF."""
+    while True:
+        try:
+            chunk = os.read(fd, 65536)
+        except BlockingIOError:
+            return True
+        if not chunk:
+            return False
+        chunks.append(chunk)
+
+
+def _wait(pid, timeout, results_r, chunks):
+    """
+    Wait for `pid` for up to `timeout` seconds while collecting its results pipe.
+    Returns (wait status, rusage), or None on timeout.
+    """
+    deadline = time.monotonic() + timeout
+    pidfd = os.pidfd_open(pid) if hasattr(os, "pidfd_open") else None
+    reading = True
+    try:
+        while True:
+            done, status, rusage = os.wait4(pid, os.WNOHANG)
+            if done:
+                return status, rusage
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            if pidfd is not None:
+                fds = [pidfd, results_r] if reading else [pidfd]
+                readable, _, _ = select.select(fds, [], [], remaining)
+                if results_r in readable:
+                    reading = _drain(results_r, chunks)
+            else:
+                if reading:
+                    reading = _drain(results_r, chunks)
+                time.sleep(min(0.005, remaining))
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+
+def _read(f):
+    f.seek(0)
+    return f.read().decode("utf-8", errors="replace")
+
+
+def run_one(request, proto_fds, notify=None):
+    script = request["script"]
+    cwd = request.get("cwd") or os.path.dirname(script)
+    timeout = request.get("timeout", 30)
+    limits = request.get("limits") or {}
+
+    results_r, results_w = os.pipe()
+    chunks = []
+    cgroup = cgroup_create(limits)
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        spawn_started = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(results_r)
+            _child(script, cwd, out, err, proto_fds, results_w, limits, cgroup)
+
+        spawn = time.perf_counter() - spawn_started
+        os.close(results_w)
+        if notify is not None:
+            notify({"started": pid})
+        fcntl.fcntl(results_r, fcntl.F_SETFL, fcntl.fcntl(results_r, fcntl.F_GETFL) | os.O_NONBLOCK)
+        try:
+            waited = _wait(pid, timeout, results_r, chunks)
+            if waited is None:
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                _, _, rusage = os.wait4(pid, 0)
+                _drain(results_r, chunks)
+                return {
+                    "returncode": -1, "stdout": _read(out), "stderr": _read(err), "timeout": True, "spawn": spawn,
+                    "results": b"".join(chunks).decode("utf-8", errors="replace"),
+                    "usage": cgroup_usage(cgroup) or rusage_usage(rusage),
+                }
+            status, rusage = waited
+
+            # Kill anything the submission left running in its process group
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            _drain(results_r, chunks)
+            usage = cgroup_usage(cgroup) or rusage_usage(rusage)
+        finally:
+            os.close(results_r)
+            cgroup_remove(cgroup)
+
+        if os.WIFSIGNALED(status):
+            returncode = -os.WTERMSIG(status)
+        else:
+            returncode = os.WEXITSTATUS(status)
+        return {
+            "returncode": returncode,
+            "stdout": _read(out),
+            "stderr": _read(err),
+            "results": b"".join(chunks).decode("utf-8", errors="replace"),
+            "timeout": False,
+            "spawn": spawn,
+            "usage": usage,
+        }
+
+
+def main():
+    # Keep a private copy of stdout for the protocol and point fd 1 at /dev/null,
+    # so stray prints from preloaded modules cannot corrupt the channel.
+    proto = os.fdopen(os.dup(1), "w", buffering=1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    loaded = _preload(sys.argv[1:])
+    proto.write(json.dumps({"ready": True, "preloaded": loaded}) + "\n")
+
+    proto_fds = (0, proto.fileno())
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            response = run_one(json.loads(line), proto_fds, lambda message: proto.write(json.dumps(message) + "\n"))
+        except Exception as e:
+            response = {"returncode": -1, "stdout": "", "stderr": f"Sandbox worker error: {e}", "timeout": False, "error": str(e)}
+        proto.write(json.dumps(response) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Sharded execution of a step's test cases across sandbox processes.
+
+A step's tests normally run one after another in a single sandboxed
+interpreter under one timeout. Steps whose tests are known to be slow are
+split into shards that run in parallel, each in its own sandbox process with
+its own timeout, and the shard results are merged back in test order.
+
+Whether to shard is decided from the per-test runtimes of earlier runs of the
+step (`TestTimings`): a shard must carry at least SCICODE_SHARD_MIN_SECONDS of
+expected test time to be worth its spawn and the re-run of the submission's
+module code, so short or fast test lists - and steps never run before - stay
+in one process. Tests of a run that timed out are charged the timeout, so the
+next run of a step that timed out is split as far as allowed. The same
+runtimes pick the test of a step's fail-fast smoke run (`TestTimings.cheapest`).
+
+Configuration (environment variables):
+    SCICODE_TEST_SHARDS        Max shards per run (default: half the CPUs, at most 4; 1 disables sharding)
+    SCICODE_SHARD_MIN_SECONDS  Expected test time per shard (default: 1.0)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class TestTimings:
+    """Per-test runtimes of each step (EMA), learned from the harness' test records."""
+
+    def __init__(self, alpha: float = 0.5, max_steps: int = 10000):
+        self.alpha = alpha
+        self.max_steps = max_steps
+        self._lock = threading.Lock()
+        self._steps: "OrderedDict[str, Dict[int, float]]" = OrderedDict()
+
+    def expected(self, step_id: str, test: int) -> Optional[float]:
+        """Expected runtime in seconds of test number `test` (1-based) of a step."""
+        with self._lock:
+            return self._steps.get(str(step_id), {}).get(test)
+
+    def cheapest(self, step_id: str, num_tests: int) -> int:
+        """
+        0-based index of the test expected to run fastest, for a smoke run.
+
+        Ties go to the earlier test; without any history it is the first test.
+        """
+        with self._lock:
+            durations = self._steps.get(str(step_id), {})
+            known = [(durations[i + 1], i) for i in range(num_tests) if i + 1 in durations]
+        return min(known)[1] if known else 0
+
+    def _update(self, durations: Dict[int, float], test: int, seconds: float) -> None:
+        previous = durations.get(test)
+        durations[test] = seconds if previous is None else self.alpha * seconds + (1 - self.alpha) * previous
+
+    def record(self, step_id: str, tests: Iterable[int], info: dict, timeout: float) -> None:
+        """
+        Learn from one run of a step.
+
+        Args:
+            step_id: Step the run belongs to
+            tests: Numbers (1-based) of the tests the run covered
+            info: Result info of the run
+            timeout: Timeout the run had
+        """
+        tests = list(tests)
+        measured = {
+            r["test"]: float(r["duration"]) for r in info.get("tests") or ()
+            if isinstance(r.get("test"), int) and isinstance(r.get("duration"), (int, float))
+        }
+        with self._lock:
+            durations = self._steps.setdefault(str(step_id), {})
+            self._steps.move_to_end(str(step_id))
+            for test, seconds in measured.items():
+                self._update(durations, test, seconds)
+            if info.get("timeout") and tests:
+                # Which test ran out the clock is unknown; spread the timeout over the unmeasured ones
+                pending = [t for t in tests if t not in measured] or tests
+                for test in pending:
+                    self._update(durations, test, timeout / len(pending))
+            while len(self._steps) > self.max_steps:
+                self._steps.popitem(last=False)
+
+
+def plan_shards(step_id: str, num_tests: int, max_shards: int, min_seconds: float, timings: TestTimings) -> List[List[int]]:
+    """
+    Split a step's tests into shards to run in parallel.
+
+    Tests are placed longest-expected first onto the least loaded shard, so
+    the plan is deterministic for given timings.
+
+    Returns:
+        Lists of 0-based test indices, each sorted and ordered by first index;
+        a single list holding every test when the step should not be split
+    """
+    everything = [list(range(num_tests))]
+    if max_shards <= 1 or num_tests < 2:
+        return everything
+    expected = [timings.expected(step_id, i + 1) for i in range(num_tests)]
+    known = [d for d in expected if d is not None]
+    if not known:
+        return everything
+    default = sum(known) / len(known)
+    costs = [default if d is None else d for d in expected]
+    count = min(max_shards, num_tests, int(sum(costs) // max(min_seconds, 1e-6)))
+    if count <= 1:
+        return everything
+
+    shards: List[List[int]] = [[] for _ in range(count)]
+    loads = [0.0] * count
+    for i in sorted(range(num_tests), key=lambda i: (-costs[i], i)):
+        k = min(range(count), key=lambda k: (loads[k], k))
+        shards[k].append(i)
+        loads[k] += costs[i]
+    return sorted((sorted(s) for s in shards if s), key=lambda s: s[0])
+
+
+def merge_shard_results(results: List[Tuple[bool, dict]]) -> Tuple[bool, dict]:
+    """
+    Merge the (passed, info) results of a step's shards, given in shard order.
+
+    The run passes if every shard passed. Output is concatenated in shard
+    order, test records are sorted by test number, CPU time is summed and the
+    peak RSS is the largest of any shard.
+    """
+    infos = [info for _, info in results]
+    failed = [info for passed, info in results if not passed]
+    passed = not failed
+    info = {
+        "returncode": failed[0].get("returncode", 1) if failed else 0,
+        "stdout": "".join(i.get("stdout", "") for i in infos),
+        "stderr": "\n".join(s for s in (i.get("stderr", "").rstrip("\n") for i in infos) if s),
+        "passed": passed,
+        "shards": len(results),
+    }
+    records = [r for i in infos for r in i.get("tests") or ()]
+    if any("tests" in i for i in infos):
+        info["tests"] = sorted(records, key=lambda r: r.get("test") if isinstance(r.get("test"), int) else 0)
+    if any(i.get("timeout") for i in infos):
+        info["timeout"] = True
+    usages = [i["usage"] for i in infos if i.get("usage")]
+    if usages:
+        info["usage"] = {
+            "cpu_seconds": round(sum(u.get("cpu_seconds") or 0 for u in usages), 4),
+            "peak_rss_kb": max(u.get("peak_rss_kb") or 0 for u in usages),
+        }
+    for key in ("limit_exceeded", "error"):
+        value = next((i[key] for i in infos if i.get(key)), None)
+        if value:
+            info[key] = value
+    return passed, info
+
+
+def _env_number(name: str, default, cast=int):
+    try:
+        return max(0, cast(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+max_shards = max(1, _env_number("SCICODE_TEST_SHARDS", min(4, max(1, (os.cpu_count() or 1) // 2))))
+shard_min_seconds = _env_number("SCICODE_SHARD_MIN_SECONDS", 1.0, float)
+test_timings = TestTimings()
@@ -0,0 +1,172 @@
+"""Suite (multi-problem) evaluation: problem selection, scheduling and duration history."""
+
+import os
+import json
+import time
+import asyncio
+import threading
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+DEFAULT_HISTORY_PATH = Path.home() / ".cache" / "scicode_agentbeats" / "durations.json"
+
+
+def parse_problem_selection(spec: str, all_ids: List[str]) -> List[str]:
+    """
+    Resolve a problem selection against the ids of a split.
+
+    Args:
+        spec: "all", a comma-separated list of ids, inclusive numeric ranges
+              ("1-10"), or a mix of both ("1-5,9,12")
+        all_ids: Problem ids of the split, in dataset order
+
+    Returns:
+        Selected problem ids without duplicates, in the order given
+
+    Raises:
+        ValueError: If an explicit id is neither a problem id of the split
+                    nor an index into it (such problems cannot be evaluated)
+    """
+    spec = spec.strip()
+    if spec.lower() == "all":
+        return list(all_ids)
+
+    known = set(all_ids)
+    selected = []
+    unknown = []
+    for part in (p.strip() for p in spec.split(",")):
+        if not part:
+            continue
+        start, sep, end = part.partition("-")
+        if sep and start.strip().isdigit() and end.strip().isdigit():
+            lo, hi = int(start), int(end)
+            selected.extend(pid for pid in all_ids if pid.isdigit() and lo <= int(pid) <= hi)
+        elif part in known or (part.isdigit() and int(part) < len(all_ids)):
+            selected.append(part)
+        else:
+            unknown.append(part)
+    if unknown:
+        raise ValueError(f"Unknown problem ids: {', '.join(unknown)}")
+    return list(dict.fromkeys(selected))
+
+
+class DurationHistory:
+    """
+    Per-problem evaluation durations persisted as JSON, used to schedule the
+    longest-expected problems first. Durations are smoothed with an EMA.
+    """
+
+    def __init__(self, path: Optional[Path] = None, alpha: float = 0.5):
+        self.path = Path(path or os.getenv("SCICODE_DURATIONS_FILE", DEFAULT_HISTORY_PATH))
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._durations: Dict[str, float] = json.load(f)
+        except (OSError, ValueError):
+            self._durations = {}
+
+    @staticmethod
+    def _key(split: str, problem_id: str, eval_mode: str) -> str:
+        return f"{split}/{eval_mode}/{problem_id}"
+
+    def expected(self, split: str, problem_id: str, eval_mode: str = "first_step") -> Optional[float]:
+        return self._durations.get(self._key(split, problem_id, eval_mode))
+
+    def record(self, split: str, problem_id: str, seconds: float, eval_mode: str = "first_step") -> None:
+        key = self._key(split, problem_id, eval_mode)
+        with self._lock:
+            previous = self._durations.get(key)
+            self._durations[key] = seconds if previous is None else (
+                self.alpha * seconds + (1 - self.alpha) * previous
+            )
+
+    def save(self) -> None:
+        """Write the history atomically; failures are logged, not raised."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with self._lock, open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._durations, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Warning: Failed to save duration history: {e}")
+
+    def order(self, split: str, problem_ids: List[str], eval_mode: str = "first_step") -> List[str]:
+        """
+        Longest-expected-first order. Problems without history are assumed to
+        take the mean known duration; ties keep the given order.
+        """
+        known = [d for d in (self.expected(split, pid, eval_mode) for pid in problem_ids) if d is not None]
+        default = sum(known) / len(known) if known else 0.0
+
+        def expected(pid):
+            d = self.expected(split, pid, eval_mode)
+            return default if d is None else d
+
+        return sorted(problem_ids, key=expected, reverse=True)
+
+
+class SuiteLimits:
+    """Concurrency limits shared by all problems of one suite run."""
+
+    def __init__(self, white_agent_calls: int, sandbox_runs: int):
+        self.white_agent = asyncio.Semaphore(white_agent_calls)
+        self.sandbox = asyncio.Semaphore(sandbox_runs)
+
+
+async def run_suite(
+    problem_ids: List[str],
+    evaluate: Callable[[str], Awaitable[dict]],
+    concurrency: int,
+) -> List[dict]:
+    """
+    Evaluate problems with a bounded set of worker tasks.
+
+    Args:
+        problem_ids: Problems in scheduling order
+        evaluate: Coroutine function returning an ask_agent_to_solve result
+        concurrency: Number of problems evaluated at the same time
+
+    Returns:
+        One result per problem, in the order of `problem_ids`, each with
+        problem_id, reward, time_used, info and (on failure) error
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for i, pid in enumerate(problem_ids):
+        queue.put_nowait((i, pid))
+    results: List[Optional[dict]] = [None] * len(problem_ids)
+
+    async def worker():
+        while True:
+            try:
+                i, pid = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.time()
+            try:
+                res = await evaluate(pid)
+                results[i] = {
+                    "problem_id": pid,
+                    "reward": res["reward"],
+                    "time_used": time.time() - started,
+                    "info": res["info"],
+                }
+            except Exception as e:
+                print(f"Green agent: Problem {pid} failed to evaluate: {e}")
+                results[i] = {
+                    "problem_id": pid,
+                    "reward": 0.0,
+                    "time_used": time.time() - started,
+                    "info": {},
+                    "error": str(e),
+                }
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(problem_ids))))]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for w in workers:
+            w.cancel()
+    return results
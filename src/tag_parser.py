@@ -0,0 +1,163 @@
+"""Incremental extraction of <tag>...</tag> blocks and ``` code fences.
+
+`TagParser` consumes text chunk by chunk (e.g. a streamed LLM reply) and scans
+every character once: tokens are found with a pattern free of backreferences,
+and only the part of the text that can still belong to an open tag is buffered.
+
+Matching follows the original `parse_tags` regex: a closing tag completes the
+earliest pending opening tag of the same name, and anything in between - other
+tags included - is its content. Tags completed inside another tag are reported
+too; `parse_tags` drops them to keep its old results.
+"""
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+FENCE = "fence"
+
+# An opening/closing tag, or a whole ``` fence line (the newline included)
+_TOKEN = re.compile(r"<(/?)(\w+)>|^[ \t]{0,3}```([^\n`]*)\n", re.M)
+_TAG_TOKEN = re.compile(r"<(/?)(\w+)>")
+# Text at the end of a chunk that may still become a tag or a fence line
+_PARTIAL_TAG = re.compile(r"</?\w*")
+_PARTIAL_FENCE = re.compile(r"[ \t]{0,3}(?:`{0,2}|```[^\n`]*)")
+_FINAL_FENCE = re.compile(r"[ \t]{0,3}```[ \t]*")
+
+
+class TagMatch(NamedTuple):
+    """One completed tag or code fence."""
+    name: str       # tag name, or FENCE for a code fence
+    content: str    # content without surrounding whitespace (fences: without surrounding blank lines)
+    start: int      # offset of the opening tag or fence line
+    end: int        # offset just past the closing tag or fence line
+    lang: str = ""  # language of a code fence ("" if unlabeled)
+
+
+class TagParser:
+    """
+    Incremental tag and code fence extractor.
+
+    Args:
+        stop_after: Tag names (or FENCE) whose first completion ends parsing;
+                    further input is ignored and `done` becomes True
+        fences: Also extract ``` code fences
+    """
+
+    def __init__(self, stop_after: Iterable[str] = (), fences: bool = True):
+        self.stop_after = set(stop_after)
+        self.fences = fences
+        self._token = _TOKEN if fences else _TAG_TOKEN
+        self.matches: List[TagMatch] = []
+        self.done = False
+        self._buf = ""
+        self._base = 0          # offset of _buf[0] in the whole text
+        self._scan = 0          # offset up to which the text has been tokenized
+        self._line_start = 0    # offset of the start of the line containing _scan
+        self._pending: Dict[str, Tuple[int, int]] = {}    # name -> (tag start, content start)
+        self._fence: Optional[Tuple[int, int, str]] = None  # (fence start, content start, lang)
+
+    def feed(self, chunk: str) -> List[TagMatch]:
+        """Consume the next chunk of text. Returns the matches it completed."""
+        if self.done or not chunk:
+            return []
+        self._buf += chunk
+        return self._scan_to(self._safe_end())
+
+    def close(self) -> List[TagMatch]:
+        """Signal the end of the text. Returns the matches completed by it."""
+        if self.done:
+            return []
+        found = self._scan_to(self._base + len(self._buf))
+        if not self.done and self._fence is not None:
+            # A fence closed on the last line without a newline, or never closed
+            start, content_start, lang = self._fence
+            buf = self._buf
+            last_line = buf.rfind("\n") + 1
+            end = self._base + len(buf)
+            if self._base + last_line >= content_start and _FINAL_FENCE.fullmatch(buf, last_line):
+                content_end = self._base + last_line
+            else:
+                content_end = end
+            found.append(self._complete_fence(start, content_start, content_end, end, lang))
+        self.done = True
+        return found
+
+    def _safe_end(self) -> int:
+        """Offset up to which the buffer can be tokenized without splitting a token."""
+        buf = self._buf
+        scan = self._scan - self._base
+        end = len(buf)
+        lt = buf.rfind("<", scan)
+        if lt != -1 and _PARTIAL_TAG.fullmatch(buf, lt):
+            end = lt
+        if self.fences:
+            nl = buf.rfind("\n", scan)
+            line_start = nl + 1 if nl != -1 else self._line_start - self._base
+            if line_start >= scan and _PARTIAL_FENCE.fullmatch(buf, line_start):
+                end = min(end, line_start)
+        return self._base + end
+
+    def _complete_fence(self, start: int, content_start: int, content_end: int, end: int, lang: str) -> TagMatch:
+        content = self._buf[content_start - self._base:content_end - self._base].strip("\n").rstrip()
+        match = TagMatch(FENCE, content, start, end, lang)
+        self.matches.append(match)
+        self._fence = None
+        if FENCE in self.stop_after:
+            self.done = True
+        return match
+
+    def _scan_to(self, end: int) -> List[TagMatch]:
+        buf, base = self._buf, self._base
+        pos = self._scan - base
+        found = []
+        while not self.done:
+            m = self._token.search(buf, pos, end - base)
+            if m is None:
+                pos = max(pos, end - base)
+                break
+            pos = m.end()
+            name = m.group(2)
+            if name is not None:
+                if not m.group(1):
+                    self._pending.setdefault(name, (base + m.start(), base + m.end()))
+                elif name in self._pending:
+                    start, content_start = self._pending.pop(name)
+                    match = TagMatch(name, buf[content_start - base:m.start()].strip(), start, base + m.end())
+                    self.matches.append(match)
+                    found.append(match)
+                    # Tags opened inside the completed one can no longer complete
+                    for other, (other_start, _) in list(self._pending.items()):
+                        if other_start > start:
+                            del self._pending[other]
+                    if name in self.stop_after:
+                        self.done = True
+            else:
+                info = m.group(3).strip()
+                if self._fence is None:
+                    self._fence = (base + m.start(), base + m.end(), info.split()[0] if info else "")
+                elif not info:
+                    start, content_start, lang = self._fence
+                    found.append(self._complete_fence(start, content_start, base + m.start(), base + m.end(), lang))
+
+        nl = buf.rfind("\n", self._scan - base, pos)
+        if nl != -1:
+            self._line_start = base + nl + 1
+        self._scan = base + pos
+
+        # Drop text that no pending tag or fence can refer to any more. Cutting at
+        # a line start keeps `^` in _TOKEN correct for the remaining buffer.
+        keep = min([self._line_start] + [s for s, _ in self._pending.values()]
+                   + ([self._fence[0]] if self._fence else []))
+        if keep - base > len(buf) // 2:
+            self._buf = buf[keep - base:]
+            self._base = keep
+        return found
+
+
+def find_tags(text: str, stop_after: Iterable[str] = (), fences: bool = True) -> List[TagMatch]:
+    """All tags (and code fences) of a complete text, in order of completion."""
+    parser = TagParser(stop_after=stop_after, fences=fences)
+    parser.feed(text)
+    parser.close()
+    return parser.matches
@@ -0,0 +1,194 @@
+"""Per-step cache of SciCode test targets, memory-mapped by the sandbox.
+
+`process_hdf5_to_tuple` reopens test_data.h5 and decodes a step's targets on
+every sandbox run. The target store does that decoding once per step and
+saves the result next to the cache index:
+
+    <cache>/<version>/index.json          step_id -> {"tests": n, "file": ...}
+    <cache>/<version>/<step>.pkl          target structure, large arrays replaced by refs
+    <cache>/<version>/<step>_<k>.npy      large arrays, memory-mapped copy-on-write
+
+Harnesses load targets with `LOADER_SOURCE`, so every concurrent run of a step
+shares the same page-cache pages instead of decoding its own copy.
+
+Build the whole cache ahead of time with:
+
+    python -m src.target_store [path/to/test_data.h5]
+"""
+
+import os
+import sys
+import json
+import pickle
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "scicode_agentbeats" / "targets"
+SCICODE_SRC = Path(__file__).resolve().parent.parent / "SciCode" / "src"
+
+# Arrays smaller than this are kept inline in the pickle: mapping a file costs more than copying them
+MMAP_MIN_BYTES = 64 * 1024
+
+_NPY_REF = "__scicode_npy__"
+
+# Prepended to harnesses; only needs numpy in the sandbox
+LOADER_SOURCE = f'''
+def _scicode_load_targets(path):
+    import os, pickle
+    import numpy as np
+    base = os.path.dirname(path)
+    with open(path, "rb") as f:
+        data = pickle.load(f)
+    def resolve(obj):
+        if isinstance(obj, tuple):
+            if len(obj) == 2 and obj[0] == "{_NPY_REF}":
+                return np.load(os.path.join(base, obj[1]), mmap_mode="c")
+            return tuple(resolve(o) for o in obj)
+        if isinstance(obj, list):
+            return [resolve(o) for o in obj]
+        if isinstance(obj, dict):
+            return {{k: resolve(v) for k, v in obj.items()}}
+        return obj
+    return resolve(data)
+'''
+
+
+def _safe_name(step_id: str) -> str:
+    return "".join(c if c.isalnum() or c in "._-" else "_" for c in str(step_id))
+
+
+class TargetStore:
+    """Converts and serves the targets of one test_data.h5 file."""
+
+    def __init__(self, h5py_file: str, cache_dir: Optional[Path] = None):
+        self.h5py_file = os.path.abspath(h5py_file)
+        st = os.stat(self.h5py_file)
+        # Version of the target data: changes whenever the HDF5 file is replaced
+        self.version = hashlib.sha1(
+            f"{self.h5py_file}:{st.st_size}:{st.st_mtime_ns}".encode()
+        ).hexdigest()[:16]
+        root = Path(cache_dir or os.getenv("SCICODE_TARGET_CACHE", DEFAULT_CACHE_DIR))
+        self.dir = root / self.version
+        self._lock = threading.Lock()
+        self._index: Dict[str, dict] = self._read_index()
+        # Steps that failed to convert; their harnesses keep decoding from HDF5
+        self._failed = set()
+
+    def _read_index(self) -> Dict[str, dict]:
+        try:
+            with open(self.dir / "index.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.dir, suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.dir / "index.json")
+
+    def _convert_step(self, step_id: str, test_num: int) -> dict:
+        """Decode a step's targets from HDF5 and write them to the cache."""
+        import numpy as np
+        src = str(SCICODE_SRC)
+        if src not in sys.path:
+            sys.path.insert(0, src)
+        from scicode.parse.parse import process_hdf5_to_tuple
+
+        targets = process_hdf5_to_tuple(step_id, test_num, self.h5py_file)
+        name = _safe_name(step_id)
+        arrays = []
+
+        def strip(obj):
+            if type(obj) is np.ndarray and obj.dtype != object and obj.nbytes >= MMAP_MIN_BYTES:
+                file = f"{name}_{len(arrays)}.npy"
+                arrays.append(file)
+                # Atomic, so runs that already mapped an older copy are unaffected
+                fd, tmp = tempfile.mkstemp(dir=self.dir, suffix=".npy")
+                with os.fdopen(fd, "wb") as f:
+                    np.save(f, obj)
+                os.replace(tmp, self.dir / file)
+                return (_NPY_REF, file)
+            if isinstance(obj, tuple):
+                return tuple(strip(o) for o in obj)
+            if isinstance(obj, list):
+                return [strip(o) for o in obj]
+            if isinstance(obj, dict):
+                return {k: strip(v) for k, v in obj.items()}
+            return obj
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        stripped = strip(targets)
+        fd, tmp = tempfile.mkstemp(dir=self.dir, suffix=".pkl")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(stripped, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.dir / f"{name}.pkl")
+        return {"tests": test_num, "file": f"{name}.pkl", "arrays": arrays}
+
+    def targets_path(self, step_id: str, test_num: int) -> Optional[str]:
+        """
+        Return the cached targets file of a step, converting it on first use.
+
+        Returns:
+            Path for `_scicode_load_targets`, or None if the step could not be converted
+        """
+        entry = self._index.get(str(step_id))
+        if entry is None or entry["tests"] != test_num:
+            if (str(step_id), test_num) in self._failed:
+                return None
+            with self._lock:
+                entry = self._index.get(str(step_id))
+                if entry is None or entry["tests"] != test_num:
+                    try:
+                        entry = self._convert_step(str(step_id), test_num)
+                    except Exception as e:
+                        print(f"Warning: Failed to cache targets of step {step_id}: {e}")
+                        self._failed.add((str(step_id), test_num))
+                        return None
+                    self._index[str(step_id)] = entry
+                    self._write_index()
+        return str(self.dir / entry["file"])
+
+    def convert_all(self) -> int:
+        """Convert every step in the HDF5 file. Returns the number of steps cached."""
+        import h5py
+        with h5py.File(self.h5py_file, "r") as f:
+            steps = {
+                step_id: sum(1 for key in f[step_id].keys() if key.startswith("test"))
+                for step_id in f.keys()
+            }
+        return sum(1 for step_id, n in steps.items() if self.targets_path(step_id, n) is not None)
+
+
+_stores: Dict[str, TargetStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_target_store(h5py_file: str) -> Optional[TargetStore]:
+    """Return the process-wide target store of an HDF5 file (None if it is missing)."""
+    store = _stores.get(h5py_file)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(h5py_file)
+            if store is None:
+                try:
+                    store = _stores[h5py_file] = TargetStore(h5py_file)
+                except OSError:
+                    return None
+    return store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the SciCode target cache from test_data.h5")
+    parser.add_argument("h5py_file", nargs="?", default=str(SCICODE_SRC.parent / "eval" / "data" / "test_data.h5"))
+    args = parser.parse_args()
+
+    store = TargetStore(args.h5py_file)
+    count = store.convert_all()
+    print(f"Cached targets of {count} steps in {store.dir}")
@@ -0,0 +1,199 @@
+"""Durable A2A task store backed by SQLite (WAL).
+
+Tasks survive server restarts and are shared by all worker processes of a
+multi-worker green agent (each process opens its own connection; WAL lets
+readers and the writer proceed concurrently). Retention is bounded: tasks not
+updated for the TTL are dropped, and beyond `max_tasks` the least recently
+updated finished tasks go first.
+
+Progress messages (status messages carrying an "event" in their metadata,
+see `src.progress`) are not kept in the stored history: the SDK moves every
+previous status message into the history and re-reads and re-writes the
+whole task per event, so a long evaluation would otherwise pay for its
+growing history on every progress event. The latest progress message stays
+available as the task status.
+
+Event queues and running evaluations live in the worker process that
+received the task, so in a multi-worker server `LocalTaskRequestHandler`
+refuses tasks/cancel and tasks/resubscribe for tasks another worker runs:
+a cancel there would only mark the task canceled in the shared store while
+the owning worker keeps evaluating and later overwrites the status. Clients
+retry until their request reaches the owning worker, or run one worker.
+
+Configuration (environment variables):
+    SCICODE_TASK_STORE            "sqlite" (default) or "memory" (the SDK's InMemoryTaskStore)
+    SCICODE_TASK_STORE_PATH       SQLite file (default: ~/.cache/scicode_agentbeats/tasks-<name>.sqlite)
+    SCICODE_TASK_STORE_MAX_TASKS  Tasks kept (default: 10000)
+    SCICODE_TASK_STORE_TTL        Seconds a task is kept after its last update (default: 604800, a week)
+"""
+
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+from pathlib import Path
+from typing import Optional
+
+from a2a.server.context import ServerCallContext
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore, TaskStore
+from a2a.types import (
+    Message, Part, Role, Task, TaskIdParams, TaskNotCancelableError, TaskNotFoundError, TaskState, TaskStatus, TextPart,
+)
+from a2a.utils.errors import ServerError
+
+
+DEFAULT_STORE_DIR = Path.home() / ".cache" / "scicode_agentbeats"
+
+FINAL_STATES = (TaskState.completed, TaskState.canceled, TaskState.failed, TaskState.rejected)
+
+# Retention is enforced every this many saves
+_PRUNE_EVERY = 100
+
+
+def _is_progress(message: Message) -> bool:
+    """Whether a message is a progress event of a running task."""
+    return bool(message.metadata) and "event" in message.metadata
+
+
+class SQLiteTaskStore(TaskStore):
+    """TaskStore persisting tasks as JSON rows in SQLite, with TTL and size bounds."""
+
+    def __init__(self, path: Optional[Path] = None, max_tasks: int = 10000, ttl: float = 7 * 24 * 3600):
+        self.path = Path(path or DEFAULT_STORE_DIR / "tasks.sqlite")
+        self.max_tasks = max_tasks
+        self.ttl = ttl
+        self.pruned = 0
+        self._saves = 0
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _conn(self) -> sqlite3.Connection:
+        """Open the database on first use (call with the lock held)."""
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=10.0)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " id TEXT PRIMARY KEY, context_id TEXT NOT NULL, state TEXT NOT NULL,"
+                " task TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS tasks_updated ON tasks(updated)")
+            self._db = db
+        return self._db
+
+    def _save(self, task: Task) -> None:
+        if task.history and any(_is_progress(m) for m in task.history):
+            task = task.model_copy(update={"history": [m for m in task.history if not _is_progress(m)]})
+        with self._lock:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO tasks (id, context_id, state, task, updated) VALUES (?, ?, ?, ?, ?)",
+                (task.id, task.context_id, task.status.state.value, task.model_dump_json(), time.time()),
+            )
+            self._saves += 1
+            if self._saves % _PRUNE_EVERY == 0:
+                self._prune()
+
+    def _prune(self) -> None:
+        """Drop expired tasks, then the oldest finished ones over `max_tasks` (call with the lock held)."""
+        deleted = self._db.execute("DELETE FROM tasks WHERE updated < ?", (time.time() - self.ttl,)).rowcount
+        excess = self._db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] - self.max_tasks
+        if excess > 0:
+            final = [s.value for s in FINAL_STATES]
+            deleted += self._db.execute(
+                f"DELETE FROM tasks WHERE id IN (SELECT id FROM tasks WHERE state IN ({','.join('?' * len(final))})"
+                " ORDER BY updated LIMIT ?)",
+                (*final, excess),
+            ).rowcount
+        self.pruned += deleted
+
+    def _get(self, task_id: str) -> Optional[Task]:
+        with self._lock:
+            row = self._conn().execute("SELECT task FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return Task.model_validate_json(row[0]) if row else None
+
+    def _delete(self, task_id: str) -> None:
+        with self._lock:
+            self._conn().execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    async def save(self, task: Task, context: Optional[ServerCallContext] = None) -> None:
+        await asyncio.to_thread(self._save, task)
+
+    async def get(self, task_id: str, context: Optional[ServerCallContext] = None) -> Optional[Task]:
+        return await asyncio.to_thread(self._get, task_id)
+
+    async def delete(self, task_id: str, context: Optional[ServerCallContext] = None) -> None:
+        await asyncio.to_thread(self._delete, task_id)
+
+    def fail_interrupted(self) -> int:
+        """
+        Mark tasks left unfinished by a previous server run as failed.
+
+        Call once at server startup, before any worker serves requests.
+
+        Returns:
+            Number of tasks marked failed
+        """
+        final = [s.value for s in FINAL_STATES]
+        with self._lock:
+            rows = self._conn().execute(
+                f"SELECT task FROM tasks WHERE state NOT IN ({','.join('?' * len(final))})", final
+            ).fetchall()
+        for (data,) in rows:
+            task = Task.model_validate_json(data)
+            task.status = TaskStatus(
+                state=TaskState.failed,
+                message=Message(
+                    role=Role.agent, message_id=f"{task.id}-interrupted", task_id=task.id, context_id=task.context_id,
+                    parts=[Part(root=TextPart(text="Evaluation interrupted by a server restart"))],
+                ),
+            )
+            self._save(task)
+        return len(rows)
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn().execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall()
+        return {"tasks": sum(n for _, n in rows), "by_state": dict(rows), "pruned": self.pruned}
+
+
+class LocalTaskRequestHandler(DefaultRequestHandler):
+    """Request handler of one of several worker processes sharing a task store (see module docstring)."""
+
+    async def _require_local(self, params: TaskIdParams, context: Optional[ServerCallContext], error) -> None:
+        task = await self.task_store.get(params.id, context)
+        if task is not None and task.status.state not in FINAL_STATES and params.id not in self._running_agents:
+            raise ServerError(error=error(message=f"Task {params.id} is running in another worker process of this agent"))
+
+    async def on_cancel_task(self, params: TaskIdParams, context: Optional[ServerCallContext] = None) -> Optional[Task]:
+        await self._require_local(params, context, TaskNotCancelableError)
+        return await super().on_cancel_task(params, context)
+
+    async def on_resubscribe_to_task(self, params: TaskIdParams, context: Optional[ServerCallContext] = None):
+        await self._require_local(params, context, TaskNotFoundError)
+        async for event in super().on_resubscribe_to_task(params, context):
+            yield event
+
+
+def make_task_store(name: str = "default") -> TaskStore:
+    """
+    Task store configured in the environment (see module docstring).
+
+    Args:
+        name: Names the default database file, so servers on one host (e.g.
+              one per port) do not share - and at startup fail - each other's tasks
+    """
+    if os.getenv("SCICODE_TASK_STORE", "sqlite").lower() == "memory":
+        return InMemoryTaskStore()
+    try:
+        return SQLiteTaskStore(
+            path=os.getenv("SCICODE_TASK_STORE_PATH") or DEFAULT_STORE_DIR / f"tasks-{name}.sqlite",
+            max_tasks=int(os.getenv("SCICODE_TASK_STORE_MAX_TASKS", 10000)),
+            ttl=float(os.getenv("SCICODE_TASK_STORE_TTL", 7 * 24 * 3600)),
+        )
+    except ValueError as e:
+        print(f"Warning: Using the in-memory task store: {e}")
+        return InMemoryTaskStore()
@@ -1,5 +1,11 @@
 """White agent implementation - the target agent being tested."""
 
+import os
+import time
+import asyncio
+import threading
+import importlib
+import importlib.util
 import uvicorn
 import dotenv
 from a2a.server.apps import A2AStarletteApplication
@@ -9,16 +15,43 @@ from a2a.server.events import EventQueue
 from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import AgentSkill, AgentCard, AgentCapabilities
 from a2a.utils import new_agent_text_message
+from src.conversation_store import make_conversation_store
+from src.completion_cache import completion_key, make_completion_cache
+from src.metrics import Counter, Gauge, Histogram, metrics_endpoint
 
-try:
-    from litellm import completion
-    LITELLM_AVAILABLE = True
-except ImportError:
-    LITELLM_AVAILABLE = False
+# litellm takes seconds to import; it is loaded in the background once the server starts
+LITELLM_AVAILABLE = importlib.util.find_spec("litellm") is not None
+if not LITELLM_AVAILABLE:
     print("Warning: litellm not available. White agent will use placeholder responses.")
 
 dotenv.load_dotenv()
 
+# Max LLM requests in flight at once; further requests wait for a free slot
+LLM_CONCURRENCY = max(1, int(os.getenv("WHITE_AGENT_LLM_CONCURRENCY", 8)))
+
+REQUEST_LATENCY = Histogram("white_agent_request_seconds", "Time to answer one message")
+LLM_COMPLETION = Histogram("white_agent_llm_completion_seconds", "Time to get a completion", ["source"])
+LLM_ERRORS = Counter("white_agent_llm_errors_total", "Failed completion requests")
+COMPLETION_CACHE_LOOKUPS = Counter("white_agent_completion_cache_lookups_total", "Completion cache lookups", ["result"])
+LLM_IN_FLIGHT = Gauge("white_agent_llm_requests_in_flight", "Completion requests sent to the model and not yet answered")
+REQUESTS_IN_FLIGHT = Gauge("white_agent_requests_in_flight", "Messages being answered")
+CONVERSATIONS = Gauge("white_agent_conversations", "Conversations held in memory")
+CONVERSATION_BYTES = Gauge("white_agent_conversation_bytes", "Size of the stored conversation history")
+
+DEFAULT_MODEL = os.getenv("WHITE_AGENT_MODEL", "openai/gpt-4o")
+
+
+def llm_params(model=None, temperature=0.0) -> dict:
+    """litellm completion parameters for a model (default: WHITE_AGENT_MODEL or openai/gpt-4o)."""
+    params = {"model": model or DEFAULT_MODEL}
+    if params["model"].startswith("openai/"):
+        params["custom_llm_provider"] = "openai"
+    params["temperature"] = temperature
+    return params
+
+
+LLM_PARAMS = llm_params()
+
 
 def prepare_white_agent_card(url):
     """Prepare the agent card for the white agent."""
@@ -45,35 +78,67 @@ def prepare_white_agent_card(url):
 class GeneralWhiteAgentExecutor(AgentExecutor):
     """White agent executor that responds to SciCode problems."""
     
-    def __init__(self):
-        self.ctx_id_to_messages = {}
+    def __init__(self, completion_cache_mode=None, model=None, temperature=0.0):
+        self.llm_params = llm_params(model, temperature)
+        # Bounded conversation history per context (TTL + LRU eviction)
+        self.conversations = make_conversation_store()
+        # Record/replay cache of completions (None in passthrough mode)
+        self.completion_cache = make_completion_cache(completion_cache_mode)
+        if self.completion_cache is not None and not self.completion_cache.replay_only and temperature > 0:
+            print(f"Warning: Recording completions sampled at temperature {temperature}; replays will repeat them")
+        self._llm_semaphore = None
+
+    def _get_llm_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the server's event loop
+        if self._llm_semaphore is None:
+            self._llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+        return self._llm_semaphore
+
+    async def _complete(self, messages) -> str:
+        """Completion text for a conversation, served from the completion cache when recorded."""
+        key = completion_key(messages, **self.llm_params)
+        if self.completion_cache is not None:
+            started = time.perf_counter()
+            cached = self.completion_cache.get(key)
+            COMPLETION_CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+            if cached is not None:
+                LLM_COMPLETION.observe(time.perf_counter() - started, source="cache")
+                return cached
+            if self.completion_cache.replay_only:
+                raise LookupError("No recorded completion for this conversation (replay mode)")
+
+        async with self._get_llm_semaphore():
+            with LLM_IN_FLIGHT.track_inprogress(), LLM_COMPLETION.time(source="model"):
+                from litellm import acompletion
+                response = await acompletion(messages=messages, **self.llm_params)
+        next_message = response.choices[0].message.model_dump()  # type: ignore
+        content = next_message["content"]
+        if self.completion_cache is not None and isinstance(content, str):
+            self.completion_cache.put(key, self.llm_params["model"], content)
+        return content
 
     async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        with REQUESTS_IN_FLIGHT.track_inprogress(), REQUEST_LATENCY.time():
+            await self._answer(context, event_queue)
+
+    async def _answer(self, context: RequestContext, event_queue: EventQueue) -> None:
         # Parse the task
         user_input = context.get_user_input()
         
         # Maintain conversation history per context
-        if context.context_id not in self.ctx_id_to_messages:
-            self.ctx_id_to_messages[context.context_id] = []
-        messages = self.ctx_id_to_messages[context.context_id]
-        
-        messages.append({
+        user_message = {
             "role": "user",
             "content": user_input,
-        })
+        }
+        messages = self.conversations.get(context.context_id) + [user_message]
         
-        # Generate response using LLM
-        if LITELLM_AVAILABLE:
+        # Generate response using LLM (replay mode needs no litellm)
+        replay_only = self.completion_cache is not None and self.completion_cache.replay_only
+        if LITELLM_AVAILABLE or replay_only:
             try:
-                response = completion(
-                    messages=messages,
-                    model="openai/gpt-4o",
-                    custom_llm_provider="openai",
-                    temperature=0.0,
-                )
-                next_message = response.choices[0].message.model_dump()  # type: ignore
-                response_content = next_message["content"]
+                response_content = await self._complete(messages)
             except Exception as e:
+                LLM_ERRORS.inc()
                 print(f"Error calling litellm: {e}")
                 response_content = f"""<json>{{
     "code": "# Error generating code: {str(e)}"
@@ -84,11 +149,13 @@ class GeneralWhiteAgentExecutor(AgentExecutor):
     "code": "# Placeholder code response - install litellm for full functionality"
 }</json>"""
         
-        # Add assistant message to history
-        messages.append({
+        # Add the exchange to the history
+        self.conversations.append(context.context_id, user_message, {
             "role": "assistant",
             "content": response_content,
         })
+        CONVERSATIONS.set(len(self.conversations))
+        CONVERSATION_BYTES.set(self.conversations.total_bytes)
         
         # Send response
         await event_queue.enqueue_event(
@@ -102,14 +169,23 @@ class GeneralWhiteAgentExecutor(AgentExecutor):
         raise NotImplementedError
 
 
-def start_white_agent(agent_name="general_white_agent", host="localhost", port=9002):
-    """Start the white agent server."""
+def start_white_agent(agent_name="general_white_agent", host="localhost", port=9002, llm_cache=None, model=None, temperature=0.0):
+    """
+    Start the white agent server.
+    
+    Args:
+        llm_cache: Completion cache mode ("record", "replay" or "passthrough");
+                   defaults to WHITE_AGENT_LLM_CACHE
+        model: litellm model name; defaults to WHITE_AGENT_MODEL or openai/gpt-4o
+        temperature: Sampling temperature
+    """
     print("Starting white agent...")
     url = f"http://{host}:{port}"
     card = prepare_white_agent_card(url)
 
+    executor = GeneralWhiteAgentExecutor(completion_cache_mode=llm_cache, model=model, temperature=temperature)
     request_handler = DefaultRequestHandler(
-        agent_executor=GeneralWhiteAgentExecutor(),
+        agent_executor=executor,
         task_store=InMemoryTaskStore(),
     )
 
@@ -126,9 +202,17 @@ def start_white_agent(agent_name="general_white_agent", host="localhost", port=9
         from starlette.responses import JSONResponse
         return JSONResponse({
             "status": "online",
-            "agent_type": "white"
+            "agent_type": "white",
+            "model": executor.llm_params["model"],
+            "conversations": executor.conversations.stats(),
+            "completion_cache": executor.completion_cache.stats() if executor.completion_cache else None,
         })
     
+    metrics_endpoint(starlette_app)
+    
+    if LITELLM_AVAILABLE and not (executor.completion_cache is not None and executor.completion_cache.replay_only):
+        threading.Thread(target=importlib.import_module, args=("litellm",), daemon=True).start()
+    
     print(f"Starting White Agent on {url}")
     uvicorn.run(starlette_app, host=host, port=port)
 
@@ -140,8 +224,13 @@ if __name__ == "__main__":
     parser.add_argument("--host", type=str, default="localhost", help="Host to bind to")
     parser.add_argument("--port", type=int, default=9002, help="Port to bind to")
     parser.add_argument("--agent-name", type=str, default="general_white_agent", help="Agent name")
+    parser.add_argument("--model", type=str, default=None, help="litellm model (default: WHITE_AGENT_MODEL or openai/gpt-4o)")
+    parser.add_argument("--temperature", type=float, default=0.0, help="Sampling temperature")
+    parser.add_argument("--llm-cache", type=str, default=None, choices=["record", "replay", "passthrough"],
+                        help="Completion cache mode (default: WHITE_AGENT_LLM_CACHE or passthrough)")
     
     args = parser.parse_args()
-    start_white_agent(agent_name=args.agent_name, host=args.host, port=args.port)
+    start_white_agent(agent_name=args.agent_name, host=args.host, port=args.port, llm_cache=args.llm_cache,
+                      model=args.model, temperature=args.temperature)
 
 